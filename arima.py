@@ -1,44 +1,353 @@
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import pandas as pd
 from statsmodels.tsa.arima.model import ARIMA
+from scheduler import resolve_workers, run_tasks
+from model_record import ModelRecord
+from candidate_planner import plan_candidates
+from forecasting import last_observations, forecast_models
+from dataset_store import as_dataset
+from kalman_batch import fit_arima_batch
 
-def optimize_arima(series, p_range, d_range, q_range):
+SEARCH_STRATEGIES = ("grid", "two_phase")
+BACKENDS = ("statsmodels", "batch")
+COARSE_MAXITER = 5
+
+def _fit_arima_order(series, order, maxiter=None, start_params=None):
+    """
+    This function fits a single ARIMA candidate. It is the worker function of the parallel order search.
+
+    Parameters:
+    series (pandas.Series): The time series data to be modeled.
+    order (tuple): The (p, d, q) order to be fitted.
+    maxiter (int, optional): The maximum number of optimiser iterations, for a coarse fit. Default is None (statsmodels' default).
+    start_params (numpy.ndarray, optional): The parameters the optimiser starts from. Default is None (statsmodels' default start parameters).
+
+    Returns:
+    tuple: A tuple containing the order, the AIC value, the fitted parameters and the log-likelihood, or (order, None, None, None) if the fit fails.
+    """
+    try:
+        method_kwargs = None if maxiter is None else {'maxiter': maxiter}
+        results = ARIMA(series, order=order).fit(start_params=start_params, method_kwargs=method_kwargs)
+        return order, results.aic, results.params.values, results.llf
+    except Exception:
+        return order, None, None, None
+
+def _evaluate_arima_order(series, order, fit_cache=None):
+    """
+    This function returns the fit of a single ARIMA candidate, from the fit cache when possible.
+
+    Parameters:
+    series (pandas.Series): The time series data to be modeled.
+    order (tuple): The (p, d, q) order to be fitted.
+    fit_cache (FitCache, optional): The cache of previous fits. Default is None (no cache).
+
+    Returns:
+    tuple: A tuple containing the AIC value, the fitted parameters and the fitted ARIMA results. The results are None when the fit
+           comes from the cache, and the AIC and parameters are None when the fit fails.
+    """
+    key = None
+    if fit_cache is not None:
+        key = fit_cache.make_key(series, order, model_name="ARIMA")
+        entry = fit_cache.get(key)
+        if entry is not None:
+            return entry['aic'], entry['params'], None
+
+    try:
+        results = ARIMA(series, order=order).fit()
+        aic, params = results.aic, results.params.values
+    except:
+        results = aic = params = None
+
+    if fit_cache is not None:
+        fit_cache.put(key, params, results.llf if results is not None else None, aic)
+    return aic, params, results
+
+def optimize_arima(series, p_range, d_range, q_range, n_jobs=1, fit_cache=None, search_strategy="grid", top_k=5, plan=None, backend="statsmodels"):
     """
     This function optimizes the parameters of an ARIMA model for a given time series.
+    Only the de-duplicated, feasible orders of the candidate plan are fitted.
 
     Parameters:
     series (pandas.Series): The time series data to be modeled.
     p_range (list): A list of integers representing the range of p (AR order) values to be tested.
     d_range (list): A list of integers representing the range of d (differencing order) values to be tested.
     q_range (list): A list of integers representing the range of q (MA order) values to be tested.
+    n_jobs (int): The number of worker processes used to fit the candidates. 1 runs the serial search and None or 0 uses every CPU core. Default is 1.
+    fit_cache (FitCache, optional): The on-disk cache of previous fits, reused across runs. Default is None (no cache).
+    search_strategy (str): "grid" fits every candidate to convergence and "two_phase" runs the coarse-to-fine search of optimize_arima_two_phase. Default is "grid".
+    top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy. Default is 5.
+    plan (CandidatePlan, optional): The candidates to be searched, as built by candidate_planner.plan_candidates. Default is None (planned from the ranges).
+    backend (str): "statsmodels" fits every candidate with statsmodels and "batch" with the vectorised engine of kalman_batch,
+                   which always fits every planned order and ignores n_jobs, fit_cache and search_strategy. Default is "statsmodels".
 
     Returns:
     tuple: A tuple containing the best AIC value, the corresponding order (p, d, q), and the ARIMA model object with the best AIC.
     """    
+    if search_strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {search_strategy}")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+
     best_aic = np.inf
     best_order = None
+    best_params = None
     best_mdl = None
 
-    for p in p_range:
-        for d in d_range:
-            for q in q_range:
-                try:
-                    temp_model = ARIMA(series, order=(p, d, q))
-                    results = temp_model.fit()
-                    if results.aic < best_aic:
-                        best_aic = results.aic
-                        best_order = (p, d, q)
-                        best_mdl = results
-                except:
-                    continue
+    if plan is None:
+        plan = plan_candidates(len(series), p_range, d_range, q_range, model_name="ARIMA")
+    orders = plan.orders()
+    if not orders:
+        return best_aic, best_order, best_mdl
+
+    if backend == "batch":
+        best_aic, best_order, best_params = optimize_arima_batch({None: series}, orders)[None]
+        if best_order is not None:
+            best_mdl = ARIMA(series, order=best_order).smooth(best_params)
+        return best_aic, best_order, best_mdl
+
+    workers = min(resolve_workers(n_jobs), len(orders))
+    if search_strategy == "two_phase":
+        return optimize_arima_two_phase(series, orders, top_k, workers, fit_cache)
+    if workers > 1:
+        return optimize_arima_parallel(series, orders, workers, fit_cache)
+
+    for order in orders:
+        aic, params, results = _evaluate_arima_order(series, order, fit_cache)
+        if aic is not None and aic < best_aic:
+            best_aic = aic
+            best_order = order
+            best_params = params
+            best_mdl = results
+
+    if best_order is not None and best_mdl is None:
+        best_mdl = ARIMA(series, order=best_order).smooth(best_params)
     return best_aic, best_order, best_mdl
 
-def optimize_arima_models(df, selected_countries, variable, p_range, d_range, q_range, start_year, end_year):
+def optimize_arima_parallel(series, orders, workers, fit_cache=None):
     """
-    This function optimizes ARIMA models for a given set of countries and time series data.
+    This function fits the ARIMA candidates on a process pool and selects the one with the lowest AIC.
+    Only the AIC and the fitted parameters travel back from the workers; the best model is rebuilt
+    from its parameters without running the optimiser again. Candidates found in the fit cache are not sent to the pool.
+
+    Parameters:
+    series (pandas.Series): The time series data to be modeled.
+    orders (list): A list of (p, d, q) tuples to be tested, in the same order as the serial search.
+    workers (int): The number of worker processes.
+    fit_cache (FitCache, optional): The on-disk cache of previous fits. Default is None (no cache).
+
+    Returns:
+    tuple: A tuple containing the best AIC value, the corresponding order (p, d, q), and the ARIMA model object with the best AIC.
+    """
+    best_aic = np.inf
+    best_order = None
+    best_params = None
+
+    fits = {}
+    keys = {}
+    if fit_cache is not None:
+        for order in orders:
+            keys[order] = fit_cache.make_key(series, order, model_name="ARIMA")
+            entry = fit_cache.get(keys[order])
+            if entry is not None:
+                fits[order] = (entry['aic'], entry['params'])
+
+    pending = [order for order in orders if order not in fits]
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            for order, aic, params, llf in executor.map(_fit_arima_order, [series] * len(pending), pending):
+                fits[order] = (aic, params)
+                if fit_cache is not None:
+                    fit_cache.put(keys[order], params, llf, aic)
+
+    for order in orders:
+        aic, params = fits[order]
+        if aic is not None and aic < best_aic:
+            best_aic = aic
+            best_order = order
+            best_params = params
+
+    if best_order is None:
+        return best_aic, None, None
+    best_mdl = ARIMA(series, order=best_order).smooth(best_params)
+    return best_aic, best_order, best_mdl
+
+def optimize_arima_two_phase(series, orders, top_k=5, workers=1, fit_cache=None):
+    """
+    This function scores every ARIMA candidate with a coarse fit capped at COARSE_MAXITER optimiser iterations and refits only
+    the top_k candidates by approximate AIC to convergence, starting from their coarse parameters. Both phases run on a pool of
+    workers processes. Candidates found in the fit cache are scored with their converged AIC and are never refitted. Neither the
+    coarse fits nor the refits started from coarse parameters are cached, since the latter may end in a different local optimum
+    than the default-start fit a grid search would cache under the same key.
+
+    Parameters:
+    series (pandas.Series): The time series data to be modeled.
+    orders (list): A list of (p, d, q) tuples to be tested.
+    top_k (int): The number of candidates refined with a full fit. Default is 5.
+    workers (int): The number of worker processes. Default is 1 (serial).
+    fit_cache (FitCache, optional): The on-disk cache of previous fits. Default is None (no cache).
+
+    Returns:
+    tuple: A tuple containing the best AIC value, the corresponding order (p, d, q), and the ARIMA model object with the best AIC.
+    """
+    fits = {}
+    if fit_cache is not None:
+        for order in orders:
+            entry = fit_cache.get(fit_cache.make_key(series, order, model_name="ARIMA"))
+            if entry is not None:
+                fits[order] = (entry['aic'], entry['params'])
+
+    coarse = {}
+    tasks = {order: (series, order, COARSE_MAXITER) for order in orders if order not in fits}
+    for order, (_, aic, params, _) in run_tasks(_fit_arima_order, tasks, workers):
+        coarse[order] = (aic, params)
+    scores = {order: aic for order, (aic, _) in {**coarse, **fits}.items() if aic is not None and np.isfinite(aic)}
+
+    refine = sorted(scores, key=lambda order: (scores[order], orders.index(order)))[:max(top_k, 1)]
+    tasks = {order: (series, order, None, coarse[order][1]) for order in refine if order not in fits}
+    for order, (_, aic, params, _) in run_tasks(_fit_arima_order, tasks, workers):
+        fits[order] = (aic, params)
+
+    best_aic = np.inf
+    best_order = None
+    best_params = None
+    for order in refine:
+        aic, params = fits[order]
+        if aic is not None and aic < best_aic:
+            best_aic = aic
+            best_order = order
+            best_params = params
+
+    if best_order is None:
+        return best_aic, None, None
+    best_mdl = ARIMA(series, order=best_order).smooth(best_params)
+    return best_aic, best_order, best_mdl
+
+def optimize_arima_batch(series_by_key, orders):
+    """
+    This function runs the ARIMA order search for a batch of equal-length series at once. Each order is fitted to every
+    series in a single call of kalman_batch.fit_arima_batch, instead of one statsmodels model per series and order.
+
+    Parameters:
+    series_by_key (dict): A dictionary mapping a key (e.g. a country name) to its time series. All the series must have the same length.
+    orders (list): A list of (p, d, q) tuples to be tested.
+
+    Returns:
+    dict: A dictionary mapping each key to a tuple containing the best AIC value, the corresponding order (p, d, q) and the fitted
+          parameters in the statsmodels ARIMA order, or (inf, None, None) if every fit failed.
+    """
+    endog = np.vstack([np.asarray(series, dtype=np.float64) for series in series_by_key.values()])
+    best = {key: (np.inf, None, None) for key in series_by_key}
+
+    for order in orders:
+        fit = fit_arima_batch(endog, order)
+        for i, key in enumerate(series_by_key):
+            aic = fit['aic'][i]
+            if np.isfinite(aic) and aic < best[key][0]:
+                best[key] = (aic, order, fit['params'][i])
+    return best
+
+def iter_optimize_arima_batch(series_by_country, plans, search_settings=None):
+    """
+    This function runs the batched ARIMA order search for a set of countries, grouping the countries whose series have the
+    same length, and yields the result of each country as soon as its group is done.
+
+    Parameters:
+    series_by_country (dict): A dictionary mapping a country name to its time series.
+    plans (dict): A dictionary mapping a country name to its CandidatePlan.
+    search_settings (dict, optional): The settings of the search, kept on the model records. Default is None.
+
+    Yields:
+    tuple: A (country, result) pair, where result has the same keys as the result of optimize_arima_country.
+    """
+    groups = {}
+    for country, series in series_by_country.items():
+        groups.setdefault(len(series), []).append(country)
+
+    for countries in groups.values():
+        best = optimize_arima_batch({country: series_by_country[country] for country in countries}, plans[countries[0]].orders())
+        for country in countries:
+            aic, order, params = best[country]
+            if order is not None:
+                result = {
+                    'aic': aic,
+                    'order': order,
+                    'model_object': ModelRecord("ARIMA", series_by_country[country], order, params, aic, search_settings=search_settings)
+                }
+            else:
+                result = {'error': 'Model optimization failed.'}
+            result['candidate_plan'] = plans[country].describe()
+            yield country, result
+
+def search_settings(p_range, d_range, q_range, search_strategy="grid", top_k=5, backend="statsmodels"):
+    """
+    This function builds the settings of an ARIMA order search, as kept on the model records it selects.
+
+    Parameters:
+    p_range (list): The p values to be tested.
+    d_range (list): The d values to be tested.
+    q_range (list): The q values to be tested.
+    search_strategy (str): The order search strategy, "grid" or "two_phase". Default is "grid".
+    top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy. Default is 5.
+    backend (str): The fitting backend, "statsmodels" or "batch". Default is "statsmodels".
+
+    Returns:
+    dict: The keyword arguments of optimize_arima_country that define the search.
+    """
+    return {'p_range': list(p_range), 'd_range': list(d_range), 'q_range': list(q_range), 'search_strategy': search_strategy, 'top_k': top_k, 'backend': backend}
+
+def optimize_arima_country(data_series, p_range, d_range, q_range, n_jobs=1, fit_cache=None, search_strategy="grid", top_k=5, plan=None, backend="statsmodels"):
+    """
+    This function runs the ARIMA order search for the series of a single country.
+
+    Parameters:
+    data_series (pandas.Series): The time series data of the country.
+    p_range (list): A list of integers representing the range of p (AR order) values to be tested.
+    d_range (list): A list of integers representing the range of d (differencing order) values to be tested.
+    q_range (list): A list of integers representing the range of q (MA order) values to be tested.
+    n_jobs (int): The number of worker processes used for the order search. Default is 1 (serial).
+    fit_cache (FitCache, optional): The on-disk cache of previous fits. Default is None (no cache).
+    search_strategy (str): The order search strategy, "grid" or "two_phase". Default is "grid".
+    top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy. Default is 5.
+    plan (CandidatePlan, optional): The candidates to be searched. Default is None (planned from the ranges).
+    backend (str): The fitting backend, "statsmodels" or "batch". Default is "statsmodels".
+
+    Returns:
+    dict: A dictionary containing the AIC, order and model object (a ModelRecord, if successful), or an error message (if unsuccessful).
+          The 'candidate_plan' key reports the number of planned fits and the removed candidates.
+          When a fit cache is given, the 'cache_stats' key holds the cache hits and misses of the search.
+    """
+    if plan is None:
+        plan = plan_candidates(len(data_series), p_range, d_range, q_range, model_name="ARIMA")
+
+    try:
+        aic, order, model = optimize_arima(data_series, p_range, d_range, q_range, n_jobs, fit_cache, search_strategy, top_k, plan, backend)
+        if model is not None:
+            result = {
+                'aic': aic,
+                'order': order,
+                'model_object': ModelRecord("ARIMA", data_series, order, model.params, aic,
+                                            search_settings=search_settings(p_range, d_range, q_range, search_strategy, top_k, backend))
+            }
+        else:
+            result = {'error': 'Model optimization failed.'}
+    except Exception as e:
+        result = {'error': str(e)}
+
+    result['candidate_plan'] = plan.describe()
+    if fit_cache is not None:
+        result['cache_stats'] = fit_cache.stats()
+    return result
+
+def iter_optimize_arima_models(df, selected_countries, variable, p_range, d_range, q_range, start_year, end_year, n_jobs=1, fit_cache=None, search_strategy="grid", top_k=5, backend="statsmodels"):
+    """
+    This function optimizes ARIMA models for a given set of countries and yields the result of each country as soon as it is done.
+    When several countries are selected, the countries are modelled concurrently on a pool of n_jobs worker processes;
+    with a single country the workers are used for its order search instead. The candidates of every country are planned up front,
+    and a country without any feasible candidate is reported without being sent to the pool.
+    With the "batch" backend, the countries whose series have the same length are fitted together by iter_optimize_arima_batch.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the time series data.
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
     selected_countries (list): A list of country names for which the models will be optimized.
     variable (str): The name of the variable (column) in the DataFrame to be modeled.
     p_range (list): A list of integers representing the range of p (AR order) values to be tested.
@@ -46,94 +355,114 @@ def optimize_arima_models(df, selected_countries, variable, p_range, d_range, q_
     q_range (list): A list of integers representing the range of q (MA order) values to be tested.
     start_year (int): The starting year for the time series data.
     end_year (int): The ending year for the time series data.
+    n_jobs (int): The number of worker processes. 1 runs serially and None or 0 uses every CPU core. Default is 1.
+    fit_cache (FitCache, optional): The on-disk cache of previous fits. Its hit and miss counters are updated as results arrive. Default is None (no cache).
+    search_strategy (str): The order search strategy, "grid" or "two_phase". Default is "grid".
+    top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy. Default is 5.
+    backend (str): The fitting backend, "statsmodels" or "batch". The batch backend does not use n_jobs, fit_cache or search_strategy. Default is "statsmodels".
 
-    Returns:
-    dict: A dictionary containing the results of the ARIMA model optimization for each country.
-          The keys are country names, and the values are dictionaries containing the AIC, order, model summary,
-          and model object (if successful), or an error message (if unsuccessful).
+    Yields:
+    tuple: A (country, result) pair, where result is the dictionary returned by optimize_arima_country.
     """
-    arima_results = {}
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    dataset = as_dataset(df)
+    tasks = {}
+    plans = {}
 
     for country in selected_countries:
-        data_series = df[(df['Country'] == country) & 
-                         (df['Date'] >= start_year) & 
-                         (df['Date'] <= end_year) & 
-                         (df[variable].notna())][variable]
+        data_series = dataset.series(country, variable, start_year, end_year)
 
-        if data_series.empty or len(data_series) < max(p_range) + max(d_range) + max(q_range) + 1:
-            arima_results[country] = {'error': 'Insufficient data for modeling.'}
+        plan = plan_candidates(len(data_series), p_range, d_range, q_range, model_name="ARIMA")
+        if not plan.candidates:
+            yield country, {'error': 'Insufficient data for modeling.', 'candidate_plan': plan.describe()}
             continue
 
-        try:
-            aic, order, model = optimize_arima(data_series, p_range, d_range, q_range)
-            if model is not None:
-                arima_results[country] = {
-                    'aic': aic,
-                    'order': order,
-                    'model_summary': model.summary(),
-                    'model_object': model
-                }
-            else:
-                arima_results[country] = {'error': 'Model optimization failed.'}
-        except Exception as e:
-            arima_results[country] = {'error': str(e)}
+        tasks[country] = (data_series, p_range, d_range, q_range)
+        plans[country] = plan
+
+    if backend == "batch":
+        settings = search_settings(p_range, d_range, q_range, search_strategy, top_k, backend)
+        yield from iter_optimize_arima_batch({country: args[0] for country, args in tasks.items()}, plans, settings)
+        return
+
+    search_jobs, country_jobs = (1, n_jobs) if len(tasks) > 1 else (n_jobs, 1)
+    for country, args in tasks.items():
+        tasks[country] = args + (search_jobs, fit_cache.worker_copy() if fit_cache is not None else None, search_strategy, top_k, plans[country])
+    results = run_tasks(optimize_arima_country, tasks, country_jobs)
 
-    return arima_results
+    for country, result in results:
+        if fit_cache is not None:
+            fit_cache.merge_stats(result.pop('cache_stats'))
+        yield country, result
 
-def forecast_future(arima_results, df, variable, start_year, forecast_until_year=2100, replace_negative_forecast=False, sigma=2):
+def optimize_arima_models(df, selected_countries, variable, p_range, d_range, q_range, start_year, end_year, n_jobs=1, fit_cache=None, search_strategy="grid", top_k=5, backend="statsmodels"):
+    """
+    This function optimizes ARIMA models for a given set of countries and time series data.
+
+    Parameters:
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
+    selected_countries (list): A list of country names for which the models will be optimized.
+    variable (str): The name of the variable (column) in the DataFrame to be modeled.
+    p_range (list): A list of integers representing the range of p (AR order) values to be tested.
+    d_range (list): A list of integers representing the range of d (differencing order) values to be tested.
+    q_range (list): A list of integers representing the range of q (MA order) values to be tested.
+    start_year (int): The starting year for the time series data.
+    end_year (int): The ending year for the time series data.
+    n_jobs (int): The number of worker processes, shared between countries or used for the order search of a single country. Default is 1 (serial).
+    fit_cache (FitCache, optional): The on-disk cache of previous fits, reused across runs and sessions. Default is None (no cache).
+    search_strategy (str): The order search strategy, "grid" or "two_phase". Default is "grid".
+    top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy. Default is 5.
+    backend (str): The fitting backend, "statsmodels" or "batch" (vectorised across countries). Default is "statsmodels".
+
+    Returns:
+    dict: A dictionary containing the results of the ARIMA model optimization for each country.
+          The keys are country names, and the values are dictionaries containing the AIC, order and model object
+          (a ModelRecord, if successful), or an error message (if unsuccessful).
+    """
+    arima_results = dict(iter_optimize_arima_models(df, selected_countries, variable, p_range, d_range, q_range, start_year, end_year, n_jobs, fit_cache, search_strategy, top_k, backend))
+    return {country: arima_results[country] for country in selected_countries if country in arima_results}
+
+def forecast_future(arima_results, df, variable, start_year, forecast_until_year=2100, replace_negative_forecast=False, sigma=2, observations=None):
     """
     This function forecasts future values using ARIMA models based on the provided results.
 
     Parameters:
     arima_results (dict): A dictionary containing the results of ARIMA model optimization for each country.
                           The keys are country names, and the values are dictionaries containing the AIC, order,
-                          model summary, and model object (if successful), or an error message (if unsuccessful).
-    df (pandas.DataFrame): The DataFrame containing the time series data.
+                          and model object (if successful), or an error message (if unsuccessful).
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
     variable (str): The name of the variable (column) in the DataFrame to be forecasted.
     start_year (int): The starting year for the time series data.
     forecast_until_year (int): The year until which the forecasts will be made. Default is 2100.
     replace_negative_forecast (bool): A flag indicating whether negative forecast values should be replaced with zero. Default is False.
     sigma (float): The confidence interval multiplier for the forecast. Default is 2.
+    observations (dict, optional): The (last year, last value) pair of each country, as returned by forecasting.last_observations.
+                                   Passing it avoids scanning the data again when countries are forecast one at a time. Default is None (computed here in one pass).
 
     Returns:
-    dict: A dictionary containing the forecasted values, confidence intervals, country, model, order, and forecast until year
-          for each country. The keys are forecast keys in the format "{country} ({forecast_until_year}) - ARIMA {order}".
+    dict: A dictionary containing the forecasted values, confidence intervals, country, model, order, forecast until year
+          and model record (under 'model_object') for each country. The keys are forecast keys in the format "{country} ({forecast_until_year}) - ARIMA {order}".
     """
-    forecast_results = {}
+    models = {country: result['model_object'] for country, result in arima_results.items() if 'model_object' in result}
+    if observations is None:
+        observations = last_observations(df, variable, start_year, models)
+    forecasts = forecast_models(models, observations, forecast_until_year, replace_negative_forecast, sigma)
 
-    for country, result in arima_results.items():
-        if 'model_object' in result:
-            filtered_data = df[(df['Country'] == country) & (df['Date'] >= start_year)]
-            filtered_data = filtered_data.sort_values('Date') 
-            last_data_year = filtered_data['Date'].max()
-
-            if pd.isnull(last_data_year) or not isinstance(last_data_year, (int, np.integer)):
-                raise ValueError(f"The last year of the filtered data is invalid: {last_data_year}")
-
-            forecast_years = pd.date_range(start=pd.to_datetime(str(int(last_data_year) + 1)), end=pd.to_datetime(str(forecast_until_year + 1)), freq='YE').year
-            steps_to_forecast_until = len(forecast_years)
-            model = result['model_object']
-            forecast = model.get_forecast(steps=steps_to_forecast_until)
-            forecast_values = forecast.predicted_mean
-            forecast_ci = forecast.conf_int(alpha=1 - (sigma/2))
-            forecast_ci.columns = ['mean_ci_lower', 'mean_ci_upper']
-            forecast_values.index = forecast_years
-            forecast_ci.index = forecast_years
-
-            last_value = filtered_data.iloc[-1][variable]
-            forecast_values.iloc[0] = last_value
-
-            if replace_negative_forecast:
-                forecast_values[forecast_values < 0] = 0
-
-            forecast_key = f"{country} ({forecast_until_year}) - ARIMA {result['order']}"
-            forecast_results[forecast_key] = {
-                'forecast_values': forecast_values,
-                'forecast_ci': forecast_ci,
-                'country': country,
-                'model': 'AR',
-                'order': result['order'],
-                'forecast_until_year': forecast_until_year
-            }
+    forecast_results = {}
+    for country, model in models.items():
+        forecast_values, forecast_ci = forecasts[country]
+        result = arima_results[country]
+        forecast_key = f"{country} ({forecast_until_year}) - ARIMA {result['order']}"
+        forecast_results[forecast_key] = {
+            'forecast_values': forecast_values,
+            'forecast_ci': forecast_ci,
+            'country': country,
+            'model': 'AR',
+            'order': result['order'],
+            'forecast_until_year': forecast_until_year,
+            'model_object': model
+        }
 
     return forecast_results
\ No newline at end of file
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from scheduler import run_tasks
+from candidate_planner import plan_candidates
+from model_record import ModelRecord
+from arima import _evaluate_arima_order
+from sarimax import _fit_sarimax
+from dataset_store import as_dataset
+
+HORIZON = 5
+N_ORIGINS = 10
+MIN_TRAIN = 10
+
+def rolling_origins(n_obs, n_origins=N_ORIGINS, horizon=HORIZON, min_train=MIN_TRAIN):
+    """
+    This function chooses the forecast origins of a rolling-origin backtest: the last n_origins positions of the series
+    that leave a full horizon of observations after them and at least min_train observations up to them.
+
+    Parameters:
+    n_obs (int): The number of observations of the series.
+    n_origins (int, optional): The maximum number of origins. Default is 10.
+    horizon (int, optional): The number of years forecast from each origin. Default is 5.
+    min_train (int, optional): The minimum number of observations up to the first origin. Default is 10.
+
+    Returns:
+    list: The positions of the last observation used at each origin, in increasing order.
+    """
+    last = n_obs - horizon - 1
+    first = max(min_train - 1, last - n_origins + 1)
+    return list(range(first, last + 1))
+
+def _fit_candidate(model_name, series, order, seasonal_order, fit_cache=None):
+    if model_name == "ARIMA":
+        aic, params, _ = _evaluate_arima_order(series, order, fit_cache)
+    else:
+        aic, params, _ = _fit_sarimax(series, order, seasonal_order, fit_cache)
+    return aic, params
+
+def _forecast_origin(model_name, values, origin, fits, horizon):
+    """
+    Forecasts every fitted candidate from one origin by filtering the series up to the origin with the fixed parameters.
+    """
+    forecasts = {}
+    for (order, seasonal_order), (aic, params) in fits.items():
+        try:
+            record = ModelRecord(model_name, values[:origin + 1], order, params, aic, seasonal_order)
+            forecasts[(order, seasonal_order)] = np.asarray(record.get_forecast(horizon).predicted_mean, dtype=np.float64)
+        except Exception:
+            forecasts[(order, seasonal_order)] = None
+    return forecasts
+
+def _score(values, origins, forecasts_by_origin, horizon):
+    """
+    Pools the forecast errors of a candidate over every origin and horizon into its RMSE and MAPE (in percent, over the non-zero actual values).
+    """
+    errors = []
+    actuals = []
+    for origin in origins:
+        forecast = forecasts_by_origin.get(origin)
+        if forecast is None:
+            return None
+        actual = values[origin + 1:origin + 1 + horizon]
+        errors.append(forecast[:len(actual)] - actual)
+        actuals.append(actual)
+    errors = np.concatenate(errors)
+    actuals = np.concatenate(actuals)
+    nonzero = actuals != 0
+    return {
+        'forecasts': int(len(errors)),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mape': float(100 * np.mean(np.abs(errors[nonzero] / actuals[nonzero]))) if nonzero.any() else None
+    }
+
+def backtest_key(model_name, values, candidates, origins, horizon):
+    """
+    Builds the cache key of the backtest of a series.
+
+    Parameters:
+    model_name (str): "ARIMA" or "SARIMAX".
+    values (numpy.ndarray): The values of the series.
+    candidates (list): The (order, seasonal_order) pairs evaluated.
+    origins (list): The positions of the forecast origins.
+    horizon (int): The number of steps forecast from each origin.
+
+    Returns:
+    str: The hexadecimal SHA-256 digest identifying the backtest.
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    settings = [model_name, [[list(order), list(seasonal_order)] for order, seasonal_order in candidates], list(origins), horizon]
+    digest.update(json.dumps(settings).encode())
+    return digest.hexdigest()
+
+def _load_cached(cache_dir, key):
+    if cache_dir is None:
+        return None
+    try:
+        with open(os.path.join(cache_dir, key + ".json")) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def _store_cached(cache_dir, key, rows):
+    if cache_dir is None:
+        return
+    path = os.path.join(cache_dir, key + ".json")
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temp_path, "w") as file:
+            json.dump(rows, file)
+        os.replace(temp_path, path)
+    except OSError:
+        return
+
+def backtest_models(df, selected_countries, variable, model_name, p_range, d_range, q_range, start_year, end_year, seasonal_period=0,
+                    enable_seasonality=False, horizon=HORIZON, n_origins=N_ORIGINS, n_jobs=1, fit_cache=None, cache_dir=None):
+    """
+    This function evaluates the out-of-sample accuracy of candidate orders with a rolling-origin backtest.
+
+    The parameters of every candidate are estimated once per country, on the observations up to the first origin, so no
+    origin sees data from after it was fitted. At each origin the series up to that origin is filtered with these fixed
+    parameters, without running the optimiser again, and forecast horizon years ahead. The forecast errors of each candidate
+    are pooled over the origins into its RMSE and MAPE. The candidate fits and the forecasts of the origins run on a pool of
+    n_jobs worker processes, across countries. The scores of a country are cached in cache_dir under the hash of its data
+    and of the backtest settings, so a repeated backtest on the same data is read back without fitting anything.
+
+    Parameters:
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
+    selected_countries (list): A list of country names to be backtested.
+    variable (str): The name of the variable (column) in the DataFrame to be modeled.
+    model_name (str): "ARIMA" or "SARIMAX".
+    p_range (list): The p values to be tested.
+    d_range (list): The d values to be tested.
+    q_range (list): The q values to be tested.
+    start_year (int): The starting year for the time series data.
+    end_year (int): The ending year for the time series data.
+    seasonal_period (int, optional): The number of periods in a season, for SARIMAX. Default is 0.
+    enable_seasonality (bool, optional): A flag indicating whether seasonal SARIMAX candidates are tested. Default is False.
+    horizon (int, optional): The number of years forecast from each origin. Default is 5.
+    n_origins (int, optional): The maximum number of origins per country. Default is 10.
+    n_jobs (int, optional): The number of worker processes. 1 runs serially and None or 0 uses every CPU core. Default is 1.
+    fit_cache (FitCache, optional): The on-disk cache of candidate fits. Default is None (no cache).
+    cache_dir (str, optional): The directory of the cached backtest scores. Default is None (no cache).
+
+    Returns:
+    pandas.DataFrame: One row per country and candidate with the columns 'Country', 'Order', 'Seasonal Order', 'Origins',
+                      'Forecasts', 'RMSE', 'MAPE', 'AIC' and 'Rank' (by RMSE within the country), sorted by country and rank.
+                      Countries too short for a backtest are left out.
+    """
+    if model_name not in ("ARIMA", "SARIMAX"):
+        raise ValueError(f"Unknown model: {model_name}")
+
+    dataset = as_dataset(df)
+    rows = []
+    pending = {}
+    for country in selected_countries:
+        data_series = dataset.series(country, variable, start_year, end_year)
+        values = np.asarray(data_series, dtype=np.float64)
+        origins = rolling_origins(len(values), n_origins, horizon)
+        if not origins:
+            continue
+
+        plan = plan_candidates(origins[0] + 1, p_range, d_range, q_range, seasonal_period, enable_seasonality, model_name=model_name)
+        key = backtest_key(model_name, values, plan.candidates, origins, horizon)
+        cached = _load_cached(cache_dir, key)
+        if cached is not None:
+            rows.extend(dict(row, Country=country) for row in cached)
+        else:
+            pending[country] = (values, origins, plan.candidates, key)
+
+    fit_tasks = {}
+    for country, (values, origins, candidates, _) in pending.items():
+        train = pd.Series(values[:origins[0] + 1], name=variable)
+        for order, seasonal_order in candidates:
+            fit_tasks[(country, order, seasonal_order)] = (model_name, train, order, seasonal_order, fit_cache)
+
+    fits = {country: {} for country in pending}
+    for (country, order, seasonal_order), (aic, params) in run_tasks(_fit_candidate, fit_tasks, n_jobs):
+        if params is not None:
+            fits[country][(order, seasonal_order)] = (aic, params)
+
+    origin_tasks = {}
+    for country, (values, origins, _, _) in pending.items():
+        for origin in origins:
+            origin_tasks[(country, origin)] = (model_name, values, origin, fits[country], horizon)
+
+    forecasts = {country: {} for country in pending}
+    for (country, origin), origin_forecasts in run_tasks(_forecast_origin, origin_tasks, n_jobs):
+        for candidate, forecast in origin_forecasts.items():
+            forecasts[country].setdefault(candidate, {})[origin] = forecast
+
+    for country, (values, origins, candidates, key) in pending.items():
+        country_rows = []
+        for candidate in candidates:
+            if candidate not in fits[country]:
+                continue
+            score = _score(values, origins, forecasts[country].get(candidate, {}), horizon)
+            if score is None:
+                continue
+            order, seasonal_order = candidate
+            country_rows.append({
+                'Order': list(order),
+                'Seasonal Order': list(seasonal_order),
+                'Origins': len(origins),
+                'Forecasts': score['forecasts'],
+                'RMSE': score['rmse'],
+                'MAPE': score['mape'],
+                'AIC': float(fits[country][candidate][0])
+            })
+        _store_cached(cache_dir, key, country_rows)
+        rows.extend(dict(row, Country=country) for row in country_rows)
+
+    columns = ['Country', 'Order', 'Seasonal Order', 'Origins', 'Forecasts', 'RMSE', 'MAPE', 'AIC', 'Rank']
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    table = pd.DataFrame(rows)
+    table['Order'] = table['Order'].map(tuple)
+    table['Seasonal Order'] = table['Seasonal Order'].map(tuple)
+    table['Rank'] = table.groupby('Country')['RMSE'].rank(method='first').astype(int)
+    order = {country: i for i, country in enumerate(selected_countries)}
+    table = table.sort_values(['Country', 'Rank'], key=lambda column: column.map(order) if column.name == 'Country' else column)
+    return table[columns].reset_index(drop=True)
@@ -0,0 +1,241 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import time
+import tracemalloc
+import numpy as np
+from data_formats import load_dataset
+from candidate_planner import plan_candidates
+from sarimax import iter_optimize_sarimax_models, forecast_future as forecast_future_sarimax
+from arima import iter_optimize_arima_models, forecast_future as forecast_future_arima
+from dataset_store import as_dataset
+
+DATASET_PATTERNS = ("extracted_dataset/*.csv", "extracted_dataset/Anicca_Formated/*.csv")
+MODELS = ("ARIMA", "SARIMAX")
+
+def find_datasets(patterns=DATASET_PATTERNS, root="."):
+    """
+    This function lists the CSV files matched by the given patterns.
+
+    Parameters:
+    patterns (tuple): The glob patterns, relative to root. Default is the shipped extracted_dataset files.
+    root (str): The directory the patterns are relative to. Default is the current directory.
+
+    Returns:
+    list: The sorted paths of the matched files.
+    """
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(os.path.join(root, pattern)))
+    return sorted(files)
+
+def dataset_series(df):
+    """
+    This function finds the modelled variable of a dataset and the countries that have data for it.
+
+    Parameters:
+    df (pandas.DataFrame): The dataset in the original format, as returned by load_dataset.
+
+    Returns:
+    tuple: The name of the variable and the list of countries with at least one observation.
+    """
+    variable = [column for column in df.columns if column not in ('Country', 'Date')][0]
+    counts = df[df[variable].notna()].groupby('Country').size()
+    return variable, [country for country in df['Country'].unique() if counts.get(country, 0) > 0]
+
+def _planned_fits(dataset, country, variable, start_year, end_year, model_name, p_range, d_range, q_range, search_strategy, top_k):
+    n_obs = len(dataset.series(country, variable, start_year, end_year))
+    planned = len(plan_candidates(n_obs, p_range, d_range, q_range, model_name=model_name))
+    if search_strategy == "two_phase":
+        planned += min(top_k, planned)
+    return planned
+
+def _count_fits(result, planned):
+    if 'fit_log' in result:
+        return len(result['fit_log'])
+    if 'error' in result:
+        return 0
+    return planned
+
+def benchmark_model(df, variable, countries, model_name, p_range, d_range, q_range, start_year, end_year, forecast_until_year,
+                    search_strategy="grid", backend="statsmodels", n_jobs=1, top_k=5, seed=0):
+    """
+    This function times the order search and the forecasts of one model over the countries of a dataset.
+
+    The search is run through the iterator that optimize_arima_models and optimize_sarimax_models are built on, so the time of
+    each country is the time between two results. With n_jobs above 1 the countries overlap and these times are the gaps
+    between completions rather than the cost of each country. Peak memory is the largest amount traced by tracemalloc in this
+    process during the search and during the forecasts; the memory of worker processes is not included.
+
+    Parameters:
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The dataset in the original format.
+    variable (str): The name of the variable to be modelled.
+    countries (list): The countries to be modelled.
+    model_name (str): "ARIMA" or "SARIMAX".
+    p_range (list): The p values to be tested.
+    d_range (list): The d values to be tested.
+    q_range (list): The q values to be tested.
+    start_year (int): The starting year for the time series data.
+    end_year (int): The ending year for the time series data.
+    forecast_until_year (int): The year until which the forecasts are made.
+    search_strategy (str, optional): The order search strategy. Default is "grid".
+    backend (str, optional): The ARIMA fitting backend, "statsmodels" or "batch". Ignored for SARIMAX. Default is "statsmodels".
+    n_jobs (int, optional): The number of worker processes. Default is 1.
+    top_k (int, optional): The number of candidates refined by the "two_phase" strategy. Default is 5.
+    seed (int, optional): The seed of the NumPy random generator, set before the search and before the forecasts. Default is 0.
+
+    Returns:
+    dict: The timings of the model: the total fits, fits per second, wall times, peak memory and one record per country.
+    """
+    dataset = as_dataset(df)
+    if model_name == "ARIMA":
+        results = iter_optimize_arima_models(dataset, countries, variable, p_range, d_range, q_range, start_year, end_year,
+                                             n_jobs=n_jobs, search_strategy=search_strategy, top_k=top_k, backend=backend)
+    elif model_name == "SARIMAX":
+        results = iter_optimize_sarimax_models(dataset, countries, variable, p_range, d_range, q_range, 0, start_year, end_year, False,
+                                               search_strategy=search_strategy, n_jobs=n_jobs, top_k=top_k)
+    else:
+        raise ValueError(f"Unknown model: {model_name}")
+
+    np.random.seed(seed)
+    tracemalloc.start()
+    model_results = {}
+    per_country = []
+    start = last = time.perf_counter()
+    for country, result in results:
+        now = time.perf_counter()
+        planned = _planned_fits(dataset, country, variable, start_year, end_year, model_name, p_range, d_range, q_range, search_strategy, top_k)
+        record = {'country': country, 'seconds': now - last, 'fits': _count_fits(result, planned)}
+        if 'error' in result:
+            record['error'] = result['error']
+        else:
+            record['order'] = list(result['order'])
+            record['aic'] = result['aic']
+        per_country.append(record)
+        model_results[country] = result
+        last = now
+    search_seconds = time.perf_counter() - start
+    search_peak = tracemalloc.get_traced_memory()[1]
+
+    np.random.seed(seed)
+    tracemalloc.reset_peak()
+    forecast_future = forecast_future_arima if model_name == "ARIMA" else forecast_future_sarimax
+    start = time.perf_counter()
+    forecasts = forecast_future(model_results, dataset, variable, start_year, forecast_until_year)
+    forecast_seconds = time.perf_counter() - start
+    forecast_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    fits = sum(record['fits'] for record in per_country)
+    return {
+        'model': model_name,
+        'search_strategy': search_strategy,
+        'backend': backend if model_name == "ARIMA" else None,
+        'countries': len(per_country),
+        'fits': fits,
+        'search_seconds': search_seconds,
+        'fits_per_second': fits / search_seconds if search_seconds > 0 else None,
+        'forecasts': len(forecasts),
+        'forecast_seconds': forecast_seconds,
+        'search_peak_memory_bytes': search_peak,
+        'forecast_peak_memory_bytes': forecast_peak,
+        'per_country': per_country,
+    }
+
+def run_benchmark(files, models=MODELS, p_range=(0, 1, 2), d_range=(0, 1), q_range=(0, 1, 2), start_year=1985, end_year=2100,
+                  horizon=30, max_countries=None, search_strategy="grid", backend="statsmodels", n_jobs=1, top_k=5, seed=0):
+    """
+    This function benchmarks the order searches and forecasts over a set of dataset files.
+
+    Parameters:
+    files (list): The paths of the CSV files, in either format.
+    models (tuple, optional): The models to be benchmarked. Default is ("ARIMA", "SARIMAX").
+    p_range (tuple, optional): The p values to be tested. Default is (0, 1, 2).
+    d_range (tuple, optional): The d values to be tested. Default is (0, 1).
+    q_range (tuple, optional): The q values to be tested. Default is (0, 1, 2).
+    start_year (int, optional): The starting year for the time series data. Default is 1985.
+    end_year (int, optional): The ending year for the time series data. Default is 2100.
+    horizon (int, optional): The number of years forecast after the last year of each dataset. Default is 30.
+    max_countries (int, optional): The maximum number of countries modelled per file. Default is None (all).
+    search_strategy (str, optional): The order search strategy. Default is "grid".
+    backend (str, optional): The ARIMA fitting backend. Default is "statsmodels".
+    n_jobs (int, optional): The number of worker processes. Default is 1.
+    top_k (int, optional): The number of candidates refined by the "two_phase" strategy. Default is 5.
+    seed (int, optional): The seed of the NumPy random generator. Default is 0.
+
+    Returns:
+    dict: The settings of the run, one entry per file and model, and the totals of each model.
+    """
+    report = {
+        'settings': {
+            'p_range': list(p_range), 'd_range': list(d_range), 'q_range': list(q_range),
+            'start_year': start_year, 'end_year': end_year, 'horizon': horizon, 'max_countries': max_countries,
+            'search_strategy': search_strategy, 'backend': backend, 'n_jobs': n_jobs, 'top_k': top_k, 'seed': seed,
+        },
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'cpu_count': os.cpu_count()},
+        'runs': [],
+        'totals': {},
+    }
+
+    for file_name in files:
+        df = load_dataset(file_name)
+        variable, countries = dataset_series(df)
+        countries = countries[:max_countries]
+        forecast_until_year = int(df['Date'].max()) + horizon
+        for model_name in models:
+            run = benchmark_model(df, variable, countries, model_name, p_range, d_range, q_range, start_year, end_year,
+                                  forecast_until_year, search_strategy, backend, n_jobs, top_k, seed)
+            run['file'] = file_name
+            run['variable'] = variable
+            report['runs'].append(run)
+            print(f"{file_name} {model_name}: {run['fits']} fits in {run['search_seconds']:.1f}s, "
+                  f"{run['forecasts']} forecasts in {run['forecast_seconds']:.2f}s")
+
+    for model_name in models:
+        runs = [run for run in report['runs'] if run['model'] == model_name]
+        fits = sum(run['fits'] for run in runs)
+        search_seconds = sum(run['search_seconds'] for run in runs)
+        country_seconds = [record['seconds'] for run in runs for record in run['per_country']]
+        report['totals'][model_name] = {
+            'fits': fits,
+            'search_seconds': search_seconds,
+            'fits_per_second': fits / search_seconds if search_seconds > 0 else None,
+            'forecast_seconds': sum(run['forecast_seconds'] for run in runs),
+            'mean_seconds_per_country': float(np.mean(country_seconds)) if country_seconds else None,
+            'peak_memory_bytes': max((max(run['search_peak_memory_bytes'], run['forecast_peak_memory_bytes']) for run in runs), default=0),
+        }
+    return report
+
+def _int_list(text):
+    return tuple(int(value) for value in text.split(','))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ARIMA and SARIMAX order searches and forecasts on the shipped datasets.")
+    parser.add_argument('files', nargs='*', help="CSV files to benchmark. Default: the files in extracted_dataset/ and extracted_dataset/Anicca_Formated/.")
+    parser.add_argument('--output', default="benchmark_results.json", help="Path of the JSON report.")
+    parser.add_argument('--models', default="ARIMA,SARIMAX", help="Comma-separated models to benchmark.")
+    parser.add_argument('--p', type=_int_list, default=(0, 1, 2), help="Comma-separated p values.")
+    parser.add_argument('--d', type=_int_list, default=(0, 1), help="Comma-separated d values.")
+    parser.add_argument('--q', type=_int_list, default=(0, 1, 2), help="Comma-separated q values.")
+    parser.add_argument('--start-year', type=int, default=1985)
+    parser.add_argument('--end-year', type=int, default=2100)
+    parser.add_argument('--horizon', type=int, default=30, help="Years forecast after the last year of each file.")
+    parser.add_argument('--max-countries', type=int, default=None, help="Maximum number of countries modelled per file.")
+    parser.add_argument('--search-strategy', default="grid")
+    parser.add_argument('--backend', default="statsmodels", help="ARIMA fitting backend, statsmodels or batch.")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    files = args.files or find_datasets(root=os.path.dirname(os.path.abspath(__file__)))
+    report = run_benchmark(files, tuple(args.models.split(',')), args.p, args.d, args.q, args.start_year, args.end_year,
+                           args.horizon, args.max_countries, args.search_strategy, args.backend, args.workers, args.top_k, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=float)
+    print(f"Benchmark report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from collections import Counter
+
+SEASONAL_RANGE = (0, 1)
+
+class CandidatePlan:
+
+    def __init__(self, candidates, dropped, duplicates):
+        """
+        Initialize the plan of an order search.
+
+        Parameters:
+        candidates (list): The (order, seasonal_order) pairs to be fitted, in search order.
+        dropped (list): The (order, seasonal_order, reason) triples of the candidates that cannot be fitted.
+        duplicates (int): The number of redundant combinations that were removed because they describe a model already in the plan.
+
+        Returns:
+        None
+        """
+        self.candidates = candidates
+        self.dropped = dropped
+        self.duplicates = duplicates
+        self._feasible = set(candidates)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __contains__(self, candidate):
+        return candidate in self._feasible
+
+    def orders(self):
+        """
+        Returns the (p, d, q) orders of the planned candidates, for the non-seasonal searches.
+        """
+        return [order for order, _ in self.candidates]
+
+    def describe(self):
+        """
+        Returns a one-line report of the number of fits that will run and of the combinations that were removed, by reason.
+        """
+        description = f"{len(self.candidates)} candidate fits planned"
+        if self.duplicates:
+            description += f", {self.duplicates} duplicate combinations removed"
+        if self.dropped:
+            reasons = Counter(reason for _, _, reason in self.dropped)
+            description += f", {len(self.dropped)} infeasible candidates dropped (" + ", ".join(f"{count} {reason}" for reason, count in reasons.items()) + ")"
+        return description + "."
+
+def candidate_feasibility(n_obs, order, seasonal_order=(0, 0, 0, 0), model_name="SARIMAX"):
+    """
+    This function checks whether a candidate can be estimated on a series of n_obs observations.
+
+    A candidate is infeasible when its differencing plus its longest lag reaches the length of the series, or when the
+    differenced series has no more observations than the model has parameters. Such fits either fail or return a
+    meaningless AIC after the optimiser has run.
+
+    Parameters:
+    n_obs (int): The number of observations of the series.
+    order (tuple): The (p, d, q) order of the candidate.
+    seasonal_order (tuple, optional): The (P, D, Q, m) seasonal order of the candidate. Default is (0, 0, 0, 0).
+    model_name (str, optional): "ARIMA" or "SARIMAX". ARIMA models estimate a constant when the series is not differenced. Default is "SARIMAX".
+
+    Returns:
+    str: The reason why the candidate is infeasible, or None if it can be fitted.
+    """
+    p, d, q = order
+    P, D, Q, m = seasonal_order
+    if (P or D or Q) and m < 2:
+        return "seasonal period below 2"
+
+    differencing = d + D * m
+    if differencing + max(p + P * m, q + Q * m) >= n_obs:
+        return "differencing and lags exceed the series length"
+
+    n_params = p + q + P + Q + 1
+    if model_name == "ARIMA" and differencing == 0:
+        n_params += 1
+    if n_obs - differencing <= n_params:
+        return "fewer observations than parameters"
+    return None
+
+def plan_candidates(n_obs, p_range, d_range, q_range, seasonal_period=0, enable_seasonality=False, seasonal_range=SEASONAL_RANGE, model_name="SARIMAX"):
+    """
+    This function builds the de-duplicated list of feasible candidates of an order search, in grid order (p, d, q, P, D, Q).
+
+    Without seasonality every (P, D, Q) combination describes the same non-seasonal model, so a single (0, 0, 0, 0)
+    seasonal order is planned per (p, d, q). Repeated values in the ranges are planned once.
+
+    Parameters:
+    n_obs (int): The number of observations of the series.
+    p_range (list): The p values to be tested.
+    d_range (list): The d values to be tested.
+    q_range (list): The q values to be tested.
+    seasonal_period (int, optional): The number of periods in a season. Default is 0.
+    enable_seasonality (bool, optional): A flag indicating whether seasonal components are searched. Default is False.
+    seasonal_range (tuple, optional): The P, D and Q values to be tested when seasonality is enabled. Default is (0, 1).
+    model_name (str, optional): "ARIMA" or "SARIMAX". Default is "SARIMAX".
+
+    Returns:
+    CandidatePlan: The plan, with the candidates to be fitted and the candidates that were removed.
+    """
+    if enable_seasonality:
+        seasonal_orders = [(P, D, Q, seasonal_period) for P in seasonal_range for D in seasonal_range for Q in seasonal_range]
+    else:
+        seasonal_orders = [(0, 0, 0, 0)] * len(seasonal_range) ** 3 if model_name == "SARIMAX" else [(0, 0, 0, 0)]
+
+    candidates = []
+    dropped = []
+    seen = set()
+    duplicates = 0
+    for p in p_range:
+        for d in d_range:
+            for q in q_range:
+                for seasonal_order in seasonal_orders:
+                    candidate = ((p, d, q), seasonal_order)
+                    if candidate in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(candidate)
+
+                    reason = candidate_feasibility(n_obs, *candidate, model_name=model_name)
+                    if reason is None:
+                        candidates.append(candidate)
+                    else:
+                        dropped.append(candidate + (reason,))
+
+    return CandidatePlan(candidates, dropped, duplicates)
@@ -0,0 +1,120 @@
+import numpy as np
+
+def parse_anchors(target_years_text, target_values_text):
+    """
+    This function parses the target years and values of a correction.
+
+    Parameters:
+    target_years_text (str): One target year, or several separated by commas (e.g. "2030, 2050, 2100").
+    target_values_text (str): The target value of each target year, separated by commas.
+
+    Returns:
+    list: The (year, value) anchors, sorted by year.
+
+    Raises:
+    ValueError: If a year or value cannot be parsed, if the numbers of years and values differ, or if a year is repeated.
+    """
+    years = [int(year) for year in target_years_text.split(',') if year.strip()]
+    values = [float(value) for value in target_values_text.split(',') if value.strip()]
+    if len(years) != len(values):
+        raise ValueError(f"{len(years)} target years were given for {len(values)} target values.")
+    if len(set(years)) != len(years):
+        raise ValueError("A target year is given more than once.")
+    return sorted(zip(years, values))
+
+def correct_matrix(years, values, anchors, start_year=None, continuous=False, short=False, start=False):
+    """
+    This function corrects a set of forecasts towards piecewise-linear targets, for every forecast and year at once.
+
+    From the start year to the last anchor, each forecast follows straight lines from its value in the start year through
+    the (year, value) anchors. With start set, each year of that range takes the value of the next anchor instead. After the
+    last anchor, a continuous correction extends the last line, a short correction holds the last target value, and otherwise
+    the forecast is left as it was. Negative values of the corrected forecasts are replaced with zero.
+
+    A forecast is only corrected when its horizon contains the start year and every anchor, and every anchor is after the start year.
+    With a single anchor this is the linear correction of the forecast settings panel.
+
+    Parameters:
+    years (numpy.ndarray): The consecutive years of the rows of values.
+    values (numpy.ndarray): The forecasts, with one row per year and one column per forecast, NaN outside the horizon of each forecast.
+    anchors (list): The (year, value) anchors, sorted by year.
+    start_year (int, optional): The year the correction starts from. Default is None (the first year of each forecast).
+    continuous (bool, optional): Whether the last line is extended after the last anchor. Default is False.
+    short (bool, optional): Whether the last target value is held after the last anchor. Default is False.
+    start (bool, optional): Whether each year takes the value of the next anchor instead of following the lines. Default is False.
+
+    Returns:
+    tuple: The corrected copy of values, and a boolean array flagging the forecasts that were corrected.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    corrected = np.array(values, dtype=np.float64)
+    n_years, n_series = corrected.shape
+    if not anchors or not n_years or not n_series:
+        return corrected, np.zeros(n_series, dtype=bool)
+
+    covered = ~np.isnan(corrected)
+    has_data = covered.any(axis=0)
+    first = np.where(has_data, years[np.argmax(covered, axis=0)], np.iinfo(np.int64).max)
+    last = np.where(has_data, years[n_years - 1 - np.argmax(covered[::-1], axis=0)], np.iinfo(np.int64).min)
+
+    anchor_years = np.array([year for year, _ in anchors], dtype=np.int64)
+    anchor_values = np.array([value for _, value in anchors], dtype=np.float64)
+    starts = first if start_year is None else np.full(n_series, start_year, dtype=np.int64)
+    valid = has_data & (starts >= first) & (starts < anchor_years[0]) & (anchor_years[-1] <= last)
+    if not valid.any():
+        return corrected, valid
+
+    columns = np.flatnonzero(valid)
+    block = corrected[:, columns]
+    starts = starts[columns]
+    current = block[starts - years[0], np.arange(len(columns))]
+
+    knot_years = np.vstack([starts[None, :], np.broadcast_to(anchor_years[:, None], (len(anchors), len(columns)))])
+    knot_values = np.vstack([current[None, :], np.broadcast_to(anchor_values[:, None], (len(anchors), len(columns)))])
+    segment = np.clip(np.searchsorted(anchor_years, years, side='left'), 0, len(anchors) - 1)
+    x0, x1 = knot_years[segment], knot_years[segment + 1]
+    y0, y1 = knot_values[segment], knot_values[segment + 1]
+    slope = (y1 - y0) / (x1 - x0)
+
+    year_grid = years[:, None]
+    in_range = (year_grid >= starts[None, :]) & (year_grid <= anchor_years[-1])
+    after_target = year_grid > anchor_years[-1]
+
+    if start:
+        block[in_range] = np.broadcast_to(y1, block.shape)[in_range]
+    else:
+        lines = y0 + slope * (year_grid - x0)
+        block[in_range] = lines[in_range]
+        if continuous:
+            last_slope = (knot_values[-1] - knot_values[-2]) / (knot_years[-1] - knot_years[-2])
+            at_target = knot_values[-2] + last_slope * (anchor_years[-1] - knot_years[-2])
+            extension = at_target + last_slope * (year_grid - anchor_years[-1])
+            block[after_target & covered[:, columns]] = extension[after_target & covered[:, columns]]
+        elif short:
+            block[after_target & covered[:, columns]] = anchor_values[-1]
+
+    block[block < 0] = 0
+    corrected[:, columns] = block
+    return corrected, valid
+
+def apply_correction(forecast_store, forecast_keys, anchors, start_year=None, continuous=False, short=False, start=False):
+    """
+    This function applies one correction to several stored forecasts in a single pass over their block of values.
+
+    Parameters:
+    forecast_store (ForecastStore): The store of the forecasts. The corrected values are written back into it.
+    forecast_keys (list): The keys of the forecasts to be corrected.
+    anchors (list): The (year, value) anchors, sorted by year.
+    start_year (int, optional): The year the correction starts from. Default is None (the first year of each forecast).
+    continuous (bool, optional): Whether the last line is extended after the last anchor. Default is False.
+    short (bool, optional): Whether the last target value is held after the last anchor. Default is False.
+    start (bool, optional): Whether each year takes the value of the next anchor instead of following the lines. Default is False.
+
+    Returns:
+    tuple: The list of corrected keys and the list of keys that could not be corrected (see correct_matrix).
+    """
+    years, values = forecast_store.matrix(forecast_keys)
+    corrected, valid = correct_matrix(years, values, anchors, start_year, continuous, short, start)
+    corrected_keys = [key for key, ok in zip(forecast_keys, valid) if ok]
+    forecast_store.set_matrix(corrected_keys, years, corrected[:, valid])
+    return corrected_keys, [key for key, ok in zip(forecast_keys, valid) if not ok]
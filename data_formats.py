@@ -0,0 +1,329 @@
+import glob
+import hashlib
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT = "feather" if importlib.util.find_spec("pyarrow") is not None else "npz"
+
+def _to_cube(rows, row_keys, column_keys):
+    """
+    Scatters the rows of a table into a (row key, first column key, second column key) array of values, NaN where a combination has no row.
+    The keys are factorized in the order of first appearance, or sorted for a key passed as (key, True).
+    """
+    codes = []
+    labels = []
+    for key in column_keys:
+        key, sort = key if isinstance(key, tuple) else (key, False)
+        key_codes, key_labels = pd.factorize(key, sort=sort, use_na_sentinel=False)
+        codes.append(key_codes)
+        labels.append(key_labels)
+    flat = codes[0] * len(labels[1]) + codes[1]
+    if len(np.unique(flat)) != len(flat):
+        raise ValueError("Index contains duplicate entries, cannot reshape")
+    values = np.asarray(rows)
+    cube = np.full((len(labels[0]), len(labels[1]), len(row_keys)), np.nan, dtype=np.result_type(values.dtype, np.float64))
+    cube[codes[0], codes[1]] = values
+    return cube, labels[0], labels[1]
+
+def convert_new_format_to_original(new_df):
+    """
+    Converts a dataframe in the new (wide) format to the original (long) format.
+
+    Every value of the 'Variable' column becomes a column of the result, in the order of first appearance, so files with
+    several variables are converted in one pass. A file with a single variable keeps the row order of the melt; with several
+    variables the rows are ordered by country (in the order of the columns) and date (in the order of the file), and the rows
+    without a variable are left out.
+
+    Parameters:
+    new_df (pandas.DataFrame): The dataframe in the new format. It should have columns 'Date', 'Variable', and other columns representing countries.
+
+    Returns:
+    pandas.DataFrame: The dataframe in the original format. It will have columns 'Date', 'Country', and one column per variable.
+
+    Raises:
+    ValueError: If a variable has several rows for the same date.
+    """
+    variables = new_df['Variable'].dropna().unique()
+    if len(variables) <= 1:
+        melted_df = new_df.melt(id_vars=['Date', 'Variable'], var_name='Country', value_name='Value')
+        variable_name = melted_df['Variable'].iloc[0]
+        return melted_df.rename(columns={'Value': variable_name}).drop(columns=['Variable'])
+
+    new_df = new_df[new_df['Variable'].notna()]
+    countries = list(new_df.columns.drop(['Date', 'Variable']))
+    cube, variables, dates = _to_cube(new_df[countries], countries, [new_df['Variable'], new_df['Date']])
+    original_df = pd.DataFrame(cube.transpose(2, 1, 0).reshape(-1, len(variables)), columns=list(variables))
+    original_df.insert(0, 'Country', np.repeat(countries, len(dates)))
+    original_df.insert(0, 'Date', np.tile(np.asarray(dates), len(countries)))
+    return original_df
+
+def convert_original_to_new_format(df, variables=None):
+    """
+    Converts a dataframe in the original (long) format to the new (wide) format, the reverse of convert_new_format_to_original.
+
+    Parameters:
+    df (pandas.DataFrame): The dataframe in the original format, with columns 'Country', 'Date' and the variables.
+    variables (list, optional): The variables to be converted. Default is None (every column other than 'Country' and 'Date').
+
+    Returns:
+    pandas.DataFrame: The dataframe in the new format, with columns 'Date', 'Variable' and one column per country (in the order
+                      of first appearance), and one row per variable and date, grouped by variable in the order given and sorted by date.
+
+    Raises:
+    ValueError: If a country has several rows for the same date.
+    """
+    if variables is None:
+        variables = [column for column in df.columns if column not in ('Country', 'Date')]
+    variables = list(variables)
+    cube, countries, dates = _to_cube(df[variables], variables, [df['Country'], (df['Date'], True)])
+    new_df = pd.DataFrame(cube.transpose(2, 1, 0).reshape(-1, len(countries)), columns=list(countries))
+    new_df.insert(0, 'Variable', np.repeat(variables, len(dates)))
+    new_df.insert(0, 'Date', np.tile(np.asarray(dates), len(variables)))
+    return new_df
+
+def dataset_cache_path(file_name, cache_dir):
+    """
+    Builds the path of the cached copy of a CSV file.
+
+    The name is made of the hash of the absolute path of the file followed by the hash of its size and modification time,
+    so an edited file gets a new entry and the entries of the same file share a prefix.
+
+    Parameters:
+    file_name (str): The path of the CSV file.
+    cache_dir (str): The directory of the cached datasets.
+
+    Returns:
+    str: The path of the cache entry, with the extension of CACHE_FORMAT.
+    """
+    stat = os.stat(file_name)
+    path_key = hashlib.sha256(os.path.abspath(file_name).encode()).hexdigest()[:16]
+    version_key = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{path_key}-{version_key}.{CACHE_FORMAT}")
+
+OBJECT_KINDS = {float: 1, int: 2, bool: 3, str: 4}
+
+def _write_npz(file, df):
+    """
+    Writes a dataframe as one array per column, with the column names and dtypes, without pickling any value.
+
+    String columns are stored as their distinct values and the code of each row (-1 where it is missing), so the strings
+    are built once per distinct value when the entry is read. The values of object columns,
+    which may mix numbers and text, are split into a float array and a string array with the kind of each value
+    (missing, float, int, bool or str, see OBJECT_KINDS).
+    """
+    arrays = {'columns': np.array([str(column) for column in df.columns]), 'dtypes': np.array([str(dtype) for dtype in df.dtypes])}
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        missing = values.isna().to_numpy()
+        if values.dtype.kind in 'biufcmM':
+            arrays[f"values_{i}"] = values.to_numpy()
+        elif values.dtype == object:
+            items = values.to_numpy()
+            kinds = np.array([0 if is_missing else OBJECT_KINDS.get(type(item), 4) for item, is_missing in zip(items, missing)], dtype=np.int8)
+            numbers = (kinds >= 1) & (kinds <= 3)
+            arrays[f"kinds_{i}"] = kinds
+            arrays[f"numbers_{i}"] = np.where(numbers, items, np.nan).astype(np.float64)
+            arrays[f"values_{i}"] = np.where(kinds == 4, items, "").astype(str)
+        else:
+            codes, uniques = pd.factorize(values)
+            arrays[f"codes_{i}"] = codes
+            arrays[f"values_{i}"] = np.asarray(uniques.astype(object), dtype=str)
+    np.savez(file, **arrays)
+
+def _read_npz(path):
+    """
+    Reads a dataframe written by _write_npz.
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        columns = {}
+        for i, (column, dtype) in enumerate(zip(arrays['columns'], arrays['dtypes'])):
+            values = arrays[f"values_{i}"]
+            if f"kinds_{i}" in arrays:
+                kinds = arrays[f"kinds_{i}"]
+                numbers = arrays[f"numbers_{i}"]
+                items = values.astype(object)
+                items[kinds == 0] = np.nan
+                for kind_type, kind in OBJECT_KINDS.items():
+                    if kind_type is not str and (kinds == kind).any():
+                        items[kinds == kind] = [kind_type(number) for number in numbers[kinds == kind]]
+                columns[str(column)] = pd.Series(items, dtype=object)
+                continue
+            if f"codes_{i}" in arrays:
+                values = pd.array(values.astype(object), dtype=str(dtype)).take(arrays[f"codes_{i}"], allow_fill=True)
+            columns[str(column)] = pd.Series(values).astype(str(dtype))
+    return pd.DataFrame(columns)
+
+def _read_cached(path):
+    try:
+        if CACHE_FORMAT == "feather":
+            return pd.read_feather(path)
+        return _read_npz(path)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def _store_cached(path, df):
+    path_key = os.path.basename(path).split("-")[0]
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if CACHE_FORMAT == "feather":
+            df.reset_index(drop=True).to_feather(temp_path)
+        else:
+            with open(temp_path, 'wb') as file:
+                _write_npz(file, df)
+        os.replace(temp_path, path)
+    except (OSError, ValueError):
+        return
+    for stale_path in glob.glob(os.path.join(os.path.dirname(path), f"{path_key}-*.{CACHE_FORMAT}")):
+        if stale_path != path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                continue
+
+def load_dataset(file_name, cache_dir=None):
+    """
+    Loads a CSV file in either format and returns it in the original format.
+
+    Files with a 'Country' column are already in the original format; the others are converted with
+    convert_new_format_to_original. When a cache directory is given, the converted dataframe is stored there in a
+    columnar binary format (Feather if pyarrow is installed, otherwise a numpy .npz archive of one array per column),
+    keyed by the path, size and modification time of the file, so loading the same file again neither parses the CSV
+    nor converts it. The older entries of a file are removed when it is cached again after a change, and an entry that
+    cannot be read is removed and treated as a miss.
+
+    Parameters:
+    file_name (str): The path of the CSV file.
+    cache_dir (str, optional): The directory of the cached datasets. It is created if it does not exist. Default is None (no cache).
+
+    Returns:
+    pandas.DataFrame: The dataframe in the original format.
+    """
+    path = dataset_cache_path(file_name, cache_dir) if cache_dir is not None else None
+    if path is not None:
+        cached = _read_cached(path)
+        if cached is not None:
+            return cached
+
+    new_df = pd.read_csv(file_name)
+    df = new_df if 'Country' in new_df.columns else convert_new_format_to_original(new_df)
+    if path is not None:
+        _store_cached(path, df)
+    return df
+
+CHUNK_ROWS = 100_000
+
+def dataset_columns(file_name):
+    """
+    Reads the header of a CSV file without reading its rows.
+
+    Parameters:
+    file_name (str): The path of the CSV file.
+
+    Returns:
+    list: The column names. A file with a 'Country' column is in the original format and its other columns are variables;
+          a file with a 'Variable' column is in the new format and its other columns are countries.
+    """
+    return list(pd.read_csv(file_name, nrows=0).columns)
+
+def iter_dataset_chunks(file_name, variables=None, countries=None, start_year=None, end_year=None, chunksize=CHUNK_ROWS):
+    """
+    This function reads a CSV file in either format in chunks of rows and yields each chunk in the original format.
+
+    Only the columns needed are parsed: 'Country', 'Date' and the requested variables of a file in the original format, or
+    'Date', 'Variable' and the requested countries of a file in the new format. The rows outside the countries, variables
+    and year window are dropped from each chunk before the next one is read, so the memory used is bounded by the chunk
+    size and the size of the selection rather than by the size of the file.
+
+    Parameters:
+    file_name (str): The path of the CSV file.
+    variables (list, optional): The variables to be kept: columns of a file in the original format, or values of the 'Variable'
+                                column of a file in the new format. Default is None (every variable).
+    countries (list, optional): The countries to be kept. Default is None (every country).
+    start_year (int, optional): The first year to be kept. Default is None (no lower bound).
+    end_year (int, optional): The last year to be kept. Default is None (no upper bound).
+    chunksize (int, optional): The number of rows read at a time. Default is 100,000.
+
+    Yields:
+    tuple: The chunk in the original format (possibly empty; for a file in the new format, with only the variables of the rows read), the number of bytes of the file read so far and the size of the file.
+
+    Raises:
+    ValueError: If a requested variable is not a column of a file in the original format.
+    """
+    columns = dataset_columns(file_name)
+    long_format = 'Country' in columns
+    if long_format:
+        missing = [variable for variable in variables or [] if variable not in columns]
+        if missing:
+            raise ValueError(f"Unknown variables: {missing}")
+        usecols = ['Country', 'Date'] + [column for column in columns if column not in ('Country', 'Date') and (variables is None or column in variables)]
+    else:
+        usecols = ['Date', 'Variable'] + [column for column in columns if column not in ('Date', 'Variable') and (countries is None or column in countries)]
+
+    total_bytes = os.path.getsize(file_name)
+    with open(file_name, 'rb') as file:
+        for chunk in pd.read_csv(file, usecols=usecols, chunksize=chunksize):
+            mask = pd.Series(True, index=chunk.index)
+            if start_year is not None:
+                mask &= chunk['Date'] >= start_year
+            if end_year is not None:
+                mask &= chunk['Date'] <= end_year
+            if long_format and countries is not None:
+                mask &= chunk['Country'].isin(countries)
+            if not long_format and variables is not None:
+                mask &= chunk['Variable'].isin(variables)
+            chunk = chunk[mask]
+            if not long_format:
+                chunk = convert_new_format_to_original(chunk) if not chunk.empty else pd.DataFrame(columns=['Date', 'Country'])
+            yield chunk, file.tell(), total_bytes
+
+def stream_dataset(file_name, variables=None, countries=None, start_year=None, end_year=None, chunksize=CHUNK_ROWS, progress=None):
+    """
+    This function loads the selected columns, countries and years of a CSV file in either format, in chunks (see iter_dataset_chunks).
+
+    The chunks of a file in the new format hold the variables of the rows they read, so with several variables a country
+    and date can be spread over several chunks. Those rows are merged, and the rows are put in the order of
+    convert_new_format_to_original (by country, then by date in the order of the file), so the result is the same as
+    load_dataset followed by the same selection.
+
+    Parameters:
+    file_name (str): The path of the CSV file.
+    variables (list, optional): The variables to be kept. Default is None (every variable).
+    countries (list, optional): The countries to be kept. Default is None (every country).
+    start_year (int, optional): The first year to be kept. Default is None (no lower bound).
+    end_year (int, optional): The last year to be kept. Default is None (no upper bound).
+    chunksize (int, optional): The number of rows read at a time. Default is 100,000.
+    progress (callable, optional): A function called after each chunk with the number of bytes read so far and the size of the file. Default is None.
+
+    Returns:
+    pandas.DataFrame: The selected data in the original format.
+    """
+    chunks = []
+    empty = pd.DataFrame(columns=['Country', 'Date'])
+    for chunk, bytes_read, total_bytes in iter_dataset_chunks(file_name, variables, countries, start_year, end_year, chunksize):
+        if chunk.empty:
+            empty = chunk
+        else:
+            chunks.append(chunk)
+        if progress is not None:
+            progress(bytes_read, total_bytes)
+    if not chunks:
+        return empty.reset_index(drop=True)
+    original_df = pd.concat(chunks, ignore_index=True)
+    if 'Country' in dataset_columns(file_name):
+        return original_df
+
+    countries = {country: i for i, country in enumerate(original_df['Country'].unique())}
+    variable_columns = [column for column in original_df.columns if column not in ('Date', 'Country')]
+    if len(variable_columns) > 1:
+        original_df = original_df.groupby(['Country', 'Date'], sort=False, dropna=False)[variable_columns].first().reset_index()
+    original_df = original_df.sort_values('Country', key=lambda column: column.map(countries), kind='stable')
+    return original_df[['Date', 'Country'] + variable_columns].reset_index(drop=True)
@@ -0,0 +1,90 @@
+import numpy as np
+from matrix_store import MatrixStore
+
+class DatasetStore:
+
+    def __init__(self, df):
+        """
+        Initialize an indexed store of a dataset in the original (long) format, with the 'Country' and 'Date' columns.
+
+        The rows are sorted once by country and date, and the first and last row of every country are kept in an offset
+        table. A country is then found with a dictionary access and a year range with a binary search on the dates of the
+        country, so a lookup takes O(log n) time instead of a scan of the whole table, and the rows are handed out as a
+        slice of the sorted table instead of a filtered copy.
+
+        Parameters:
+        df (pandas.DataFrame): The dataset. It is not modified.
+
+        Returns:
+        None
+        """
+        self.source = df
+        self.df = df.sort_values(['Country', 'Date'], kind='stable').reset_index(drop=True)
+        self._dates = self.df['Date'].to_numpy(dtype=np.float64)
+
+        countries = self.df['Country'].to_numpy()
+        boundaries = np.flatnonzero(countries[1:] != countries[:-1]) + 1 if len(countries) else np.empty(0, dtype=np.int64)
+        starts = np.concatenate([[0], boundaries]) if len(countries) else boundaries
+        stops = np.concatenate([boundaries, [len(countries)]]) if len(countries) else boundaries
+        self._offsets = {countries[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+    def countries(self):
+        """
+        Returns the countries of the dataset, in sorted order.
+        """
+        return list(self._offsets)
+
+    def rows(self, country, start_year=None, end_year=None):
+        """
+        Finds the rows of a country within a range of years.
+
+        Parameters:
+        country (str): The country name.
+        start_year (int, optional): The first year. Default is None (from the first row of the country).
+        end_year (int, optional): The last year. Default is None (to the last row of the country, including rows without a date).
+
+        Returns:
+        tuple: The (start, stop) positions of the rows in the sorted table. Both are equal when there is no such row.
+        """
+        start, stop = self._offsets.get(country, (0, 0))
+        dates = self._dates[start:stop]
+        first = start + int(np.searchsorted(dates, start_year, side='left')) if start_year is not None else start
+        last = start + int(np.searchsorted(dates, end_year, side='right')) if end_year is not None else stop
+        return first, max(first, last)
+
+    def frame(self, country, start_year=None, end_year=None):
+        """
+        Returns the rows of a country within a range of years, as a slice of the sorted table (see rows).
+        """
+        start, stop = self.rows(country, start_year, end_year)
+        return self.df.iloc[start:stop]
+
+    def series(self, country, variable, start_year=None, end_year=None, dropna=True):
+        """
+        Returns one variable of a country within a range of years.
+
+        Parameters:
+        country (str): The country name.
+        variable (str): The name of the variable (column).
+        start_year (int, optional): The first year. Default is None (from the first row of the country).
+        end_year (int, optional): The last year. Default is None (to the last row of the country).
+        dropna (bool, optional): Whether the years without a value are left out. Default is True.
+
+        Returns:
+        pandas.Series: The values, in the order of the years, named after the variable.
+        """
+        start, stop = self.rows(country, start_year, end_year)
+        values = self.df[variable].iloc[start:stop]
+        return values.dropna() if dropna else values
+
+def as_dataset(data):
+    """
+    Returns the DatasetStore of a dataset, indexing it if it is a DataFrame.
+
+    Parameters:
+    data (pandas.DataFrame, DatasetStore or MatrixStore): The dataset.
+
+    Returns:
+    DatasetStore or MatrixStore: The given store, or a new store of the DataFrame.
+    """
+    return data if isinstance(data, (DatasetStore, MatrixStore)) else DatasetStore(data)
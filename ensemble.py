@@ -0,0 +1,152 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from model_record import ModelRecord
+
+EnsembleForecast = namedtuple('EnsembleForecast', ['predicted_mean', 'var_pred_mean'])
+
+def akaike_weights(aics):
+    """
+    This function computes the Akaike weights of a set of candidate models.
+
+    Parameters:
+    aics (array-like): The AIC of each candidate.
+
+    Returns:
+    numpy.ndarray: The weight of each candidate, proportional to exp(-(AIC - lowest AIC) / 2) and summing to one.
+    """
+    aics = np.asarray(aics, dtype=np.float64)
+    weights = np.exp(-(aics - aics.min()) / 2)
+    return weights / weights.sum()
+
+class EnsembleRecord:
+
+    def __init__(self, members, fit_log=None, search_settings=None):
+        """
+        Initialize an AIC-weighted ensemble of fitted models of the same series.
+
+        The members are kept sorted by AIC and weighted with their Akaike weights. The ensemble can be used wherever a
+        ModelRecord is forecast: its forecast is the weighted mixture of the forecasts of its members, with the mixture
+        variance (the weighted variances of the members plus the spread of their means). Its orders, AIC and fitted results
+        are those of its best member.
+
+        Parameters:
+        members (list): The ModelRecord of each member.
+        fit_log (list, optional): The candidate records of the order search the members were taken from. Default is None.
+        search_settings (dict, optional): The keyword arguments of the order search, so it can be run again on updated data. Default is None.
+
+        Returns:
+        None
+        """
+        if not members:
+            raise ValueError("An ensemble needs at least one member.")
+
+        self.members = sorted(members, key=lambda member: member.aic)
+        self.weights = akaike_weights([member.aic for member in self.members])
+        self.fit_log = fit_log
+        self.search_settings = search_settings
+        self._summary_html = None
+
+    @property
+    def best(self):
+        return self.members[0]
+
+    @property
+    def model_name(self):
+        return self.best.model_name
+
+    @property
+    def endog(self):
+        return self.best.endog
+
+    @property
+    def order(self):
+        return self.best.order
+
+    @property
+    def seasonal_order(self):
+        return self.best.seasonal_order
+
+    @property
+    def aic(self):
+        return self.best.aic
+
+    def results(self, cov_type=None):
+        """
+        Rebuilds the fitted results of the best member (see ModelRecord.results).
+        """
+        return self.best.results(cov_type)
+
+    def get_forecast(self, steps):
+        """
+        Forecasts the ensemble out of sample.
+
+        Parameters:
+        steps (int): The number of steps to forecast.
+
+        Returns:
+        EnsembleForecast: The weighted mean of the forecasts of the members (predicted_mean) and its mixture variance (var_pred_mean).
+        """
+        predictions = [member.get_forecast(steps) for member in self.members]
+        means = np.array([np.asarray(prediction.predicted_mean, dtype=np.float64) for prediction in predictions]).reshape(len(predictions), steps)
+        variances = np.array([np.asarray(prediction.var_pred_mean, dtype=np.float64) for prediction in predictions]).reshape(len(predictions), steps)
+        mean = self.weights @ means
+        variance = self.weights @ (variances + (means - mean) ** 2)
+        return EnsembleForecast(mean, variance)
+
+    def append(self, new_observations):
+        """
+        Extends every member with new observations while keeping their fitted parameters (see ModelRecord.append).
+        The weights are recomputed from the refreshed AICs of the members.
+
+        Parameters:
+        new_observations (array-like): The observations that follow the end of the series.
+
+        Returns:
+        EnsembleRecord: A new ensemble on the extended series.
+        """
+        return EnsembleRecord([member.append(new_observations) for member in self.members], search_settings=self.search_settings)
+
+    def summary_html(self):
+        """
+        Returns the members and weights of the ensemble, followed by the summary of its best member, as HTML. It is built on first use and kept.
+        """
+        if self._summary_html is None:
+            members = pd.DataFrame({
+                'order': [member.order for member in self.members],
+                'seasonal_order': [member.seasonal_order for member in self.members],
+                'aic': [member.aic for member in self.members],
+                'weight': self.weights
+            })
+            self._summary_html = members.to_html(index=False) + "<br>" + self.best.summary_html()
+        return self._summary_html
+
+    def describe(self):
+        """
+        Returns a one-line description of the ensemble with the orders and weight of every member.
+        """
+        members = ", ".join(f"{member.describe()} ({weight:.0%})" for member, weight in zip(self.members, self.weights))
+        return f"AIC-weighted ensemble of {len(self.members)} models: {members}"
+
+def ensemble_from_fits(model_name, endog, fitted, top_k, fit_log=None, search_settings=None):
+    """
+    This function builds the ensemble of the top_k candidates already fitted by an order search, without fitting any model again.
+
+    Parameters:
+    model_name (str): The name of the model, "ARIMA" or "SARIMAX".
+    endog (pandas.Series): The time series data the candidates were fitted on.
+    fitted (dict): A dictionary mapping the (order, seasonal_order) of every fitted candidate to its (aic, params, ...) record.
+    top_k (int): The largest number of members.
+    fit_log (list, optional): The candidate records of the order search. Default is None.
+    search_settings (dict, optional): The keyword arguments of the order search. Default is None.
+
+    Returns:
+    EnsembleRecord: The ensemble of the candidates with the lowest AIC, or None if fewer than two candidates were fitted.
+    """
+    candidates = [(record[0], order, seasonal_order, record[1]) for (order, seasonal_order), record in fitted.items()
+                  if record[1] is not None and record[0] is not None and np.isfinite(record[0])]
+    candidates = sorted(candidates, key=lambda candidate: candidate[0])[:top_k]
+    if len(candidates) < 2:
+        return None
+    members = [ModelRecord(model_name, endog, order, params, aic, seasonal_order) for aic, order, seasonal_order, params in candidates]
+    return EnsembleRecord(members, fit_log, search_settings)
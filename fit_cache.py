@@ -0,0 +1,198 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+
+class FitCache:
+
+    def __init__(self, cache_dir, max_size_bytes=64 * 1024 * 1024):
+        """
+        Initialize a content-addressed on-disk cache of fitted model candidates.
+
+        Every entry stores the fitted parameters, log-likelihood and AIC of one candidate in a small JSON file
+        named after the hash of the series values, the model orders and the estimation flags, so a fit is reused
+        across runs and sessions whenever the same candidate is fitted on the same data. When the cache grows past
+        max_size_bytes the least recently used entries are evicted.
+
+        Parameters:
+        cache_dir (str): The directory where the cache entries are stored. It is created if it does not exist.
+        max_size_bytes (int, optional): The maximum total size of the cache entries. Default is 64 MB.
+
+        Returns:
+        None
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size_bytes = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(series, order, seasonal_order=(0, 0, 0, 0), enforce_stationarity=True, enforce_invertibility=True, model_name="SARIMAX"):
+        """
+        Builds the cache key of a fitted candidate.
+
+        Parameters:
+        series (pandas.Series or numpy.ndarray): The time series data the candidate is fitted on.
+        order (tuple): The (p, d, q) order of the candidate.
+        seasonal_order (tuple, optional): The (P, D, Q, m) seasonal order of the candidate. Default is (0, 0, 0, 0).
+        enforce_stationarity (bool, optional): The enforce_stationarity flag of the model. Default is True.
+        enforce_invertibility (bool, optional): The enforce_invertibility flag of the model. Default is True.
+        model_name (str, optional): The name of the model class, so ARIMA and SARIMAX fits never share an entry. Default is "SARIMAX".
+
+        Returns:
+        str: The hexadecimal SHA-256 digest identifying the candidate.
+        """
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(np.asarray(series, dtype=np.float64)).tobytes())
+        settings = [model_name, [int(v) for v in order], [int(v) for v in seasonal_order], bool(enforce_stationarity), bool(enforce_invertibility)]
+        digest.update(json.dumps(settings).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key):
+        """
+        Looks up a cached fit and marks it as recently used.
+
+        Parameters:
+        key (str): The cache key built by make_key.
+
+        Returns:
+        dict: A dictionary with the 'params' (numpy.ndarray, or None for a candidate that failed to fit), 'llf' and 'aic' keys,
+              or None if the candidate is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if entry['params'] is not None:
+            entry['params'] = np.array(entry['params'], dtype=np.float64)
+        return entry
+
+    def put(self, key, params, llf, aic):
+        """
+        Stores a fitted candidate. A failed fit is stored with params, llf and aic set to None so it is not retried.
+
+        Parameters:
+        key (str): The cache key built by make_key.
+        params (array-like): The fitted parameters, or None if the fit failed.
+        llf (float): The log-likelihood of the fitted model, or None.
+        aic (float): The AIC of the fitted model, or None.
+
+        Returns:
+        None
+        """
+        entry = {
+            'params': None if params is None else [float(v) for v in np.asarray(params)],
+            'llf': None if llf is None else float(llf),
+            'aic': None if aic is None else float(aic)
+        }
+        data = json.dumps(entry)
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            replaced_size = os.path.getsize(path)
+        except OSError:
+            replaced_size = 0
+        try:
+            with open(temp_path, "w") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+
+        if self._size_bytes is None:
+            self._size_bytes = self.size_bytes()
+        else:
+            self._size_bytes += len(data) - replaced_size
+        if self._size_bytes > self.max_size_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_size_bytes.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        self._size_bytes = total
+
+    def size_bytes(self):
+        """
+        Returns the total size of the cache entries on disk.
+        """
+        return sum(os.path.getsize(path) for path in glob.glob(os.path.join(self.cache_dir, "*.json")))
+
+    def worker_copy(self):
+        """
+        Returns a cache on the same directory with zeroed counters, to be handed to a task whose counters are merged back with merge_stats.
+        The copy starts from the known size of the cache, so it does not scan the directory on its first put.
+        """
+        copy = FitCache(self.cache_dir, self.max_size_bytes)
+        copy._size_bytes = self._size_bytes
+        return copy
+
+    def merge_stats(self, stats):
+        """
+        Adds the hit and miss counters of a worker copy to this cache.
+
+        Parameters:
+        stats (dict): A dictionary with the 'hits' and 'misses' keys, as returned by stats().
+
+        Returns:
+        None
+        """
+        self.hits += stats['hits']
+        self.misses += stats['misses']
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+        dict: A dictionary with the 'hits' and 'misses' counters.
+        """
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        """
+        Removes every entry from the cache and resets the counters.
+        """
+        for path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        self.hits = 0
+        self.misses = 0
+        self._size_bytes = 0
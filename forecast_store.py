@@ -0,0 +1,219 @@
+from collections.abc import MutableMapping
+import numpy as np
+import pandas as pd
+
+FIELDS = ('forecast_values', 'mean_ci_lower', 'mean_ci_upper')
+
+class ForecastStore(MutableMapping):
+
+    def __init__(self, capacity=16):
+        """
+        Initialize an empty store of forecasts.
+
+        The forecasts are kept in a single NumPy block of shape (fields, years, series): the forecast values and the lower
+        and upper confidence bounds of every series, on a common axis of consecutive years (NaN outside the horizon of a
+        series). Each series is indexed by its forecast key and by its (country, model, order, seasonal order, forecast
+        until year), and the series of a country are indexed by the country, so every lookup is a dictionary access.
+
+        The store behaves like the dictionary returned by forecast_future: assigning an entry stores its 'forecast_values'
+        and 'forecast_ci' in the block and keeps its other keys, and reading an entry rebuilds the Series and DataFrame from
+        the block. The rebuilt objects are copies; to change the stored values in place, use view.
+
+        Parameters:
+        capacity (int, optional): The initial number of series columns. The block grows as needed. Default is 16.
+
+        Returns:
+        None
+        """
+        self.years = np.empty(0, dtype=np.int64)
+        self.block = np.full((len(FIELDS), 0, capacity), np.nan)
+        self._columns = {}
+        self._rows = {}
+        self._metadata = {}
+        self._has_ci = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self._by_series = {}
+        self._by_country = {}
+
+    def _series_id(self, metadata):
+        order = metadata.get('order')
+        seasonal_order = metadata.get('seasonal_order')
+        return (metadata.get('country'), metadata.get('model'), tuple(order) if order is not None else None,
+                tuple(seasonal_order) if seasonal_order is not None else None, metadata.get('forecast_until_year'))
+
+    def _ensure_years(self, first_year, last_year):
+        if len(self.years) and self.years[0] <= first_year and last_year <= self.years[-1]:
+            return
+        if len(self.years):
+            first_year = min(first_year, int(self.years[0]))
+            last_year = max(last_year, int(self.years[-1]))
+        years = np.arange(first_year, last_year + 1, dtype=np.int64)
+        block = np.full((len(FIELDS), len(years), self.block.shape[2]), np.nan)
+        if len(self.years):
+            offset = int(self.years[0]) - first_year
+            block[:, offset:offset + len(self.years)] = self.block
+            self._rows = {key: (start + offset, stop + offset) for key, (start, stop) in self._rows.items()}
+        self.years = years
+        self.block = block
+
+    def _allocate_column(self):
+        if not self._free:
+            capacity = self.block.shape[2]
+            block = np.full((len(FIELDS), len(self.years), max(2 * capacity, 1)), np.nan)
+            block[:, :, :capacity] = self.block
+            self.block = block
+            self._free = list(range(block.shape[2] - 1, capacity - 1, -1))
+        return self._free.pop()
+
+    def __setitem__(self, key, entry):
+        if key in self._columns:
+            del self[key]
+
+        forecast_values = entry['forecast_values']
+        years = np.asarray(forecast_values.index, dtype=np.int64)
+        if len(years) and np.any(np.diff(years) != 1):
+            raise ValueError(f"The forecast years of {key} are not consecutive.")
+
+        column = self._allocate_column()
+        if len(years):
+            self._ensure_years(int(years[0]), int(years[-1]))
+            start = int(years[0] - self.years[0])
+        else:
+            start = 0
+        stop = start + len(years)
+
+        self.block[0, start:stop, column] = np.asarray(forecast_values, dtype=np.float64)
+        forecast_ci = entry.get('forecast_ci')
+        if forecast_ci is not None:
+            self.block[1, start:stop, column] = np.asarray(forecast_ci['mean_ci_lower'], dtype=np.float64)
+            self.block[2, start:stop, column] = np.asarray(forecast_ci['mean_ci_upper'], dtype=np.float64)
+
+        metadata = {name: value for name, value in entry.items() if name not in ('forecast_values', 'forecast_ci')}
+        self._columns[key] = column
+        self._rows[key] = (start, stop)
+        self._metadata[key] = metadata
+        self._has_ci[key] = forecast_ci is not None
+        self._by_series[self._series_id(metadata)] = key
+        self._by_country.setdefault(metadata.get('country'), []).append(key)
+
+    def __getitem__(self, key):
+        column = self._columns[key]
+        start, stop = self._rows[key]
+        years = pd.Index(self.years[start:stop])
+        entry = dict(self._metadata[key])
+        entry['forecast_values'] = pd.Series(self.block[0, start:stop, column].copy(), index=years, name='predicted_mean')
+        entry['forecast_ci'] = pd.DataFrame({'mean_ci_lower': self.block[1, start:stop, column],
+                                             'mean_ci_upper': self.block[2, start:stop, column]}, index=years) if self._has_ci[key] else None
+        return entry
+
+    def __delitem__(self, key):
+        column = self._columns.pop(key)
+        metadata = self._metadata.pop(key)
+        del self._rows[key]
+        del self._has_ci[key]
+        series_id = self._series_id(metadata)
+        if self._by_series.get(series_id) == key:
+            del self._by_series[series_id]
+        country_keys = self._by_country[metadata.get('country')]
+        country_keys.remove(key)
+        if not country_keys:
+            del self._by_country[metadata.get('country')]
+        self.block[:, :, column] = np.nan
+        self._free.append(column)
+
+    def __iter__(self):
+        return iter(list(self._columns))
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def metadata(self, key):
+        """
+        Returns the stored keys of an entry other than its forecast values and confidence intervals (country, model, order, ...), without building its Series.
+        """
+        return self._metadata[key]
+
+    def keys_for(self, country):
+        """
+        Returns the forecast keys of a country (an exact match on the country name), in the order they were stored.
+        """
+        return list(self._by_country.get(country, []))
+
+    def key_for(self, country):
+        """
+        Returns the first forecast key of a country (an exact match on the country name), or None if it has no forecast.
+        """
+        keys = self._by_country.get(country)
+        return keys[0] if keys else None
+
+    def lookup(self, country, model, order, forecast_until_year, seasonal_order=None):
+        """
+        Finds the forecast of a series by its description.
+
+        Parameters:
+        country (str): The country name.
+        model (str): The model label stored with the forecast ('AR', 'SARX', 'SARX-E', or 'Bottom-Up' and 'MinT' for groups).
+        order (tuple): The (p, d, q) order of the model.
+        forecast_until_year (int): The year until which the forecast was made.
+        seasonal_order (tuple, optional): The (P, D, Q, m) seasonal order of a SARIMAX model. Default is None.
+
+        Returns:
+        str: The forecast key, or None if there is no such forecast.
+        """
+        return self._by_series.get((country, model, tuple(order), tuple(seasonal_order) if seasonal_order is not None else None, forecast_until_year))
+
+    def view(self, key, field='forecast_values'):
+        """
+        Returns the forecast years of an entry and a writable view of one of its fields in the block.
+
+        Parameters:
+        key (str): The forecast key.
+        field (str, optional): 'forecast_values', 'mean_ci_lower' or 'mean_ci_upper'. Default is 'forecast_values'.
+
+        Returns:
+        tuple: The years (numpy.ndarray) and the values (a numpy.ndarray view; changing it changes the stored forecast).
+        """
+        column = self._columns[key]
+        start, stop = self._rows[key]
+        return self.years[start:stop], self.block[FIELDS.index(field), start:stop, column]
+
+    def matrix(self, keys, field='forecast_values'):
+        """
+        Returns one field of several forecasts as a years x series matrix, on the years covered by any of them.
+
+        Parameters:
+        keys (list): The forecast keys, in the order of the columns.
+        field (str, optional): 'forecast_values', 'mean_ci_lower' or 'mean_ci_upper'. Default is 'forecast_values'.
+
+        Returns:
+        tuple: The years (numpy.ndarray) and the matrix (numpy.ndarray, NaN outside the horizon of each series).
+        """
+        if not keys:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0))
+        rows = [self._rows[key] for key in keys]
+        start = min(row[0] for row in rows)
+        stop = max(row[1] for row in rows)
+        return self.years[start:stop], self.block[FIELDS.index(field), start:stop][:, [self._columns[key] for key in keys]]
+
+    def set_matrix(self, keys, years, values, field='forecast_values'):
+        """
+        Writes a years x series matrix, as returned by matrix, back into the block. Only the years within the horizon of each series are written.
+
+        Parameters:
+        keys (list): The forecast keys, in the order of the columns.
+        years (numpy.ndarray): The consecutive years of the rows of values.
+        values (numpy.ndarray): The matrix, with one row per year and one column per key.
+        field (str, optional): 'forecast_values', 'mean_ci_lower' or 'mean_ci_upper'. Default is 'forecast_values'.
+
+        Returns:
+        None
+        """
+        if not keys:
+            return
+        offset = int(years[0] - self.years[0])
+        for key, column in zip(keys, np.asarray(values).T):
+            start, stop = self._rows[key]
+            self.block[FIELDS.index(field), start:stop, self._columns[key]] = column[start - offset:stop - offset]
@@ -0,0 +1,92 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from dataset_store import DatasetStore
+from matrix_store import MatrixStore
+
+@lru_cache(maxsize=None)
+def forecast_horizon(last_data_year, forecast_until_year):
+    """
+    This function builds the years forecast after the last observed year. The index is built once per pair of years and reused.
+
+    Parameters:
+    last_data_year (int): The last year with data.
+    forecast_until_year (int): The year until which the forecasts are made.
+
+    Returns:
+    pandas.Index: The forecast years, from last_data_year + 1 to forecast_until_year.
+    """
+    return pd.date_range(start=pd.to_datetime(str(last_data_year + 1)), end=pd.to_datetime(str(forecast_until_year + 1)), freq='YE').year
+
+def last_observations(df, variable, start_year, countries=None):
+    """
+    This function finds the last year and the value in that year of every country in a single grouped pass over the data.
+
+    Parameters:
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
+    variable (str): The name of the variable (column) in the DataFrame to be forecasted.
+    start_year (int): The starting year for the time series data.
+    countries (iterable, optional): The countries to be looked up. Default is None (every country).
+
+    Returns:
+    dict: A dictionary mapping each country to its (last year, last value) pair.
+    """
+    if isinstance(df, MatrixStore):
+        return df.last_observations(variable, start_year, countries)
+    if isinstance(df, DatasetStore):
+        df = df.df
+    mask = df['Date'] >= start_year
+    if countries is not None:
+        mask &= df['Country'].isin(list(countries))
+    last_rows = df.loc[mask, ['Country', 'Date', variable]].sort_values('Date', kind='stable').drop_duplicates('Country', keep='last')
+    return {country: (year, value) for country, year, value in zip(last_rows['Country'], last_rows['Date'], last_rows[variable])}
+
+def forecast_models(models, observations, forecast_until_year, replace_negative_forecast=False, sigma=2):
+    """
+    This function forecasts a set of fitted models to the same year.
+
+    Each model is forecast once over the horizon of its own last observed year. The forecasts that share a horizon are
+    stacked so that their confidence intervals, their anchoring on the last observed value and the replacement of negative
+    values are computed together.
+
+    Parameters:
+    models (dict): A dictionary mapping each country to its fitted model (a ModelRecord).
+    observations (dict): The (last year, last value) pair of each country, as returned by last_observations.
+    forecast_until_year (int): The year until which the forecasts are made.
+    replace_negative_forecast (bool): A flag indicating whether negative forecast values should be replaced with zero. Default is False.
+    sigma (float): The confidence interval multiplier for the forecast. Default is 2.
+
+    Returns:
+    dict: A dictionary mapping each country to its (forecast values, confidence intervals) pair, a pandas Series and a
+          pandas DataFrame with the 'mean_ci_lower' and 'mean_ci_upper' columns, both indexed by year.
+    """
+    by_horizon = {}
+    for country in models:
+        last_data_year = observations.get(country, (None, None))[0]
+        if pd.isnull(last_data_year) or not isinstance(last_data_year, (int, np.integer)):
+            raise ValueError(f"The last year of the filtered data is invalid: {last_data_year}")
+        by_horizon.setdefault(int(last_data_year), []).append(country)
+
+    alpha = 1 - (sigma/2)
+    q = norm.ppf(1 - alpha / 2)
+    forecasts = {}
+    for last_data_year, countries in by_horizon.items():
+        forecast_years = forecast_horizon(last_data_year, forecast_until_year)
+        steps = len(forecast_years)
+        predictions = [models[country].get_forecast(steps=steps) for country in countries]
+        means = np.array([np.asarray(prediction.predicted_mean, dtype=np.float64) for prediction in predictions]).reshape(len(countries), steps)
+        widths = q * np.sqrt(np.array([np.asarray(prediction.var_pred_mean, dtype=np.float64) for prediction in predictions]).reshape(len(countries), steps))
+        lower = means - widths
+        upper = means + widths
+
+        if steps:
+            means[:, 0] = [observations[country][1] for country in countries]
+        if replace_negative_forecast:
+            means[means < 0] = 0
+
+        for i, country in enumerate(countries):
+            forecast_values = pd.Series(means[i], index=forecast_years, name='predicted_mean')
+            forecast_ci = pd.DataFrame({'mean_ci_lower': lower[i], 'mean_ci_upper': upper[i]}, index=forecast_years)
+            forecasts[country] = (forecast_values, forecast_ci)
+    return forecasts
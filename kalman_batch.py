@@ -0,0 +1,291 @@
+import numpy as np
+
+APPROXIMATE_DIFFUSE_VARIANCE = 1e6
+FINITE_DIFFERENCE_STEP = 1e-6
+MIN_VARIANCE = 1e-12
+
+def constrain_stationary(unconstrained):
+    """
+    This function maps unconstrained values to the coefficients of a stationary autoregressive polynomial,
+    row by row, with the partial autocorrelation transform used by statsmodels (Monahan, 1984).
+
+    Parameters:
+    unconstrained (numpy.ndarray): A (batch, n) array of unconstrained values.
+
+    Returns:
+    numpy.ndarray: A (batch, n) array of stationary autoregressive coefficients.
+    """
+    batch, n = unconstrained.shape
+    partial = unconstrained / np.sqrt(1 + unconstrained ** 2)
+    y = np.zeros((batch, n, n))
+    for k in range(n):
+        for i in range(k):
+            y[:, k, i] = y[:, k - 1, i] + partial[:, k] * y[:, k - 1, k - i - 1]
+        y[:, k, k] = partial[:, k]
+    return -y[:, n - 1, :]
+
+def unconstrain_stationary(constrained):
+    """
+    This function is the inverse of constrain_stationary.
+
+    Parameters:
+    constrained (numpy.ndarray): A (batch, n) array of stationary autoregressive coefficients.
+
+    Returns:
+    numpy.ndarray: A (batch, n) array of unconstrained values.
+    """
+    batch, n = constrained.shape
+    y = np.zeros((batch, n, n))
+    y[:, n - 1, :] = -constrained
+    for k in range(n - 1, 0, -1):
+        for i in range(k):
+            y[:, k - 1, i] = (y[:, k, i] - y[:, k, k] * y[:, k, k - i - 1]) / (1 - y[:, k, k] ** 2)
+    partial = np.diagonal(y, axis1=1, axis2=2)
+    return partial / np.sqrt(1 - partial ** 2)
+
+def _state_space(ar, ma, d):
+    """
+    Builds the stacked transition matrices, selection vectors and design vector of ARIMA(p, d, q) models in the layout used by
+    statsmodels: d integration states (the levels and lower differences of the previous observation) followed by the ARMA states
+    in Harvey's form.
+    """
+    batch, p = ar.shape
+    q = ma.shape[1]
+    r = max(p, q + 1)
+    k_states = d + r
+
+    transition = np.zeros((batch, k_states, k_states))
+    for j in range(d):
+        transition[:, j, j:d + 1] = 1
+    transition[:, d:d + p, d] = ar
+    for i in range(r - 1):
+        transition[:, d + i, d + i + 1] = 1
+
+    selection = np.zeros((batch, k_states))
+    selection[:, d] = 1
+    selection[:, d + 1:d + 1 + q] = ma
+
+    design = np.zeros(k_states)
+    design[:d + 1] = 1
+    return transition, selection, design
+
+def _stationary_covariance(transition, selection):
+    """
+    Solves the discrete Lyapunov equation P = T P T' + R R' of a batch of stationary ARMA blocks.
+    """
+    batch, k_states, _ = transition.shape
+    kron = np.einsum('bij,bkl->bikjl', transition, transition).reshape(batch, k_states ** 2, k_states ** 2)
+    rhs = np.einsum('bi,bj->bij', selection, selection).reshape(batch, k_states ** 2, 1)
+    covariance = np.linalg.solve(np.eye(k_states ** 2) - kron, rhs)
+    return covariance.reshape(batch, k_states, k_states)
+
+def _split_params(params, order, trend):
+    """
+    Splits parameters in the statsmodels ARIMA order ([const], ar, ma, sigma2) into their components.
+    """
+    p, _, q = order
+    start = 1 if trend else 0
+    mean = params[:, 0] if trend else np.zeros(len(params))
+    return mean, params[:, start:start + p], params[:, start + p:start + p + q], params[:, -1]
+
+def arima_loglike_batch(endog, order, params, trend=None):
+    """
+    This function evaluates the exact Gaussian log-likelihood of a batch of ARIMA models with one Kalman filter pass over
+    stacked state-space arrays. It reproduces statsmodels' ARIMA: the ARMA states start from their stationary distribution,
+    the integration states from an approximate diffuse prior, and the first d observations are left out of the likelihood.
+
+    Parameters:
+    endog (numpy.ndarray): A (batch, nobs) array of equal-length series, one per row, without missing values.
+    order (tuple): The (p, d, q) order shared by every model of the batch.
+    params (numpy.ndarray): A (batch, k_params) array of parameters in the statsmodels ARIMA order ([const], ar, ma, sigma2).
+    trend (bool, optional): Whether the models have a constant mean. Default is None (a mean when d is 0, as in statsmodels).
+
+    Returns:
+    numpy.ndarray: The log-likelihood of each model.
+    """
+    p, d, q = order
+    trend = d == 0 if trend is None else trend
+    endog = np.asarray(endog, dtype=np.float64)
+    params = np.asarray(params, dtype=np.float64)
+    mean, ar, ma, sigma2 = _split_params(params, order, trend)
+
+    transition, selection, design = _state_space(ar, ma, d)
+    batch, k_states, _ = transition.shape
+    state_cov = np.einsum('bi,bj->bij', selection, selection) * sigma2[:, None, None]
+
+    state = np.zeros((batch, k_states))
+    cov = np.zeros((batch, k_states, k_states))
+    cov[:, range(d), range(d)] = APPROXIMATE_DIFFUSE_VARIANCE
+    cov[:, d:, d:] = _stationary_covariance(transition[:, d:, d:], selection[:, d:]) * sigma2[:, None, None]
+
+    observations = endog - mean[:, None]
+    transition_t = np.swapaxes(transition, 1, 2)
+    llf = np.zeros(batch)
+    for t in range(observations.shape[1]):
+        cov_design = cov @ design
+        forecast_var = np.maximum(cov_design @ design, MIN_VARIANCE)
+        error = observations[:, t] - state @ design
+        gain = np.einsum('bij,bj->bi', transition, cov_design) / forecast_var[:, None]
+        if t >= d:
+            llf -= 0.5 * (np.log(2 * np.pi * forecast_var) + error ** 2 / forecast_var)
+        state = np.einsum('bij,bj->bi', transition, state) + gain * error[:, None]
+        cov = transition @ cov @ transition_t - forecast_var[:, None, None] * np.einsum('bi,bj->bij', gain, gain) + state_cov
+    return llf
+
+def _start_params(endog, order, trend):
+    """
+    Builds the unconstrained start parameters of a batch from Yule-Walker estimates of the AR part of the differenced series,
+    with the MA part at zero. The mean and the variance are expressed relative to the scale of each series.
+    """
+    p, d, q = order
+    series = np.diff(endog, n=d, axis=1) if d else endog
+    location = series.mean(axis=1) if trend else np.zeros(len(series))
+    centered = series - location[:, None]
+    scale = series.std(axis=1)
+    scale[scale == 0] = 1
+
+    nobs = centered.shape[1]
+    autocov = np.stack([(centered[:, lag:] * centered[:, :nobs - lag]).sum(axis=1) / nobs for lag in range(p + 1)], axis=1)
+    innovation_var = autocov[:, 0].copy()
+    unconstrained_ar = np.zeros((len(series), p))
+    if p and nobs > p:
+        toeplitz = autocov[:, np.abs(np.subtract.outer(range(p), range(p)))]
+        toeplitz += np.eye(p) * 1e-8 * np.maximum(autocov[:, :1, None], MIN_VARIANCE)
+        ar = np.linalg.solve(toeplitz, autocov[:, 1:, None])[:, :, 0]
+        innovation_var = autocov[:, 0] - (ar * autocov[:, 1:]).sum(axis=1)
+        unconstrained_ar = np.clip(np.nan_to_num(unconstrain_stationary(ar)), -3, 3)
+
+    start = [unconstrained_ar, np.zeros((len(series), q))]
+    if trend:
+        start.append(np.zeros((len(series), 1)))
+    log_var = np.log(np.maximum(innovation_var, MIN_VARIANCE * scale ** 2) / scale ** 2)
+    start.append(log_var[:, None])
+    return np.concatenate(start, axis=1), location, scale
+
+def _constrain(unconstrained, order, trend, location, scale):
+    """
+    Maps unconstrained optimiser values to parameters in the statsmodels ARIMA order ([const], ar, ma, sigma2).
+    """
+    p, _, q = order
+    batch = len(unconstrained)
+    ar = constrain_stationary(unconstrained[:, :p]) if p else np.zeros((batch, 0))
+    ma = -constrain_stationary(unconstrained[:, p:p + q]) if q else np.zeros((batch, 0))
+    params = [ar, ma, (np.exp(unconstrained[:, -1]) * scale ** 2)[:, None]]
+    if trend:
+        params.insert(0, (location + unconstrained[:, p + q] * scale)[:, None])
+    return np.concatenate(params, axis=1)
+
+def _minimize_batch(evaluate, start, maxiter=200, gtol=1e-5, ftol=1e-10):
+    """
+    Minimises a batch of independent objectives with BFGS. Every row keeps its own inverse Hessian approximation and
+    backtracking line search, and leaves the batch as soon as it has converged, so each iteration evaluates the
+    still-active rows in a single call.
+
+    Parameters:
+    evaluate (callable): A function of (values, rows) returning the objective values and gradients of the given rows.
+    start (numpy.ndarray): A (batch, k) array of start values.
+    maxiter (int, optional): The maximum number of iterations. Default is 200.
+    gtol (float, optional): The largest absolute gradient component at convergence. Default is 1e-5.
+    ftol (float, optional): The relative decrease of the objective below which a row has converged. Default is 1e-10.
+
+    Returns:
+    tuple: The (batch, k) array of minimisers and the boolean array of rows that converged.
+    """
+    values = start.copy()
+    batch, k = values.shape
+    loss, gradient = evaluate(values, np.arange(batch))
+    inv_hessian = np.eye(k) / np.maximum(1, np.abs(gradient).max(axis=1))[:, None, None]
+    active = np.abs(gradient).max(axis=1) >= gtol
+    converged = ~active
+
+    for _ in range(maxiter):
+        rows = np.flatnonzero(active)
+        if not rows.size:
+            break
+        direction = -np.einsum('bij,bj->bi', inv_hessian[rows], gradient[rows])
+        slope = (direction * gradient[rows]).sum(axis=1)
+        ascent = slope >= 0
+        if ascent.any():
+            inv_hessian[rows[ascent]] = np.eye(k)
+            direction[ascent] = -gradient[rows[ascent]]
+            slope[ascent] = -(gradient[rows[ascent]] ** 2).sum(axis=1)
+
+        step = np.ones(len(rows))
+        new_values = values[rows].copy()
+        new_loss = loss[rows].copy()
+        new_gradient = gradient[rows].copy()
+        pending = np.arange(len(rows))
+        for _ in range(30):
+            trial = values[rows[pending]] + step[pending, None] * direction[pending]
+            trial_loss, trial_gradient = evaluate(trial, rows[pending])
+            accepted = trial_loss <= loss[rows[pending]] + 1e-4 * step[pending] * slope[pending]
+            new_values[pending[accepted]] = trial[accepted]
+            new_loss[pending[accepted]] = trial_loss[accepted]
+            new_gradient[pending[accepted]] = trial_gradient[accepted]
+            pending = pending[~accepted]
+            if not pending.size:
+                break
+            step[pending] *= 0.5
+
+        moved = np.ones(len(rows), dtype=bool)
+        moved[pending] = False
+        s = new_values - values[rows]
+        y = new_gradient - gradient[rows]
+        sy = (s * y).sum(axis=1)
+        update = moved & (sy > 1e-12)
+        if update.any():
+            u_rows = rows[update]
+            rho = 1 / sy[update]
+            left = np.eye(k) - rho[:, None, None] * np.einsum('bi,bj->bij', s[update], y[update])
+            inv_hessian[u_rows] = left @ inv_hessian[u_rows] @ np.swapaxes(left, 1, 2) + rho[:, None, None] * np.einsum('bi,bj->bij', s[update], s[update])
+
+        decrease = loss[rows] - new_loss
+        values[rows], loss[rows], gradient[rows] = new_values, new_loss, new_gradient
+        done = moved & ((np.abs(new_gradient).max(axis=1) < gtol) | (decrease <= ftol * (1 + np.abs(new_loss))))
+        converged[rows[done]] = True
+        active[rows[done | ~moved]] = False
+
+    return values, converged
+
+def fit_arima_batch(endog, order, maxiter=200):
+    """
+    This function fits one ARIMA(p, d, q) order to a batch of equal-length series at once. The likelihood of every series,
+    and of every finite-difference step of its gradient, is evaluated in a single vectorised Kalman filter pass, and each
+    series is optimised with its own BFGS iterations until it converges. AR and MA parameters are kept stationary and
+    invertible with the transform used by statsmodels, so the estimates are directly comparable with statsmodels' ARIMA.
+
+    Parameters:
+    endog (numpy.ndarray): A (batch, nobs) array of equal-length series, one per row, without missing values.
+    order (tuple): The (p, d, q) order to be fitted.
+    maxiter (int, optional): The maximum number of BFGS iterations. Default is 200.
+
+    Returns:
+    dict: A dictionary with the 'params' (batch, k_params) array in the statsmodels ARIMA order ([const], ar, ma, sigma2),
+          the 'llf' and 'aic' arrays (NaN where the fit failed) and the boolean 'converged' array.
+    """
+    p, d, q = order
+    trend = d == 0
+    endog = np.asarray(endog, dtype=np.float64)
+    start, location, scale = _start_params(endog, order, trend)
+    k_free = start.shape[1]
+    nobs_effective = endog.shape[1] - d
+    steps = np.vstack([np.zeros(k_free), np.eye(k_free) * FINITE_DIFFERENCE_STEP])
+
+    def evaluate(values, rows):
+        points = (values[:, None, :] + steps).reshape(-1, k_free)
+        repeated_rows = np.repeat(rows, k_free + 1)
+        params = _constrain(points, order, trend, location[repeated_rows], scale[repeated_rows])
+        with np.errstate(all='ignore'):
+            llf = arima_loglike_batch(endog[repeated_rows], order, params, trend)
+        loss = np.nan_to_num(-llf / nobs_effective, nan=np.inf, neginf=np.inf).reshape(len(rows), k_free + 1)
+        with np.errstate(invalid='ignore'):
+            gradient = np.nan_to_num((loss[:, 1:] - loss[:, :1]) / FINITE_DIFFERENCE_STEP, nan=0.0, posinf=0.0, neginf=0.0)
+        return loss[:, 0], gradient
+
+    values, converged = _minimize_batch(evaluate, start, maxiter)
+    params = _constrain(values, order, trend, location, scale)
+    with np.errstate(all='ignore'):
+        llf = arima_loglike_batch(endog, order, params, trend)
+    llf[~np.isfinite(llf)] = np.nan
+    aic = -2 * llf + 2 * params.shape[1]
+    return {'params': params, 'llf': llf, 'aic': aic, 'converged': converged}
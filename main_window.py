@@ -1,19 +1,32 @@
 import sys
 import os
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton, QComboBox, QTextEdit, QFileDialog, QLabel, QSpinBox, QListWidget, QListWidgetItem, QLineEdit, QGridLayout, QMessageBox, QAction)
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QPushButton, QComboBox, QTextEdit, QFileDialog, QLabel, QSpinBox, QListWidget, QListWidgetItem, QLineEdit, QGridLayout, QMessageBox, QAction, QInputDialog)
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import pandas as pd
 from adf_test import perform_adf_test
-from sarimax import optimize_sarimax_models, forecast_future as forecast_future_sarimax
-from arima import optimize_arima_models, forecast_future as forecast_future_arima
-from plotting import plot_data, plot_data_stacked_bar, plot_data_stacked_area, plot_historical_data, plot_historical_data_bar, plot_historical_data_stacked_area
+from sarimax import iter_optimize_sarimax_models, forecast_future as forecast_future_sarimax, search_settings as sarimax_search_settings
+from arima import iter_optimize_arima_models, forecast_future as forecast_future_arima, search_settings as arima_search_settings
+from plotting import plot_data, plot_data_stacked_bar, plot_data_stacked_area, plot_historical_data, plot_historical_data_bar, plot_historical_data_stacked_area, plot_fan_chart
 from side_panel import SidePanelWindow
 from group_panel import GroupPanelWindow
 from save_panel import SavePanel
 from about import AboutWindow
+from fit_cache import FitCache
+from forecasting import last_observations
+from simulation import simulate_forecasts
+from model_update import update_model, find_fitted_model
+from forecast_store import ForecastStore
+from corrections import parse_anchors, apply_correction
+from backtesting import backtest_models
+from data_formats import convert_new_format_to_original, convert_original_to_new_format, load_dataset, dataset_columns, stream_dataset
+from reconciliation import reconcile_group, METHOD_LABELS
+from scenario_sweep import scenario_grid, sweep_scenarios
+from dataset_store import DatasetStore
+
+TRIPLING_FACTOR = 3
 
 class MainWindow(QMainWindow):
 
@@ -147,23 +160,32 @@ class MainWindow(QMainWindow):
 
         load_action = QAction('Open File...', self)
         load_action.triggered.connect(self.load_file)
+        load_variable_action = QAction('Open Variable...', self)
+        load_variable_action.triggered.connect(self.load_variable)
         save_action = QAction('Save File...', self)
         save_action.triggered.connect(self.show_save_panel)
         save_plot_action = QAction('Save Plot...', self)
         save_plot_action.triggered.connect(self.download_plot)
         file_menu.addAction(load_action)
+        file_menu.addAction(load_variable_action)
         file_menu.addAction(save_action)
         file_menu.addAction(save_plot_action)
 
         group_action = QAction('Group Country`s', self)
         group_action.triggered.connect(self.group_countries)
+        group_forecasts_action = QAction('Group Forecasts', self)
+        group_forecasts_action.triggered.connect(self.group_forecasts)
         clear_console_action = QAction('Clear Console', self)
         clear_console_action.triggered.connect(self.clear_console)
         clear_forecasts_action = QAction('Clear Forecasts List', self)
         clear_forecasts_action.triggered.connect(self.clear_all)
+        clear_fit_cache_action = QAction('Clear Fit Cache', self)
+        clear_fit_cache_action.triggered.connect(self.clear_fit_cache)
         edit_menu.addAction(group_action)
+        edit_menu.addAction(group_forecasts_action)
         edit_menu.addAction(clear_console_action)
         edit_menu.addAction(clear_forecasts_action)
+        edit_menu.addAction(clear_fit_cache_action)
 
         forecast_settings_action = QAction('Forecast Settings', self)
         forecast_settings_action.triggered.connect(self.show_forecast_settings)
@@ -174,7 +196,22 @@ class MainWindow(QMainWindow):
 
         adf_test_action = QAction('ADF Test', self)
         adf_test_action.triggered.connect(self.run_adf_test)
+        model_summary_action = QAction('Model Summary', self)
+        model_summary_action.triggered.connect(self.show_model_summaries)
+        fan_chart_action = QAction('Fan Chart', self)
+        fan_chart_action.triggered.connect(self.show_fan_chart)
         tools_menu.addAction(adf_test_action)
+        tools_menu.addAction(model_summary_action)
+        update_forecasts_action = QAction('Update Forecasts', self)
+        update_forecasts_action.triggered.connect(self.update_forecasts)
+        tools_menu.addAction(fan_chart_action)
+        backtest_action = QAction('Backtest Orders', self)
+        backtest_action.triggered.connect(self.run_backtest)
+        tools_menu.addAction(update_forecasts_action)
+        tools_menu.addAction(backtest_action)
+        scenario_sweep_action = QAction('Scenario Sweep...', self)
+        scenario_sweep_action.triggered.connect(self.run_scenario_sweep)
+        tools_menu.addAction(scenario_sweep_action)
 
         about_action = QAction('About', self)
         about_action.triggered.connect(self.show_about)
@@ -232,7 +269,7 @@ class MainWindow(QMainWindow):
 
     def setup_directories(self):
         """
-        This function sets up the necessary directories for storing datasets, extracted datasets, and plots.
+        This function sets up the necessary directories for storing datasets, extracted datasets, plots and cached model fits.
 
         Parameters:
         None
@@ -244,10 +281,12 @@ class MainWindow(QMainWindow):
         self.dataset_dir = os.path.join(script_dir, "dataset")
         self.extracted_dataset_dir = os.path.join(script_dir, "extracted_dataset")
         self.plot_dir = os.path.join(script_dir, "plot")
+        self.cache_dir = os.path.join(script_dir, "cache")
 
         os.makedirs(self.dataset_dir, exist_ok=True)
         os.makedirs(self.extracted_dataset_dir, exist_ok=True)
         os.makedirs(self.plot_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
 
     def initialize_variables(self):
         """
@@ -260,16 +299,28 @@ class MainWindow(QMainWindow):
         None
         """
         self.df = None
+        self._dataset = None
         self.adf_results = None
         self.filtered_data = None
         self.sarimax_results = None
         self.arima_results = None
-        self.forecast_results = {}
+        self.forecast_results = ForecastStore()
         self.sidePanelWindow = None
         self.forecast_until_year = 2100
         self.replace_negative_forecast = False
         self.active_lines = []  
         self.save_panel = SavePanel(self)
+        self.fit_cache = FitCache(os.path.join(self.cache_dir, "fits"))
+
+    @property
+    def dataset(self):
+        """
+        Returns the indexed store of the loaded data (see dataset_store.DatasetStore), used for the lookups by country and year.
+        It is built on first use and built again whenever self.df is replaced, e.g. by loading a file or adding a group.
+        """
+        if self._dataset is None or self._dataset.source is not self.df:
+            self._dataset = DatasetStore(self.df)
+        return self._dataset
     
     def show_save_panel(self):
         """
@@ -339,10 +390,54 @@ class MainWindow(QMainWindow):
         if file_name:
             self.process_loaded_file(file_name)
 
+    def load_variable(self):
+        """
+        Loads one variable of a CSV file in chunks, parsing only the 'Country' and 'Date' columns and that variable, and merges
+        or replaces the existing dataframe with it. Meant for large files with many variables; files in the new format are read whole.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        options = QFileDialog.Options()
+        file_name, _ = QFileDialog.getOpenFileName(self, "Load CSV File", self.dataset_dir, "CSV Files (*.csv);;All Files (*)", options=options)
+        if not file_name:
+            return
+
+        try:
+            columns = dataset_columns(file_name)
+            variables = None
+            if 'Country' in columns:
+                choices = [column for column in columns if column not in ('Country', 'Date')]
+                variable, accepted = QInputDialog.getItem(self, "Open Variable", "Variable:", choices, 0, False)
+                if not accepted:
+                    return
+                variables = [variable]
+
+            reported_percent = 0
+            def report(bytes_read, total_bytes):
+                nonlocal reported_percent
+                percent = int(100 * bytes_read / total_bytes) if total_bytes else 100
+                if percent >= reported_percent + 10:
+                    reported_percent = percent
+                    self.console.append(f"Loading {os.path.basename(file_name)}: {percent}%")
+                    QApplication.processEvents()
+
+            new_format_df = stream_dataset(file_name, variables, progress=report)
+            self.console.append(f"File {file_name} loaded successfully ({len(new_format_df)} rows).")
+
+            self.merge_or_replace_dataframe(new_format_df)
+            self.update_combos()
+        except Exception as e:
+            self.console.append(f"Error loading file: {e}")
+
     def process_loaded_file(self, file_name):
         """
         This function processes a loaded CSV file. It reads the file, checks if the 'Country' column exists,
         and converts the format if necessary. It then merges or replaces the existing dataframe, and updates the combos.
+        The converted dataframe is cached under the cache directory, so loading an unchanged file again skips both steps.
 
         Parameters:
         file_name (str): The name of the CSV file to be loaded.
@@ -351,14 +446,9 @@ class MainWindow(QMainWindow):
         None
         """
         try:
-            new_df = pd.read_csv(file_name)
+            new_format_df = load_dataset(file_name, os.path.join(self.cache_dir, "datasets"))
             self.console.append(f"File {file_name} loaded successfully.")
 
-            if 'Country' in new_df.columns:
-                new_format_df = new_df
-            else:
-                new_format_df = self.convert_new_format_to_original(new_df)
-
             self.merge_or_replace_dataframe(new_format_df)
             self.update_combos()
         except Exception as e:
@@ -374,10 +464,7 @@ class MainWindow(QMainWindow):
         Returns:
         pandas.DataFrame: The dataframe in the original format. It will have columns 'Date', 'Country', and a column representing the variable.
         """
-        melted_df = new_df.melt(id_vars=['Date', 'Variable'], var_name='Country', value_name='Value')
-        variable_name = melted_df['Variable'].iloc[0]
-        melted_df = melted_df.rename(columns={'Value': variable_name}).drop(columns=['Variable'])
-        return melted_df
+        return convert_new_format_to_original(new_df)
 
     def merge_or_replace_dataframe(self, new_format_df):
         """
@@ -537,6 +624,67 @@ class MainWindow(QMainWindow):
         self.console.append(f"Group '{group_name}' created and added to the dataset.")
         self.country_search.setPlaceholderText("Search country...")
 
+    def group_forecasts(self):
+        """
+        Groups the checked forecasts and shows the group panel window to name the group.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        selected_forecasts = self.get_selected_countries(self.forecasted_country_list)
+        if not selected_forecasts:
+            self.console.append("Please select at least one forecast to group.")
+            return
+        self.group_panel = GroupPanelWindow(self, is_forecast=True)
+        self.group_panel.show()
+
+    def create_forecast_group(self, group_name):
+        """
+        Creates the forecast of a group from the checked forecasts of its members, without fitting a model on the group.
+
+        When a model was already fitted on a country with the name of the group, its forecast is reconciled with the forecasts
+        of the members (MinT) and the members are adjusted to add up to the group. Otherwise the group forecast is the sum of
+        the forecasts of the members (bottom-up). The historical data of the members is added up into the group as well, if
+        the dataset has no country with that name yet.
+
+        Parameters:
+        group_name (str): The name of the group to be created.
+
+        Returns:
+        None
+        """
+        selected_forecasts = [forecast_key for forecast_key in self.get_selected_countries(self.forecasted_country_list)
+                              if forecast_key in self.forecast_results and self.forecast_results.metadata(forecast_key)['country'] != group_name]
+        if not selected_forecasts:
+            self.console.append("Please select at least one forecast to group.")
+            return
+
+        base_keys = [forecast_key for forecast_key in self.forecast_results.keys_for(group_name) if 'model_object' in self.forecast_results.metadata(forecast_key)]
+        group_key = base_keys[0] if base_keys else None
+        method = "mint" if group_key is not None else "bottom_up"
+        try:
+            group_forecast = reconcile_group(self.forecast_results, group_name, selected_forecasts, group_key, method)
+        except ValueError as e:
+            self.console.append(f"The forecasts could not be grouped: {e}")
+            return
+
+        if group_name not in set(self.df['Country']):
+            countries = list(dict.fromkeys(self.forecast_results.metadata(forecast_key)['country'] for forecast_key in selected_forecasts))
+            group_data = self.aggregate_group_data(countries, self.start_year_spin.value(), self.end_year_spin.value(), group_name)
+            self.df = pd.concat([self.df, group_data], ignore_index=True)
+            self.update_combos()
+
+        forecast_key = f"{group_name} ({group_forecast['forecast_until_year']}) - {METHOD_LABELS[method]}"
+        self.forecast_results[forecast_key] = group_forecast
+        if group_key is not None:
+            self.console.append(f"Forecast group '{group_name}' reconciled (MinT) with {group_key}; the {len(selected_forecasts)} member forecasts were adjusted to add up to it.")
+        else:
+            self.console.append(f"Forecast group '{group_name}' created from the sum of {len(selected_forecasts)} forecasts.")
+        self.update_forecasted_countries_list()
+
     def aggregate_group_data(self, selected_countries, start_year, end_year, group_name):
         """
         Aggregates data for the selected countries and date range into a new group.
@@ -552,7 +700,7 @@ class MainWindow(QMainWindow):
         """
         group_data = pd.DataFrame()
         for country in selected_countries:
-            country_data = self.df[(self.df['Country'] == country) & (self.df['Date'] >= start_year) & (self.df['Date'] <= end_year)]
+            country_data = self.dataset.frame(country, start_year, end_year)
             if group_data.empty:
                 group_data = country_data.copy()
                 group_data.set_index('Date', inplace=True)
@@ -596,7 +744,7 @@ class MainWindow(QMainWindow):
         self.adf_results = pd.DataFrame(columns=['Country', 'Variable', 'ADF Statistic', 'p-value', 'Num Lags', 'Num Observations', '1%', '5%', '10%', 'Stationary', 'Error'])
 
         for country in selected_countries:
-            self.filtered_data = self.df[(self.df['Country'] == country) & (self.df['Date'] >= start_year) & (self.df['Date'] <= end_year)].copy()
+            self.filtered_data = self.dataset.frame(country, start_year, end_year).copy()
             if self.filtered_data.empty:
                 self.console.append(f"No data for country {country} and selected year range.")
                 continue
@@ -611,9 +759,11 @@ class MainWindow(QMainWindow):
         self.console.append("<hr style='border: 1px solid black;'>")
         self.console.append(self.format_adf_results(self.adf_results))
 
-    def run_sarimax(self, p_range=None, d_range=None, q_range=None, seasonal_period=None, enable_seasonality=True):
+    def run_sarimax(self, p_range=None, d_range=None, q_range=None, seasonal_period=None, enable_seasonality=True, search_strategy="grid", n_jobs=1, warm_start=False, top_k=5, ensemble=False):
         """
         Runs the SARIMAX model on the selected data and updates the forecast results.
+        Countries are modelled concurrently and each result is shown and forecast as soon as it is available.
+        Countries whose model was already selected by the same search on the same data are forecast from that model without searching again.
 
         Parameters:
         p_range (range, optional): The range of values for the AR order. Default is range(0, 2).
@@ -621,6 +771,11 @@ class MainWindow(QMainWindow):
         q_range (range, optional): The range of values for the MA order. Default is range(0, 2).
         seasonal_period (int, optional): The seasonal period for the SARIMAX model. Default is 11.
         enable_seasonality (bool, optional): Whether to enable seasonality in the SARIMAX model. Default is True.
+        search_strategy (str, optional): The order search strategy, "grid", "stepwise" or "two_phase". Default is "grid".
+        n_jobs (int, optional): The number of worker processes. 1 runs serially, 0 uses every CPU core. Default is 1.
+        warm_start (bool, optional): Whether candidates are warm-started from their best fitted neighbour. Default is False.
+        top_k (int, optional): The number of candidates refined with a full fit by the "two_phase" search, and of members of the ensemble. Default is 5.
+        ensemble (bool, optional): Whether the top_k candidates of each search are also forecast as an AIC-weighted ensemble. Default is False.
 
         Returns:
         None
@@ -636,24 +791,37 @@ class MainWindow(QMainWindow):
         variable = self.variable_combo.currentText() 
         sigma = float(self.sidePanelWindow.sigma_input.text())
 
-        sarimax_results = optimize_sarimax_models(self.df, selected_countries, variable, p_range, d_range, q_range, seasonal_period, start_year, end_year, enable_seasonality)
         self.console.append("<hr style='border: 1px solid black;'>")
-        self.console.append(self.format_sarimax_results(sarimax_results))
-
-        forecast_results = forecast_future_sarimax(sarimax_results, self.df, variable, start_year, self.forecast_until_year, self.replace_negative_forecast, sigma)
-        self.forecast_results.update(forecast_results)
-
+        observations = last_observations(self.df, variable, start_year, selected_countries)
+        settings = sarimax_search_settings(p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy, warm_start, top_k, ensemble)
+        reused = self.reuse_fitted_models("SARIMAX", selected_countries, settings, observations)
+        search_countries = [country for country in selected_countries if country not in reused]
+        results = iter_optimize_sarimax_models(self.dataset, search_countries, variable, p_range, d_range, q_range, seasonal_period, start_year, end_year, enable_seasonality, search_strategy, n_jobs, self.fit_cache, warm_start, top_k, ensemble)
+        for done, (country, result) in enumerate(results, start=len(reused) + 1):
+            self.console.append(f"[{done}/{len(selected_countries)}] " + self.format_sarimax_results({country: result}))
+            forecast_results = forecast_future_sarimax({country: result}, self.df, variable, start_year, self.forecast_until_year, self.replace_negative_forecast, sigma, observations)
+            self.forecast_results.update(forecast_results)
+            self.update_forecasted_countries_list()
+            QApplication.processEvents()
+
+        self.report_fit_cache_stats()
         self.apply_forecast_corrections()
         self.update_forecasted_countries_list()
 
-    def run_arima(self, p_range=None, d_range=None, q_range=None):
+    def run_arima(self, p_range=None, d_range=None, q_range=None, n_jobs=1, search_strategy="grid", top_k=5, backend="statsmodels"):
         """
         Runs the ARIMA model on the selected data and updates the forecast results.
+        Countries are modelled concurrently and each result is shown and forecast as soon as it is available.
+        Countries whose model was already selected by the same search on the same data are forecast from that model without searching again.
 
         Parameters:
         p_range (range, optional): The range of values for the AR order. Default is range(0, 2).
         d_range (range, optional): The range of values for the differencing order. Default is range(0, 2).
         q_range (range, optional): The range of values for the MA order. Default is range(0, 2).
+        n_jobs (int, optional): The number of worker processes. 1 runs serially, 0 uses every CPU core. Default is 1.
+        search_strategy (str, optional): The order search strategy, "grid" or "two_phase". Default is "grid".
+        top_k (int, optional): The number of candidates refined with a full fit by the "two_phase" search. Default is 5.
+        backend (str, optional): The fitting backend, "statsmodels" or "batch" (all countries fitted at once). Default is "statsmodels".
 
         Returns:
         None
@@ -668,19 +836,87 @@ class MainWindow(QMainWindow):
         variable = self.variable_combo.currentText()  
         sigma = float(self.sidePanelWindow.sigma_input.text())
 
-        arima_results = optimize_arima_models(self.df, selected_countries, variable, p_range, d_range, q_range, start_year, end_year)
         self.console.append("<hr style='border: 1px solid black;'>")
-        self.console.append(self.format_arima_results(arima_results))
-
-        forecast_results = forecast_future_arima(arima_results, self.df, variable, start_year, self.forecast_until_year, self.replace_negative_forecast, sigma)
-        self.forecast_results.update(forecast_results)
-
+        observations = last_observations(self.df, variable, start_year, selected_countries)
+        settings = arima_search_settings(p_range, d_range, q_range, search_strategy, top_k, backend)
+        reused = self.reuse_fitted_models("ARIMA", selected_countries, settings, observations)
+        search_countries = [country for country in selected_countries if country not in reused]
+        results = iter_optimize_arima_models(self.dataset, search_countries, variable, p_range, d_range, q_range, start_year, end_year, n_jobs, self.fit_cache, search_strategy, top_k, backend)
+        for done, (country, result) in enumerate(results, start=len(reused) + 1):
+            self.console.append(f"[{done}/{len(selected_countries)}] " + self.format_arima_results({country: result}))
+            forecast_results = forecast_future_arima({country: result}, self.df, variable, start_year, self.forecast_until_year, self.replace_negative_forecast, sigma, observations)
+            self.forecast_results.update(forecast_results)
+            self.update_forecasted_countries_list()
+            QApplication.processEvents()
+
+        self.report_fit_cache_stats()
         self.apply_forecast_corrections()
         self.update_forecasted_countries_list()
 
+    def reuse_fitted_models(self, model_name, selected_countries, search_settings, observations):
+        """
+        Forecasts the selected countries whose model was already selected by the same search on the same data, to the
+        current forecast year, from the stored model. Only the forecast is computed again, so changing the forecast year
+        extends or truncates the forecasts without running the order search.
+
+        Parameters:
+        model_name (str): "ARIMA" or "SARIMAX".
+        selected_countries (list): The selected countries.
+        search_settings (dict): The settings of the search, as built by arima.search_settings or sarimax.search_settings.
+        observations (dict): The (last year, last value) pair of each country, as returned by forecasting.last_observations.
+
+        Returns:
+        dict: The result of each reused country, as returned by model_update.find_fitted_model.
+        """
+        start_year = self.start_year_spin.value()
+        end_year = self.end_year_spin.value()
+        variable = self.variable_combo.currentText()
+        sigma = float(self.sidePanelWindow.sigma_input.text()) if self.sidePanelWindow else 2
+        forecast_future = forecast_future_arima if model_name == "ARIMA" else forecast_future_sarimax
+
+        reused = {}
+        for country in selected_countries:
+            data_series = self.dataset.series(country, variable, start_year, end_year)
+            result = find_fitted_model(self.forecast_results, country, model_name, data_series, search_settings)
+            if result is None:
+                continue
+            reused[country] = result
+            self.console.append(f"[{len(reused)}/{len(selected_countries)}] <b>{country}:</b> reusing the fitted "
+                                f"{(result.get('ensemble') or result['model_object']).describe()}, forecast until {self.forecast_until_year}.<br>")
+            self.forecast_results.update(forecast_future({country: result}, self.df, variable, start_year, self.forecast_until_year, self.replace_negative_forecast, sigma, observations))
+        if reused:
+            self.update_forecasted_countries_list()
+        return reused
+
+    def report_fit_cache_stats(self):
+        """
+        Appends the hit and miss counters of the fit cache to the console.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        stats = self.fit_cache.stats()
+        self.console.append(f"Fit cache: {stats['hits']} hits, {stats['misses']} misses.")
+
+    def clear_fit_cache(self):
+        """
+        Removes every cached model fit from disk.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        self.fit_cache.clear()
+        self.console.append("Fit cache cleared.")
+
     def apply_forecast_corrections(self):
         """
-        Applies corrections to the forecast data based on the settings in the side panel window.
+        Applies the correction of the side panel window to every checked forecast.
 
         Parameters:
         None
@@ -689,19 +925,20 @@ class MainWindow(QMainWindow):
         None
         """
         if self.sidePanelWindow:
-            selected_country = self.get_selected_countries(self.forecasted_country_list)
-            if not selected_country:
+            selected_forecasts = self.get_selected_countries(self.forecasted_country_list)
+            if not selected_forecasts:
                 self.console.append("Please select a country in the forecast country search list.")
                 return
 
-            self.correct_forecast(selected_country[0])
+            self.correct_forecasts(selected_forecasts)
 
-    def correct_forecast(self, country):
+    def correct_forecasts(self, forecast_keys):
         """
-        Applies a linear correction to the forecast data for the selected country.
+        Applies a piecewise-linear correction to the forecast data of the given forecasts.
+        The target years and values can be single values or comma-separated lists (e.g. "2030, 2050, 2100").
 
         Parameters:
-        country (str): The country for which to apply the forecast correction.
+        forecast_keys (list): The keys of the forecasts to correct.
 
         Returns:
         None
@@ -714,73 +951,31 @@ class MainWindow(QMainWindow):
         start_correction = self.sidePanelWindow.start_correction_checkbox.isChecked()
 
         if target_year_text and target_value_text:
-            target_year = int(target_year_text)
-            target_value = float(target_value_text)
+            try:
+                anchors = parse_anchors(target_year_text, target_value_text)
+            except ValueError as e:
+                self.console.append(f"Invalid correction targets: {e}")
+                return
             start_target_year = int(start_target_year_text) if start_target_year_text else None
-            variable = self.variable_combo.currentText()
-            self.apply_linear_correction(country, target_year, start_target_year, target_value, variable, continuous_correction, short_correction, start_correction)
-
-    def apply_linear_correction(self, country, target_year, start_target_year, target_value, variable, continuous, short, start):
-        """
-        Applies a linear correction to the forecast data for the specified country, target year, target value, and other settings.
-
-        Parameters:
-        country (str): The country for which to apply the correction.
-        target_year (int): The target year for the correction.
-        start_target_year (int, optional): The start target year for the correction. Default is None.
-        target_value (float): The target value for the correction.
-        variable (str): The variable to be corrected.
-        continuous (bool): Whether to apply a continuous correction.
-        short (bool): Whether to apply a short-term correction.
-        start (bool): Whether to start the correction from the target year.
-
-        Returns:
-        None
-        """
-        forecast_key = self.get_forecast_key(country)
-        if not forecast_key:
-            self.console.append(f"No forecast found for selected country: {country}")
-            return
-
-        forecast_data = self.forecast_results[forecast_key]
-        forecast_values = forecast_data['forecast_values']
-        forecast_years = forecast_values.index
-
-        if target_year in forecast_years:
-            start_year = start_target_year if start_target_year else forecast_years.min()
-            current_value = forecast_values.loc[start_year]
-            correction_factor = (target_value - current_value) / (target_year - start_year)
-
-            if start:
-                for year in forecast_years:
-                    if start_year <= year <= target_year:
-                        forecast_values.loc[year] = target_value
-            else:
-                for year in forecast_years:
-                    if start_year <= year <= target_year:
-                        forecast_values.loc[year] = current_value + correction_factor * (year - start_year)
-                    elif year > target_year:
-                        if continuous:
-                            forecast_values.loc[year] = forecast_values.loc[target_year] + correction_factor * (year - target_year)
-                        elif short:
-                            forecast_values.loc[year] = target_value
-
-            forecast_values[forecast_values < 0] = 0
+            forecast_keys = [self.get_forecast_key(forecast_key) or forecast_key for forecast_key in forecast_keys]
+            _, skipped = apply_correction(self.forecast_results, [key for key in forecast_keys if key in self.forecast_results], anchors,
+                                          start_target_year, continuous_correction, short_correction, start_correction)
+            for forecast_key in skipped:
+                self.console.append(f"The correction years are outside the forecast of {forecast_key}.")
 
     def get_forecast_key(self, country):
         """
         Retrieves the forecast key for the specified country.
 
         Parameters:
-        country (str): The country for which to retrieve the forecast key.
+        country (str): The country (or the forecast key itself) for which to retrieve the forecast key.
 
         Returns:
         str: The forecast key for the specified country, or None if not found.
         """
-        for key, value in self.forecast_results.items():
-            if country in key:
-                return key
-        return None
+        if country in self.forecast_results:
+            return country
+        return self.forecast_results.key_for(country)
 
     def update_forecasted_countries_list(self):
         """
@@ -843,11 +1038,11 @@ class MainWindow(QMainWindow):
         None
         """
         if chart_type == "Lines":
-            plot_historical_data(self.df, selected_countries, variable, self.start_year_spin.value(), self.end_year_spin.value(), ax)
+            plot_historical_data(self.dataset, selected_countries, variable, self.start_year_spin.value(), self.end_year_spin.value(), ax)
         elif chart_type == "Stacked Bars":
-            plot_historical_data_bar(self.df, selected_countries, variable, self.start_year_spin.value(), self.end_year_spin.value(), ax)
+            plot_historical_data_bar(self.dataset, selected_countries, variable, self.start_year_spin.value(), self.end_year_spin.value(), ax)
         elif chart_type == "Stacked Area":
-            plot_historical_data_stacked_area(self.df, selected_countries, variable, self.start_year_spin.value(), self.end_year_spin.value(), ax)
+            plot_historical_data_stacked_area(self.dataset, selected_countries, variable, self.start_year_spin.value(), self.end_year_spin.value(), ax)
         ax.set_xlim([self.start_year_spin.value(), self.end_year_spin.value()])
 
     def plot_forecast_data(self, plot_type, chart_type, selected_forecasts, variable, ax):
@@ -879,11 +1074,11 @@ class MainWindow(QMainWindow):
 
         max_value = -float('inf')
         if chart_type == "Lines":
-            max_value = plot_data(self.df, self.forecast_results, selected_forecasts, variable, plot_type, ax, show_confidence_interval)
+            max_value = plot_data(self.dataset, self.forecast_results, selected_forecasts, variable, plot_type, ax, show_confidence_interval)
         elif chart_type == "Stacked Bars":
-            max_value = plot_data_stacked_bar(self.df, self.forecast_results, selected_forecasts, variable, plot_type, ax)
+            max_value = plot_data_stacked_bar(self.dataset, self.forecast_results, selected_forecasts, variable, plot_type, ax)
         elif chart_type == "Stacked Area":
-            max_value = plot_data_stacked_area(self.df, self.forecast_results, selected_forecasts, variable, plot_type, ax)
+            max_value = plot_data_stacked_area(self.dataset, self.forecast_results, selected_forecasts, variable, plot_type, ax)
 
         self.set_plot_limits(ax, plot_type, max_value)
 
@@ -918,7 +1113,7 @@ class MainWindow(QMainWindow):
 
         Parameters:
         save_type (str): The type of data to save ("Historical", "Forecast", "Both").
-        format_type (str): The format type for saving ("Format 1 (Original)", "Format 2 (New)").
+        format_type (str): The format type for saving ("Format 1 (List)" for the original format, "Format 2 (Columns)" for the new format).
         save_path (str): The path to save the CSV file.
 
         Returns:
@@ -932,9 +1127,8 @@ class MainWindow(QMainWindow):
         variable = self.variable_combo.currentText()
         save_data = self.aggregate_save_data(selected_forecast_keys, variable, save_type)
 
-        if format_type == "Format 2 (New)":
-            save_data = save_data.pivot(index='Date', columns='Country', values=variable).reset_index()
-            save_data.insert(1, 'Variable', variable)
+        if format_type.startswith("Format 2"):
+            save_data = convert_original_to_new_format(save_data, [variable])
 
         save_data.to_csv(save_path, index=False)
         self.console.append(f"Data saved to {save_path}")
@@ -954,18 +1148,18 @@ class MainWindow(QMainWindow):
         save_data = pd.DataFrame()
 
         for forecast_key in selected_forecast_keys:
-            country = forecast_key.split(' (')[0]
+            country = self.forecast_results.metadata(forecast_key)['country']
             if save_type in ["Historical", "Both"]:
-                historical_data = self.df[(self.df['Country'] == country) & (self.df['Date'].notna())][['Country', 'Date', variable]]
+                historical_data = self.dataset.frame(country)[['Country', 'Date', variable]]
+                historical_data = historical_data[historical_data['Date'].notna()]
                 save_data = pd.concat([save_data, historical_data], ignore_index=True)
 
             if save_type in ["Forecast", "Both"]:
-                forecast_values = self.forecast_results[forecast_key]['forecast_values']
-                forecast_years = forecast_values.index
+                forecast_years, forecast_values = self.forecast_results.view(forecast_key)
                 forecast_df = pd.DataFrame({
                     'Country': country,
                     'Date': forecast_years,
-                    variable: forecast_values.values
+                    variable: forecast_values.copy()
                 })
                 save_data = pd.concat([save_data, forecast_df], ignore_index=True)
 
@@ -1066,24 +1260,278 @@ class MainWindow(QMainWindow):
 
     def format_model_results(self, results, model_name):
         """
-        Formats the model results as an HTML summary.
+        Formats the model results as a compact HTML line per country with the selected orders and AIC.
+        The full model summary is shown on demand with show_model_summaries.
 
         Parameters:
         results (dict): The model results.
         model_name (str): The name of the model.
 
         Returns:
-        str: The formatted model results as an HTML summary.
+        str: The formatted model results.
         """
         formatted_results = ""
         for country, result in results.items():
             if 'model_object' in result:
-                summary_html = result['model_summary'].as_html()
-                formatted_results += f"<b>{model_name} results for {country}:</b><br>{summary_html}<br>"
+                formatted_results += f"<b>{model_name} results for {country}:</b> {result['model_object'].describe()}<br>"
+                if 'ensemble' in result:
+                    formatted_results += f"{result['ensemble'].describe()}<br>"
+                if 'fit_log' in result:
+                    formatted_results += self.format_fit_log(result['fit_log'], show_candidates=False)
             else:
                 formatted_results += f"<b>Failed to model {country}:</b> {result['error']}<br>"
+            if 'candidate_plan' in result:
+                formatted_results += f"{result['candidate_plan']}<br>"
         return formatted_results
 
+    def format_fit_log(self, fit_log, show_candidates=True):
+        """
+        Formats the per-candidate optimiser iteration counts of an order search as an HTML table.
+
+        Parameters:
+        fit_log (list): The candidate records of the search, as returned in the 'fit_log' key of the model results.
+        show_candidates (bool, optional): Whether to include the table of candidates or only the totals. Default is True.
+
+        Returns:
+        str: The formatted fit log.
+        """
+        if not fit_log:
+            return ""
+        fit_log_df = pd.DataFrame(fit_log)
+        iterations = fit_log_df['iterations'].dropna()
+        header = f"Fitted candidates: {len(fit_log_df)} ({int(fit_log_df['cached'].sum())} cached, {int(fit_log_df['warm_start'].sum())} warm-started, {int(fit_log_df['coarse'].sum())} coarse)"
+        if not iterations.empty:
+            header += f", optimiser iterations: {int(iterations.sum())} in total, {iterations.mean():.1f} per candidate"
+        header += "."
+        if not show_candidates:
+            return f"{header}<br>"
+        return f"{header}<br>{fit_log_df.to_html(index=False)}<br>"
+
+    def show_model_summaries(self):
+        """
+        Shows the full model summary, and the candidates of the order search, of the selected forecasts in the console.
+        The summaries are built the first time they are shown.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        selected_forecasts = self.get_selected_countries(self.forecasted_country_list)
+        if not selected_forecasts:
+            self.console.append("Please select at least one forecast.")
+            return
+
+        self.console.append("<hr style='border: 1px solid black;'>")
+        for forecast_key in selected_forecasts:
+            model_record = self.forecast_results.get(forecast_key, {}).get('model_object')
+            if model_record is None:
+                self.console.append(f"No model found for forecast: {forecast_key}")
+                continue
+            formatted_summary = f"<b>{forecast_key}:</b><br>{model_record.summary_html()}<br>"
+            if model_record.fit_log:
+                formatted_summary += self.format_fit_log(model_record.fit_log)
+            self.console.append(formatted_summary)
+            QApplication.processEvents()
+
+    def run_backtest(self):
+        """
+        Runs a rolling-origin backtest of the candidate orders on the selected countries, with the model and ranges of the
+        model settings panel, and shows the RMSE and MAPE of every candidate in the console.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        selected_countries = self.get_selected_countries(self.country_list)
+        if not selected_countries:
+            self.console.append("Please select at least one country.")
+            return
+
+        panel = self.sidePanelWindow
+        model_name = panel.model_combo.currentText() if panel else "ARIMA"
+        p_range = panel.get_range(panel.p_range_input.text(), [0, 2]) if panel else range(0, 2)
+        d_range = panel.get_range(panel.d_range_input.text(), [0, 2]) if panel else range(0, 2)
+        q_range = panel.get_range(panel.q_range_input.text(), [0, 2]) if panel else range(0, 2)
+        seasonal_period = int(panel.seasonal_period_input.text()) if panel and panel.seasonal_period_input.text() else 11
+        enable_seasonality = panel.enable_seasonality_checkbox.isChecked() if panel and model_name == "SARIMAX" else False
+        n_jobs = panel.get_workers() if panel else 1
+
+        self.console.append("<hr style='border: 1px solid black;'>")
+        self.console.append(f"Backtesting {model_name} orders on {len(selected_countries)} countries...")
+        QApplication.processEvents()
+        table = backtest_models(self.dataset, selected_countries, self.variable_combo.currentText(), model_name, p_range, d_range, q_range,
+                                self.start_year_spin.value(), self.end_year_spin.value(), seasonal_period, enable_seasonality,
+                                n_jobs=n_jobs, fit_cache=self.fit_cache, cache_dir=os.path.join(self.cache_dir, "backtests"))
+        if table.empty:
+            self.console.append("Not enough data for a backtest.")
+            return
+        self.console.append(table.to_html(index=False, float_format=lambda value: f"{value:.3f}"))
+
+    def run_scenario_sweep(self):
+        """
+        Forecasts the models of the checked forecasts under every combination of the forecast settings of the side panel,
+        without fitting any model again, and saves the scenarios to a CSV file.
+
+        The sigmas and forecast years of the sweep are asked for as comma-separated values (e.g. "1.645, 1.96" and "2050, 2100"),
+        starting from the values of the side panel. Every scenario is computed with and without the replacement of negative
+        values, and both without a correction and with the correction of the side panel when its targets are filled in.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        selected_forecasts = [forecast_key for forecast_key in self.get_selected_countries(self.forecasted_country_list) if 'model_object' in self.forecast_results.get(forecast_key, {})]
+        if not selected_forecasts:
+            self.console.append("Please select at least one forecast with a fitted model.")
+            return
+
+        panel = self.sidePanelWindow
+        sigmas_text, accepted = QInputDialog.getText(self, "Scenario Sweep", "Sigmas (comma-separated):", text=panel.sigma_input.text() if panel else "2")
+        if not accepted:
+            return
+        years_text, accepted = QInputDialog.getText(self, "Scenario Sweep", "Forecast years (comma-separated):", text=str(self.forecast_until_year))
+        if not accepted:
+            return
+
+        try:
+            sigmas = [float(value) for value in sigmas_text.split(',') if value.strip()]
+            forecast_until_years = [int(value) for value in years_text.split(',') if value.strip()]
+            corrections = [None]
+            if panel and panel.target_year_input.text() and panel.target_value_input.text():
+                start_target_year_text = panel.start_target_year_input.text()
+                corrections.append({
+                    'anchors': parse_anchors(panel.target_year_input.text(), panel.target_value_input.text()),
+                    'start_year': int(start_target_year_text) if start_target_year_text else None,
+                    'continuous': panel.continuous_correction_checkbox.isChecked(),
+                    'short': panel.short_correction_checkbox.isChecked(),
+                    'start': panel.start_correction_checkbox.isChecked()
+                })
+        except ValueError as e:
+            self.console.append(f"Invalid scenario settings: {e}")
+            return
+
+        scenarios = scenario_grid(sigmas or [2], forecast_until_years or [self.forecast_until_year], (False, True), corrections)
+        variable = self.variable_combo.currentText()
+        countries = {self.forecast_results[forecast_key]['country'] for forecast_key in selected_forecasts}
+        observations = last_observations(self.df, variable, self.start_year_spin.value(), countries)
+        table = sweep_scenarios(self.forecast_results, selected_forecasts, observations, scenarios)
+        if table.empty:
+            self.console.append("No scenario could be computed.")
+            return
+
+        self.console.append("<hr style='border: 1px solid black;'>")
+        self.console.append(f"{len(scenarios)} scenarios computed for {len(selected_forecasts)} forecasts ({len(table)} rows).")
+        save_path, _ = QFileDialog.getSaveFileName(self, "Save Scenarios", self.extracted_dataset_dir, "CSV Files (*.csv);;All Files (*)")
+        if save_path:
+            table.rename(columns={'Value': variable}).to_csv(save_path, index=False)
+            self.console.append(f"Scenarios saved to {save_path}")
+
+    def update_forecasts(self):
+        """
+        Updates the models of the selected forecasts with the observations added to the data since they were fitted and
+        regenerates their forecasts. A model is only searched again when it no longer fits the updated series.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        selected_forecasts = [forecast_key for forecast_key in self.get_selected_countries(self.forecasted_country_list) if 'model_object' in self.forecast_results.get(forecast_key, {})]
+        if not selected_forecasts:
+            self.console.append("Please select at least one forecast with a fitted model.")
+            return
+
+        start_year = self.start_year_spin.value()
+        end_year = self.end_year_spin.value()
+        variable = self.variable_combo.currentText()
+        sigma = float(self.sidePanelWindow.sigma_input.text()) if self.sidePanelWindow else 2
+        n_jobs = self.sidePanelWindow.get_workers() if self.sidePanelWindow else 1
+        countries = {self.forecast_results[forecast_key]['country'] for forecast_key in selected_forecasts}
+        observations = last_observations(self.df, variable, start_year, countries)
+
+        self.console.append("<hr style='border: 1px solid black;'>")
+        for forecast_key in selected_forecasts:
+            forecast = self.forecast_results[forecast_key]
+            country = forecast['country']
+            data_series = self.dataset.series(country, variable, start_year, end_year)
+            result = update_model(forecast['model_object'], data_series, fit_cache=self.fit_cache, n_jobs=n_jobs)
+            if 'error' in result:
+                self.console.append(f"<b>{forecast_key}:</b> {result['error']}")
+                continue
+            if result['update'] == "unchanged":
+                self.console.append(f"<b>{forecast_key}:</b> no new observations.")
+                continue
+
+            if result['update'] == "appended":
+                self.console.append(f"<b>{forecast_key}:</b> {result['new_observations']} new observations appended, "
+                                    f"AIC per observation {result['diagnostics']['aic_before']:.3f} -> {result['diagnostics']['aic_after']:.3f}.")
+            else:
+                model_record = result['ensemble'] if forecast['model'] == 'SARX-E' and 'ensemble' in result else result['model_object']
+                self.console.append(f"<b>{forecast_key}:</b> searched again because {result['reason']}. New model: {model_record.describe()}.")
+
+            forecast_future = forecast_future_arima if result['model_object'].model_name == "ARIMA" else forecast_future_sarimax
+            forecast_results = forecast_future({country: result}, self.df, variable, start_year, forecast['forecast_until_year'], self.replace_negative_forecast, sigma, observations)
+            del self.forecast_results[forecast_key]
+            self.forecast_results.update({key: entry for key, entry in forecast_results.items() if entry['model'] == forecast['model']})
+            QApplication.processEvents()
+
+        self.report_fit_cache_stats()
+        self.update_forecasted_countries_list()
+
+    def show_fan_chart(self):
+        """
+        Simulates the selected forecasts and plots their fan charts (median and 5-95% and 25-75% bands of the simulated paths).
+        For every forecast, the console reports the bands in the last forecast year and the probability that the last
+        observed value triples by then.
+
+        Parameters:
+        None
+
+        Returns:
+        None
+        """
+        selected_forecasts = [forecast_key for forecast_key in self.get_selected_countries(self.forecasted_country_list) if 'model_object' in self.forecast_results.get(forecast_key, {})]
+        if not selected_forecasts:
+            self.console.append("Please select at least one forecast with a fitted model.")
+            return
+
+        variable = self.variable_combo.currentText()
+        countries = {self.forecast_results[forecast_key]['country'] for forecast_key in selected_forecasts}
+        observations = last_observations(self.df, variable, self.start_year_spin.value(), countries)
+        selected_forecasts = [forecast_key for forecast_key in selected_forecasts if self.forecast_results[forecast_key]['country'] in observations]
+        thresholds = {}
+        for forecast_key in selected_forecasts:
+            forecast = self.forecast_results[forecast_key]
+            thresholds[forecast_key] = [(forecast['forecast_until_year'], TRIPLING_FACTOR * observations[forecast['country']][1])]
+        n_jobs = self.sidePanelWindow.get_workers() if self.sidePanelWindow else 1
+
+        self.console.append("<hr style='border: 1px solid black;'>")
+        simulations = {}
+        for forecast_key, simulation in simulate_forecasts(self.forecast_results, selected_forecasts, observations, thresholds=thresholds,
+                                                           replace_negative_forecast=self.replace_negative_forecast, n_jobs=n_jobs):
+            if simulation['percentiles'].empty:
+                self.console.append(f"No forecast years to simulate for: {forecast_key}")
+                continue
+            simulations[forecast_key] = simulation
+            bands = simulation['percentiles'].iloc[-1]
+            probability = simulation['probabilities'][0]
+            self.console.append(f"<b>{forecast_key}:</b> {simulation['repetitions']} simulated paths. In {probability['year']}: median {bands['p50']:.2f}, "
+                                f"90% band {bands['p5']:.2f} - {bands['p95']:.2f}; P(tripling the last observed value) = {probability['by']:.1%}.")
+            QApplication.processEvents()
+
+        self.canvas.figure.clear()
+        ax = self.canvas.figure.add_subplot(111)
+        plot_fan_chart(self.dataset, self.forecast_results, list(simulations), simulations, variable, ax)
+        ax.set_xlim([self.start_year_spin.value(), max(self.forecast_results[forecast_key]['forecast_until_year'] for forecast_key in selected_forecasts)])
+        self.canvas.draw()
+
     def get_selected_countries(self, list_widget):
         """
         Retrieves the list of selected countries from the specified list widget.
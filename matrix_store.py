@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from data_formats import load_dataset
+
+def _paths(path):
+    base = path[:-5] if path.endswith(".json") else path[:-4] if path.endswith(".npy") else path
+    return base + ".json", base + ".npy"
+
+def write_matrix(path, variable, years, regions, values, dtype=np.float64):
+    """
+    This function writes a years by regions matrix as a matrix store: a contiguous block of values in a .npy file and a small JSON header.
+
+    The block holds one row per region, so the series of a region is contiguous on disk and in memory.
+
+    Parameters:
+    path (str): The path of the store, with or without the .json or .npy extension. Both files are written next to each other.
+    variable (str): The name of the variable.
+    years (array-like): The years, in increasing order.
+    regions (list): The region names.
+    values (array-like): The values, with one row per region and one column per year. NaN where there is no value.
+    dtype (numpy.dtype, optional): The type of the stored values, numpy.float64 or numpy.float32. Default is numpy.float64.
+
+    Returns:
+    str: The path of the header.
+    """
+    header_path, block_path = _paths(path)
+    values = np.asarray(values)
+    if values.shape != (len(regions), len(years)):
+        raise ValueError(f"The values should have the shape ({len(regions)}, {len(years)}), not {values.shape}.")
+
+    block = np.lib.format.open_memmap(block_path, mode='w+', dtype=np.dtype(dtype), shape=values.shape)
+    block[:] = values
+    block.flush()
+    del block
+
+    header = {'variable': variable, 'dtype': np.dtype(dtype).name, 'years': [int(year) for year in years], 'regions': [str(region) for region in regions]}
+    with open(header_path, 'w') as file:
+        json.dump(header, file)
+    return header_path
+
+def convert_to_matrix(df, path, variable=None, dtype=np.float64):
+    """
+    This function writes a dataset in the original (long) format as a matrix store.
+
+    Parameters:
+    df (pandas.DataFrame): The dataset, with the columns 'Country', 'Date' and the variable. Rows without a date are left out.
+    path (str): The path of the store (see write_matrix).
+    variable (str, optional): The variable to be stored. Default is None (the only column other than 'Country' and 'Date').
+    dtype (numpy.dtype, optional): The type of the stored values. Default is numpy.float64.
+
+    Returns:
+    str: The path of the header.
+
+    Raises:
+    ValueError: If no variable is given and the dataset has several, or if a country has several rows in the same year.
+    """
+    if variable is None:
+        variables = [column for column in df.columns if column not in ('Country', 'Date')]
+        if len(variables) != 1:
+            raise ValueError(f"Choose the variable to be stored among {variables}.")
+        variable = variables[0]
+    table = df[df['Date'].notna()].pivot(index='Country', columns='Date', values=variable)
+    return write_matrix(path, variable, table.columns.astype(np.int64), list(table.index), table.to_numpy(dtype=np.float64), dtype)
+
+class MatrixStore:
+
+    def __init__(self, path):
+        """
+        Initialize a read-only view of a matrix store written by write_matrix.
+
+        The values are memory-mapped, not read: the operating system pages in the parts that are used and shares them between
+        every store open on the same file, so many scenario files can be open at once without holding them in memory. The store
+        has the lookups of dataset_store.DatasetStore, so it can be passed wherever the modelling and plotting functions take a
+        dataset, and the series it returns are views of the mapped block.
+
+        Parameters:
+        path (str): The path of the store, with or without the .json or .npy extension.
+
+        Returns:
+        None
+        """
+        header_path, block_path = _paths(path)
+        with open(header_path) as file:
+            header = json.load(file)
+        self.path = header_path
+        self.variable = header['variable']
+        self.years = np.asarray(header['years'], dtype=np.int64)
+        self.regions = header['regions']
+        self.values = np.load(block_path, mmap_mode='r')
+        self._rows = {region: row for row, region in enumerate(self.regions)}
+
+    def countries(self):
+        """
+        Returns the regions of the store, in the order of its rows.
+        """
+        return list(self.regions)
+
+    def _columns(self, start_year=None, end_year=None):
+        first = int(np.searchsorted(self.years, start_year, side='left')) if start_year is not None else 0
+        last = int(np.searchsorted(self.years, end_year, side='right')) if end_year is not None else len(self.years)
+        return first, max(first, last)
+
+    def series(self, country, variable, start_year=None, end_year=None, dropna=True):
+        """
+        Returns the values of a region within a range of years, as a view of the mapped block.
+
+        Parameters:
+        country (str): The region name.
+        variable (str): The name of the variable. It should be the variable of the store.
+        start_year (int, optional): The first year. Default is None (from the first year).
+        end_year (int, optional): The last year. Default is None (to the last year).
+        dropna (bool, optional): Whether the years without a value are left out. Default is True.
+
+        Returns:
+        pandas.Series: The values in the order of the years, indexed by the column of each year and named after the variable.
+                       It is empty for an unknown region.
+
+        Raises:
+        KeyError: If the variable is not the variable of the store.
+        """
+        if variable != self.variable:
+            raise KeyError(variable)
+        first, last = self._columns(start_year, end_year)
+        if country not in self._rows:
+            first = last = 0
+        values = self.values[self._rows.get(country, 0), first:last]
+        series = pd.Series(values, index=pd.RangeIndex(first, last), name=variable, copy=False)
+        return series.dropna() if dropna and np.isnan(values).any() else series
+
+    def frame(self, country, start_year=None, end_year=None):
+        """
+        Returns the years of a region within a range of years as a small table with the columns 'Country', 'Date' and the variable,
+        as the rows of the original format.
+        """
+        series = self.series(country, self.variable, start_year, end_year, dropna=False)
+        return pd.DataFrame({'Country': country, 'Date': self.years[series.index], self.variable: series.to_numpy()})
+
+    def last_observations(self, variable, start_year, countries=None):
+        """
+        Returns the last year and the value in that year of every region, as forecasting.last_observations does for a DataFrame.
+        """
+        if variable != self.variable:
+            raise KeyError(variable)
+        if not len(self.years) or self.years[-1] < start_year:
+            return {}
+        countries = self.regions if countries is None else [country for country in countries if country in self._rows]
+        return {country: (int(self.years[-1]), float(self.values[self._rows[country], -1])) for country in countries}
+
+    def to_long(self):
+        """
+        Returns a copy of the store in the original (long) format, with the columns 'Country', 'Date' and the variable.
+        """
+        return pd.DataFrame({
+            'Country': np.repeat(self.regions, len(self.years)),
+            'Date': np.tile(self.years, len(self.regions)),
+            self.variable: np.asarray(self.values, dtype=np.float64).ravel()
+        })
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert CSV datasets in either format to memory-mapped matrix stores.")
+    parser.add_argument('files', nargs='+', help="CSV files to convert.")
+    parser.add_argument('--output-dir', default=None, help="Directory of the stores. Default: next to each CSV file.")
+    parser.add_argument('--variable', default=None, help="Variable to be stored, for files with several variables.")
+    parser.add_argument('--float32', action='store_true', help="Store the values as 32-bit floats.")
+    args = parser.parse_args(argv)
+
+    for file_name in args.files:
+        base = os.path.splitext(file_name)[0]
+        if args.output_dir is not None:
+            os.makedirs(args.output_dir, exist_ok=True)
+            base = os.path.join(args.output_dir, os.path.basename(base))
+        header_path = convert_to_matrix(load_dataset(file_name), base, args.variable, np.float32 if args.float32 else np.float64)
+        print(f"{file_name} -> {header_path}")
+
+if __name__ == "__main__":
+    main()
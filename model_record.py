@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+class ModelRecord:
+
+    def __init__(self, model_name, endog, order, params, aic, seasonal_order=(0, 0, 0, 0), fit_log=None, search_settings=None):
+        """
+        Initialize a lightweight record of a selected model.
+
+        The record only keeps what is needed to rebuild the model: the series it was fitted on, its orders and its fitted
+        parameters. The statsmodels results object is rebuilt from the parameters whenever it is needed (without running the
+        optimiser again) and is not kept, so a record is cheap to hold in memory and to send back from a worker process.
+        The summary of the model is only built when it is asked for.
+
+        Parameters:
+        model_name (str): The name of the model, "ARIMA" or "SARIMAX".
+        endog (pandas.Series or numpy.ndarray): The time series data the model was fitted on.
+        order (tuple): The (p, d, q) order of the model.
+        params (array-like): The fitted parameters of the model.
+        aic (float): The AIC of the fitted model.
+        seasonal_order (tuple, optional): The (P, D, Q, m) seasonal order of the model. Default is (0, 0, 0, 0).
+        fit_log (list, optional): The candidate records of the order search that selected the model. Default is None.
+        search_settings (dict, optional): The keyword arguments of the order search that selected the model (its ranges and
+                                          strategy), so the same search can be run again on updated data. Default is None.
+
+        Returns:
+        None
+        """
+        if model_name not in ("ARIMA", "SARIMAX"):
+            raise ValueError(f"Unknown model: {model_name}")
+
+        self.model_name = model_name
+        self.endog = np.asarray(endog, dtype=np.float64)
+        self.endog_name = getattr(endog, 'name', None)
+        self.order = tuple(order)
+        self.seasonal_order = tuple(seasonal_order)
+        self.params = np.asarray(params, dtype=np.float64)
+        self.aic = float(aic)
+        self.fit_log = fit_log
+        self.search_settings = search_settings
+        self._summary_html = None
+
+    def build_model(self):
+        """
+        Builds the unfitted statsmodels model with the settings used by the order search.
+
+        Returns:
+        statsmodels.tsa.statespace.mlemodel.MLEModel: The ARIMA or SARIMAX model.
+        """
+        endog = pd.Series(self.endog, name=self.endog_name)
+        if self.model_name == "ARIMA":
+            return ARIMA(endog, order=self.order)
+        return SARIMAX(endog,
+                       order=self.order,
+                       seasonal_order=self.seasonal_order,
+                       enforce_stationarity=False,
+                       enforce_invertibility=False)
+
+    def results(self, cov_type=None):
+        """
+        Rebuilds the fitted results from the stored parameters by running the Kalman filter once.
+
+        Parameters:
+        cov_type (str, optional): The covariance estimator of the parameters. "none" skips it, which is enough for forecasting.
+                                  Default is None (the estimator used by fit).
+
+        Returns:
+        statsmodels.tsa.statespace.mlemodel.MLEResults: The fitted results.
+        """
+        return self.build_model().filter(self.params, cov_type=cov_type)
+
+    def get_forecast(self, steps):
+        """
+        Forecasts the model out of sample.
+
+        Parameters:
+        steps (int): The number of steps to forecast.
+
+        Returns:
+        statsmodels.tsa.statespace.mlemodel.PredictionResults: The forecast, with its predicted_mean and conf_int.
+        """
+        return self.results(cov_type="none").get_forecast(steps=steps)
+
+    def append(self, new_observations):
+        """
+        Extends the model with new observations while keeping its fitted parameters.
+
+        The extended series is filtered once with the stored parameters, without running the optimiser, and the AIC is
+        refreshed from the log-likelihood of the extended series. The fit log is not carried over, since it describes the
+        search on the shorter series.
+
+        Parameters:
+        new_observations (array-like): The observations that follow the end of the series.
+
+        Returns:
+        ModelRecord: A new record of the model on the extended series.
+        """
+        endog = pd.Series(np.concatenate([self.endog, np.asarray(new_observations, dtype=np.float64)]), name=self.endog_name)
+        record = ModelRecord(self.model_name, endog, self.order, self.params, self.aic, self.seasonal_order, search_settings=self.search_settings)
+        record.aic = float(record.results(cov_type="none").aic)
+        return record
+
+    def summary(self):
+        """
+        Builds the statsmodels summary of the model.
+
+        Returns:
+        statsmodels.iolib.summary.Summary: The summary of the model.
+        """
+        return self.results().summary()
+
+    def summary_html(self):
+        """
+        Returns the summary of the model as HTML. It is built on first use and kept.
+        """
+        if self._summary_html is None:
+            self._summary_html = self.summary().as_html()
+        return self._summary_html
+
+    def describe(self):
+        """
+        Returns a one-line description of the model with its orders and AIC.
+        """
+        description = f"{self.model_name} {self.order}"
+        if self.model_name == "SARIMAX":
+            description += f" {self.seasonal_order}"
+        return f"{description}, AIC {self.aic:.2f}"
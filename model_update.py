@@ -0,0 +1,158 @@
+import numpy as np
+from arima import optimize_arima_country
+from sarimax import optimize_sarimax_country
+from ensemble import EnsembleRecord
+
+AIC_TOLERANCE = 0.05
+LJUNG_BOX_LAGS = 10
+LJUNG_BOX_ALPHA = 0.05
+
+def ljung_box_pvalue(results, lags=LJUNG_BOX_LAGS):
+    """
+    This function tests the standardized residuals of a fitted model for autocorrelation.
+
+    Parameters:
+    results (statsmodels.tsa.statespace.mlemodel.MLEResults): The fitted results.
+    lags (int, optional): The largest lag of the test. It is reduced to a fifth of the number of residuals on short series. Default is 10.
+
+    Returns:
+    float: The p-value of the Ljung-Box test at the largest lag, or NaN if the series is too short.
+    """
+    lags = min(lags, (results.nobs - results.loglikelihood_burn) // 5)
+    if lags < 1:
+        return np.nan
+    return float(results.test_serial_correlation('ljungbox', lags=lags)[0, 1, -1])
+
+def update_diagnostics(previous, updated, aic_tolerance=AIC_TOLERANCE, alpha=LJUNG_BOX_ALPHA):
+    """
+    This function checks whether a model still fits after it was extended with new observations.
+
+    The AIC grows with the length of the series, so it is compared per observation. The model is considered degraded when
+    its AIC per observation rises by more than aic_tolerance (relative), or when the Ljung-Box test finds autocorrelated
+    residuals on the extended series although it did not on the original one.
+
+    Parameters:
+    previous (ModelRecord): The model on the original series.
+    updated (ModelRecord): The same model extended with the new observations.
+    aic_tolerance (float, optional): The largest accepted relative rise of the AIC per observation. Default is 0.05.
+    alpha (float, optional): The significance level of the Ljung-Box test. Default is 0.05.
+
+    Returns:
+    dict: A dictionary with the AIC per observation 'aic_before' and 'aic_after', the Ljung-Box p-values 'ljung_box_before'
+          and 'ljung_box_after', the 'degraded' flag and the 'reason' of the degradation (None if the model is not degraded).
+    """
+    previous_results = previous.results(cov_type="none")
+    updated_results = updated.results(cov_type="none")
+    aic_before = previous.aic / previous_results.nobs
+    aic_after = updated.aic / updated_results.nobs
+    ljung_box_before = ljung_box_pvalue(previous_results)
+    ljung_box_after = ljung_box_pvalue(updated_results)
+
+    reason = None
+    if aic_after - aic_before > aic_tolerance * abs(aic_before):
+        reason = f"AIC per observation rose from {aic_before:.3f} to {aic_after:.3f}"
+    elif ljung_box_after < alpha and not ljung_box_before < alpha:
+        reason = f"residuals became autocorrelated (Ljung-Box p-value {ljung_box_after:.3f})"
+
+    return {
+        'aic_before': aic_before,
+        'aic_after': aic_after,
+        'ljung_box_before': ljung_box_before,
+        'ljung_box_after': ljung_box_after,
+        'degraded': reason is not None,
+        'reason': reason
+    }
+
+def _result(record):
+    if isinstance(record, EnsembleRecord):
+        result = _result(record.best)
+        result['ensemble'] = record
+        return result
+    result = {'aic': record.aic, 'order': record.order, 'model_object': record}
+    if record.model_name == "SARIMAX":
+        result['seasonal_order'] = record.seasonal_order
+    return result
+
+def find_fitted_model(forecast_results, country, model_name, data_series, search_settings):
+    """
+    This function looks for a model of a country, among the stored forecasts, that was selected by the same search on the
+    same data, so that it can be forecast to another year without searching again.
+
+    Parameters:
+    forecast_results (ForecastStore): The store of the forecasts.
+    country (str): The country name.
+    model_name (str): "ARIMA" or "SARIMAX".
+    data_series (pandas.Series): The current time series data of the country.
+    search_settings (dict): The settings of the search, as built by arima.search_settings or sarimax.search_settings.
+
+    Returns:
+    dict: A result with the same keys as the result of optimize_arima_country or optimize_sarimax_country (with the
+          'ensemble' key when an ensemble of the country is stored), or None if no stored model matches.
+    """
+    endog = np.asarray(data_series, dtype=np.float64)
+    found = None
+    for forecast_key in forecast_results.keys_for(country):
+        record = forecast_results.metadata(forecast_key).get('model_object')
+        if record is None or record.model_name != model_name or record.search_settings != search_settings:
+            continue
+        if len(record.endog) != len(endog) or not np.array_equal(record.endog, endog, equal_nan=True):
+            continue
+        if found is None or isinstance(record, EnsembleRecord):
+            found = record
+    return _result(found) if found is not None else None
+
+def update_model(model_record, data_series, aic_tolerance=AIC_TOLERANCE, alpha=LJUNG_BOX_ALPHA, fit_cache=None, n_jobs=1):
+    """
+    This function updates a fitted model with the new observations of its series.
+
+    When the series only gained observations at its end, the model is extended with them by a single filter pass with its
+    fitted parameters. The order search that selected the model is only run again when the extended model degrades (see
+    update_diagnostics) or when earlier observations were revised.
+
+    Parameters:
+    model_record (ModelRecord or EnsembleRecord): The fitted model. An ensemble is extended member by member and checked on its best member.
+    data_series (pandas.Series): The current time series data of the country, starting where the fitted series started.
+    aic_tolerance (float, optional): The largest accepted relative rise of the AIC per observation. Default is 0.05.
+    alpha (float, optional): The significance level of the Ljung-Box test. Default is 0.05.
+    fit_cache (FitCache, optional): The on-disk cache of previous fits, used by a re-search. Default is None (no cache).
+    n_jobs (int, optional): The number of worker processes of an ARIMA re-search. Default is 1 (serial).
+
+    Returns:
+    dict: A result with the same keys as the result of optimize_arima_country or optimize_sarimax_country, and:
+          'update': "unchanged", "appended" or "re-searched".
+          'new_observations': the number of observations added.
+          'diagnostics': the dictionary of update_diagnostics, or None if the model was not extended.
+          'reason': why the model was searched again (None if it was not).
+    """
+    endog = np.asarray(data_series, dtype=np.float64)
+    n_fitted = len(model_record.endog)
+    same_history = len(endog) >= n_fitted and np.allclose(endog[:n_fitted], model_record.endog, equal_nan=True)
+
+    if same_history and len(endog) == n_fitted:
+        result = _result(model_record)
+        result.update({'update': "unchanged", 'new_observations': 0, 'diagnostics': None, 'reason': None})
+        return result
+
+    diagnostics = None
+    if same_history:
+        updated = model_record.append(endog[n_fitted:])
+        diagnostics = update_diagnostics(model_record, updated, aic_tolerance, alpha)
+        reason = diagnostics['reason']
+        if not diagnostics['degraded']:
+            result = _result(updated)
+            result.update({'update': "appended", 'new_observations': len(endog) - n_fitted, 'diagnostics': diagnostics, 'reason': None})
+            return result
+    else:
+        reason = "earlier observations were revised"
+
+    settings = model_record.search_settings
+    if settings is None:
+        return {'error': f"The model cannot be searched again ({reason}): its search settings are unknown."}
+
+    if model_record.model_name == "ARIMA":
+        result = optimize_arima_country(data_series, n_jobs=n_jobs, fit_cache=fit_cache, **settings)
+    else:
+        result = optimize_sarimax_country(data_series, fit_cache=fit_cache, **settings)
+    result.pop('cache_stats', None)
+    result.update({'update': "re-searched", 'new_observations': max(len(endog) - n_fitted, 0), 'diagnostics': diagnostics, 'reason': reason})
+    return result
@@ -1,13 +1,14 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from dataset_store import as_dataset
 
 def plot_historical_data(df, selected_countries, variable, start_year, end_year, ax):
     """
     This function plots historical data for a given variable and selected countries.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
     selected_countries (list): A list of country names for which the data needs to be plotted.
     variable (str): The variable to be plotted (e.g., 'Solar', 'Wind', 'Hydro').
     start_year (int): The starting year for the plot.
@@ -17,9 +18,10 @@ def plot_historical_data(df, selected_countries, variable, start_year, end_year,
     Returns:
     float: The maximum value of the plotted variable.
     """
+    dataset = as_dataset(df)
     max_value = -float('inf')
     for country in selected_countries:
-        country_data = df[(df['Country'] == country) & (df['Date'] >= start_year) & (df['Date'] <= end_year)]
+        country_data = dataset.frame(country, start_year, end_year)
         if not country_data.empty:
             max_value = max(max_value, country_data[variable].max())
             ax.plot(country_data['Date'], country_data[variable], label=country)
@@ -38,7 +40,7 @@ def plot_historical_data_bar(df, selected_countries, variable, start_year, end_y
     This function plots historical data for a given variable and selected countries using a bar chart.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
     selected_countries (list): A list of country names for which the data needs to be plotted.
     variable (str): The variable to be plotted (e.g., 'Solar', 'Wind', 'Hydro').
     start_year (int): The starting year for the plot.
@@ -48,10 +50,11 @@ def plot_historical_data_bar(df, selected_countries, variable, start_year, end_y
     Returns:
     float: The maximum value of the plotted variable.
     """
+    dataset = as_dataset(df)
     combined_data = pd.DataFrame()
 
     for country in selected_countries:
-        country_data = df[(df['Country'] == country) & (df['Date'] >= start_year) & (df['Date'] <= end_year)]
+        country_data = dataset.frame(country, start_year, end_year)
         if not country_data.empty:
             combined_data[country] = country_data.set_index('Date')[variable]
 
@@ -78,7 +81,7 @@ def plot_historical_data_stacked_area(df, selected_countries, variable, start_ye
     This function plots historical data for a given variable and selected countries using a stacked area chart.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
     selected_countries (list): A list of country names for which the data needs to be plotted.
     variable (str): The variable to be plotted (e.g., 'Solar', 'Wind', 'Hydro').
     start_year (int): The starting year for the plot.
@@ -87,11 +90,12 @@ def plot_historical_data_stacked_area(df, selected_countries, variable, start_ye
 
     Returns:
     float: The maximum value of the plotted variable.
-    """    
+    """
+    dataset = as_dataset(df)
     combined_data = pd.DataFrame()
 
     for country in selected_countries:
-        country_data = df[(df['Country'] == country) & (df['Date'] >= start_year) & (df['Date'] <= end_year)]
+        country_data = dataset.frame(country, start_year, end_year)
         if not country_data.empty:
             combined_data[country] = country_data.set_index('Date')[variable]
 
@@ -114,7 +118,7 @@ def plot_data(df, forecast_results, forecast_keys, variable, plot_type, ax, show
     This function plots historical and forecasted data for a given variable and selected countries.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
     forecast_results (dict): A dictionary containing forecast results for each country. Each entry should have keys 'country', 'forecast_values', 'forecast_until_year', and optionally 'forecast_ci'.
     forecast_keys (list): A list of keys identifying the countries for which forecast results are available in the forecast_results dictionary.
     variable (str): The variable to be plotted (e.g., 'Solar', 'Wind', 'Hydro').
@@ -124,13 +128,14 @@ def plot_data(df, forecast_results, forecast_keys, variable, plot_type, ax, show
 
     Returns:
     float: The maximum value of the plotted variable.
-    """    
+    """
+    dataset = as_dataset(df)
     combined_data = pd.DataFrame()
 
     for forecast_key in forecast_keys:
         forecast = forecast_results[forecast_key]
         country = forecast['country']
-        historical_data = df[df['Country'] == country][['Date', variable]].set_index('Date')
+        historical_data = dataset.frame(country)[['Date', variable]].set_index('Date')
         forecast_values = forecast['forecast_values'] if plot_type != "Historical" else None
         forecast_ci = forecast['forecast_ci'] if show_confidence_interval else None
 
@@ -167,7 +172,7 @@ def plot_data_stacked_bar(df, forecast_results, forecast_keys, variable, plot_ty
     This function plots historical and forecasted data for a given variable and selected countries using a stacked bar chart.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
     forecast_results (dict): A dictionary containing forecast results for each country. Each entry should have keys 'country', 'forecast_values', 'forecast_until_year'.
     forecast_keys (list): A list of keys identifying the countries for which forecast results are available in the forecast_results dictionary.
     variable (str): The variable to be plotted (e.g., 'Solar', 'Wind', 'Hydro').
@@ -177,12 +182,13 @@ def plot_data_stacked_bar(df, forecast_results, forecast_keys, variable, plot_ty
     Returns:
     float: The maximum value of the plotted variable.
     """
+    dataset = as_dataset(df)
     combined_data = pd.DataFrame()
 
     for forecast_key in forecast_keys:
         forecast = forecast_results[forecast_key]
         country = forecast['country']
-        historical_data = df[df['Country'] == country][['Date', variable]].set_index('Date')
+        historical_data = dataset.frame(country)[['Date', variable]].set_index('Date')
         forecast_values = forecast['forecast_values'] if plot_type != "Historical" else None
 
         temp_combined_data = pd.DataFrame(index=range(int(historical_data.index.min()), forecast['forecast_until_year'] + 1))
@@ -221,7 +227,7 @@ def plot_data_stacked_area(df, forecast_results, forecast_keys, variable, plot_t
     This function plots historical and forecasted data for a given variable and selected countries using a stacked area chart.
 
     Parameters:
-    df (pandas.DataFrame): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
     forecast_results (dict): A dictionary containing forecast results for each country. Each entry should have keys 'country', 'forecast_values', 'forecast_until_year'.
     forecast_keys (list): A list of keys identifying the countries for which forecast results are available in the forecast_results dictionary.
     variable (str): The variable to be plotted (e.g., 'Solar', 'Wind', 'Hydro').
@@ -230,13 +236,14 @@ def plot_data_stacked_area(df, forecast_results, forecast_keys, variable, plot_t
 
     Returns:
     float: The maximum value of the plotted variable.
-    """    
+    """
+    dataset = as_dataset(df)
     combined_data = pd.DataFrame()
 
     for forecast_key in forecast_keys:
         forecast = forecast_results[forecast_key]
         country = forecast['country']
-        historical_data = df[df['Country'] == country][['Date', variable]].set_index('Date')
+        historical_data = dataset.frame(country)[['Date', variable]].set_index('Date')
         forecast_values = forecast['forecast_values'] if plot_type != "Historical" else None
 
         temp_combined_data = pd.DataFrame(index=range(int(historical_data.index.min()), forecast['forecast_until_year'] + 1))
@@ -260,3 +267,46 @@ def plot_data_stacked_area(df, forecast_results, forecast_keys, variable, plot_t
     ax.set_ylim(bottom=0)
 
     return combined_data.max().max()
+
+def plot_fan_chart(df, forecast_results, forecast_keys, simulations, variable, ax):
+    """
+    This function plots fan charts of simulated forecasts: the historical data, the median of the simulated paths and their percentile bands.
+
+    Parameters:
+    df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the historical data. It should have columns 'Country', 'Date', and the variable to be plotted.
+    forecast_results (dict): A dictionary containing forecast results for each country. Each entry should have the key 'country'.
+    forecast_keys (list): A list of keys identifying the forecasts to be plotted.
+    simulations (dict): A dictionary mapping each forecast key to the simulation returned by simulation.simulate_forecast. Its
+                        percentiles should include p50, and the bands p5-p95 and p25-p75 are drawn when present.
+    variable (str): The variable to be plotted (e.g., 'Solar', 'Wind', 'Hydro').
+    ax (matplotlib.axes.Axes): The Axes object on which the plot will be drawn.
+
+    Returns:
+    float: The maximum value of the plotted variable.
+    """
+    dataset = as_dataset(df)
+    max_value = -float('inf')
+
+    for forecast_key in forecast_keys:
+        country = forecast_results[forecast_key]['country']
+        bands = simulations[forecast_key]['percentiles']
+        historical_data = dataset.frame(country)[['Date', variable]].dropna()
+
+        line, = ax.plot(historical_data['Date'], historical_data[variable], label=country)
+        color = line.get_color()
+        for lower, upper, alpha in (('p5', 'p95', 0.15), ('p25', 'p75', 0.3)):
+            if lower in bands and upper in bands:
+                ax.fill_between(bands.index, bands[lower], bands[upper], color=color, alpha=alpha, linewidth=0,
+                                label=f'{country} {lower[1:]}-{upper[1:]}%')
+        ax.plot(bands.index, bands['p50'], color=color, linestyle='--', label=f'{country} Median')
+
+        max_value = max(max_value, historical_data[variable].max(), bands.max().max())
+
+    ax.set_title(f'{variable} Production (Fan Chart)', fontsize=16, fontweight='bold')
+    ax.set_ylabel('Production (TWh)', fontsize=14)
+    ax.set_xlabel('Year', fontsize=14)
+    ax.legend()
+    ax.grid(True, linestyle='--', which='both', color='grey', alpha=0.5)
+    ax.set_ylim(bottom=0)
+
+    return max_value
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+METHODS = ("bottom_up", "mint")
+METHOD_LABELS = {"bottom_up": "Bottom-Up", "mint": "MinT"}
+
+def summing_matrix(groups, bottom):
+    """
+    This function builds the summing matrix of a hierarchy, which maps the bottom series to every series of the hierarchy.
+
+    Parameters:
+    groups (dict): A dictionary mapping each group to the bottom series it adds up.
+    bottom (list): The bottom series.
+
+    Returns:
+    numpy.ndarray: A matrix with one row per group (in the order of groups) followed by one row per bottom series, and one
+                   column per bottom series. The row of a group has a one for each of its members and the rows of the bottom
+                   series form an identity matrix.
+    """
+    columns = {name: i for i, name in enumerate(bottom)}
+    summing = np.zeros((len(groups) + len(bottom), len(bottom)))
+    for row, members in enumerate(groups.values()):
+        summing[row, [columns[member] for member in members]] = 1
+    summing[len(groups):] = np.eye(len(bottom))
+    return summing
+
+def reconcile(summing, base, variances, method="bottom_up"):
+    """
+    This function reconciles the forecasts of a hierarchy, for every year at once, so that each group equals the sum of its members.
+
+    The bottom-up method adds up the forecasts of the bottom series. The MinT method combines the forecasts of every series
+    of the hierarchy with the generalised least squares projection (S' W^-1 S)^-1 S' W^-1 of the minimum trace reconciliation,
+    where W is diagonal and holds the forecast variance of each series in each year. A series without a base forecast in a
+    year gets no weight, so the MinT method falls back to bottom-up where no group is forecast.
+    The reconciled variances assume that the forecast errors of different series are independent.
+
+    Parameters:
+    summing (numpy.ndarray): The summing matrix of the hierarchy, as returned by summing_matrix.
+    base (numpy.ndarray): The base forecasts, with one row per year and one column per row of summing. NaN where a series has no forecast.
+    variances (numpy.ndarray): The forecast variances, with the same shape as base.
+    method (str, optional): "bottom_up" or "mint". Default is "bottom_up".
+
+    Returns:
+    tuple: The reconciled forecasts and their variances, with the same shape as base.
+
+    Raises:
+    ValueError: If the method is unknown, or if a bottom series has no forecast or (for MinT) no finite positive variance.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown reconciliation method: {method}")
+
+    n_groups = summing.shape[0] - summing.shape[1]
+    bottom = base[:, n_groups:]
+    bottom_variances = variances[:, n_groups:]
+    if np.isnan(bottom).any():
+        raise ValueError("Every member needs a forecast in every reconciled year.")
+    if method == "bottom_up":
+        return bottom @ summing.T, bottom_variances @ summing.T
+
+    if not (np.isfinite(bottom_variances) & (bottom_variances > 0)).all():
+        raise ValueError("The MinT reconciliation needs finite confidence intervals for every member.")
+    known = np.isfinite(base) & np.isfinite(variances) & (variances > 0)
+    precision = np.where(known, 1 / np.where(known, variances, 1), 0)
+    normal = (summing.T[None, :, :] * precision[:, None, :]) @ summing
+    rhs = (precision * np.where(known, base, 0)) @ summing
+    covariance = np.linalg.inv(normal)
+    reconciled_bottom = (covariance @ rhs[:, :, None])[:, :, 0]
+    return reconciled_bottom @ summing.T, np.einsum('tni,ni->tn', summing @ covariance, summing)
+
+def reconcile_group(forecast_store, group_name, member_keys, group_key=None, method="bottom_up"):
+    """
+    This function derives the forecast of a group of countries from the stored forecasts of its members, without fitting any model.
+
+    The forecasts are reconciled on the years forecast for every member. The variances are taken from the half-widths of the
+    confidence intervals, so the forecasts should share the same sigma. With the MinT method, the base forecast of the group
+    (group_key) is combined with the forecasts of the members, and the reconciled values and confidence intervals of the
+    members are written back into the store so that they add up to the group.
+
+    Parameters:
+    forecast_store (ForecastStore): The store of the forecasts.
+    group_name (str): The name of the group.
+    member_keys (list): The forecast keys of the members.
+    group_key (str, optional): The forecast key of a model fitted on the group itself, used by the MinT method. Default is None.
+    method (str, optional): "bottom_up" or "mint". Default is "bottom_up".
+
+    Returns:
+    dict: The forecast entry of the group, with the same keys as an entry of forecast_future ('forecast_values', 'forecast_ci',
+          'country', 'model', 'order', 'seasonal_order' and 'forecast_until_year'), plus the 'members' and the reconciliation 'method'.
+
+    Raises:
+    ValueError: If the members have no forecast year in common, or if the reconciliation fails (see reconcile).
+    """
+    all_years, values = forecast_store.matrix(member_keys)
+    _, lower = forecast_store.matrix(member_keys, 'mean_ci_lower')
+    _, upper = forecast_store.matrix(member_keys, 'mean_ci_upper')
+    common = ~np.isnan(values).any(axis=1)
+    if not common.any():
+        raise ValueError(f"The members of {group_name} have no forecast year in common.")
+    years = all_years[common]
+
+    group_values = np.full(len(years), np.nan)
+    group_variances = np.full(len(years), np.nan)
+    if group_key is not None:
+        group = forecast_store[group_key]
+        group_values = group['forecast_values'].reindex(years).to_numpy()
+        if group['forecast_ci'] is not None:
+            group_ci = group['forecast_ci'].reindex(years)
+            group_variances = ((group_ci['mean_ci_upper'] - group_ci['mean_ci_lower']).to_numpy() / 2) ** 2
+
+    base = np.column_stack([group_values, values[common]])
+    variances = np.column_stack([group_variances, ((upper[common] - lower[common]) / 2) ** 2])
+    summing = summing_matrix({group_name: member_keys}, member_keys)
+    reconciled, reconciled_variances = reconcile(summing, base, variances, method)
+    reconciled_half_widths = np.sqrt(reconciled_variances)
+
+    if method == "mint":
+        for field, new_values in (('forecast_values', reconciled[:, 1:]),
+                                  ('mean_ci_lower', reconciled[:, 1:] - reconciled_half_widths[:, 1:]),
+                                  ('mean_ci_upper', reconciled[:, 1:] + reconciled_half_widths[:, 1:])):
+            _, field_values = forecast_store.matrix(member_keys, field)
+            field_values[common] = new_values
+            forecast_store.set_matrix(member_keys, all_years, field_values, field)
+
+    index = pd.Index(years)
+    return {
+        'forecast_values': pd.Series(reconciled[:, 0], index=index, name='predicted_mean'),
+        'forecast_ci': pd.DataFrame({'mean_ci_lower': reconciled[:, 0] - reconciled_half_widths[:, 0],
+                                     'mean_ci_upper': reconciled[:, 0] + reconciled_half_widths[:, 0]}, index=index),
+        'country': group_name,
+        'model': METHOD_LABELS[method],
+        'order': None,
+        'seasonal_order': None,
+        'forecast_until_year': int(years[-1]),
+        'members': list(member_keys),
+        'method': method
+    }
@@ -1,11 +1,129 @@
 import numpy as np
-import pandas as pd
 from statsmodels.tsa.statespace.sarimax import SARIMAX
+from scheduler import run_tasks
+from model_record import ModelRecord
+from candidate_planner import plan_candidates
+from forecasting import last_observations, forecast_models
+from ensemble import ensemble_from_fits
+from dataset_store import as_dataset
 
-def optimize_sarimax(series, p_range, d_range, q_range, seasonal_period, enable_seasonality):
+SEARCH_STRATEGIES = ("grid", "stepwise", "two_phase")
+COARSE_MAXITER = 5
+
+def _build_sarimax(series, order, seasonal_order):
+    """
+    This function builds an (unfitted) SARIMAX model with the settings used by the order search.
+    """
+    return SARIMAX(series,
+                   order=order,
+                   seasonal_order=seasonal_order,
+                   enforce_stationarity=False,
+                   enforce_invertibility=False)
+
+def _fit_sarimax(series, order, seasonal_order, fit_cache=None, start_params=None, fit_log=None, maxiter=None, lookup=True):
+    """
+    This function fits a single SARIMAX candidate with the settings used by the order search, from the fit cache when possible.
+
+    Parameters:
+    - series (pandas.Series): The time series data to be modeled.
+    - order (tuple): The (p, d, q) order of the candidate.
+    - seasonal_order (tuple): The (P, D, Q, m) seasonal order of the candidate.
+    - fit_cache (FitCache, optional): The cache of previous fits. Default is None (no cache).
+    - start_params (numpy.ndarray, optional): The parameters the optimiser starts from. They are only used when their log-likelihood
+      beats statsmodels' default start parameters. A fit from other start parameters may end in a different local optimum, so it is
+      read from but never written to the fit cache. Default is None (statsmodels' default start parameters).
+    - fit_log (list, optional): A list to which a record of the candidate (orders, AIC, optimiser iterations, warm start, cache and coarse flags) is appended.
+    - maxiter (int, optional): The maximum number of optimiser iterations. A capped fit only approximates the AIC of the candidate,
+      so it is read from but never written to the fit cache. Default is None (statsmodels' default of 50 iterations).
+    - lookup (bool, optional): Whether the fit cache is read. False for a candidate already looked up by the caller, so it is not counted twice. Default is True.
+
+    Returns:
+    - aic (float): The AIC of the candidate, or None if the fit fails.
+    - params (numpy.ndarray): The fitted parameters, or None if the fit fails.
+    - results (statsmodels.tsa.statespace.sarimax.SARIMAXResults): The fitted model, or None if the fit fails or comes from the cache.
+    """
+    key = None
+    entry = None
+    if fit_cache is not None:
+        key = fit_cache.make_key(series, order, seasonal_order, enforce_stationarity=False, enforce_invertibility=False, model_name="SARIMAX")
+        entry = fit_cache.get(key) if lookup else None
+
+    iterations = 0
+    if entry is not None:
+        aic, params, results = entry['aic'], entry['params'], None
+    else:
+        try:
+            model = _build_sarimax(series, order, seasonal_order)
+            if start_params is not None and not model.loglike(start_params) > model.loglike(model.start_params):
+                start_params = None
+            fit_kwargs = {} if maxiter is None else {'maxiter': maxiter}
+            results = model.fit(start_params=start_params, disp=False, **fit_kwargs)
+            aic, params = results.aic, results.params.values
+            iterations = results.mle_retvals.get('iterations') if results.mle_retvals else None
+        except:
+            results = aic = params = None
+
+        if fit_cache is not None and maxiter is None and start_params is None:
+            fit_cache.put(key, params, results.llf if results is not None else None, aic)
+
+    if fit_log is not None:
+        fit_log.append({
+            'order': order,
+            'seasonal_order': seasonal_order,
+            'aic': aic,
+            'iterations': iterations,
+            'warm_start': start_params is not None and entry is None,
+            'cached': entry is not None,
+            'coarse': maxiter is not None and entry is None
+        })
+    return aic, params, results
+
+def _warm_start_params(series, order, seasonal_order, fitted):
+    """
+    This function seeds the start parameters of a candidate from its best fitted neighbour, i.e. the fitted candidate with the
+    lowest AIC whose (p, d, q, P, D, Q) differs in a single position, such as (p - 1, d, q) or the same order with P = 0.
+    Parameters shared with the neighbour (matched by name) keep the neighbour's value and new lags start at zero.
+
+    Parameters:
+    - series (pandas.Series): The time series data to be modeled.
+    - order (tuple): The (p, d, q) order of the candidate.
+    - seasonal_order (tuple): The (P, D, Q, m) seasonal order of the candidate.
+    - fitted (dict): A dictionary mapping the (order, seasonal_order) of every candidate fitted so far to its (aic, params, param_names).
+      Missing parameter names are filled in on first use.
+
+    Returns:
+    - start_params (numpy.ndarray): The start parameters, or None if no neighbour has been fitted yet.
+    """
+    best = None
+    orders = order + tuple(seasonal_order[:3])
+    for (n_order, n_seasonal_order), (aic, params, _) in fitted.items():
+        if params is None:
+            continue
+        distance = sum(a != b for a, b in zip(orders, n_order + tuple(n_seasonal_order[:3])))
+        if distance == 1 and (best is None or aic < fitted[best][0]):
+            best = (n_order, n_seasonal_order)
+
+    if best is None:
+        return None
+
+    aic, params, names = fitted[best]
+    if names is None:
+        names = _build_sarimax(series, *best).param_names
+        fitted[best] = (aic, params, names)
+    values = dict(zip(names, params))
+    return np.array([values.get(name, 0.0) for name in _build_sarimax(series, order, seasonal_order).param_names])
+
+def _record_fit(fitted, order, seasonal_order, aic, params, results):
+    """
+    Records a fitted candidate for warm starting its neighbours.
+    """
+    fitted[(order, seasonal_order)] = (aic, params, results.param_names if results is not None else None)
+
+def optimize_sarimax(series, p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy="grid", fit_cache=None, warm_start=False, fit_log=None, top_k=5, plan=None, fitted=None):
     """
     This function optimizes the SARIMAX model parameters (p, d, q) and (P, D, Q, m) for a given time series.
     It iterates through different combinations of these parameters and selects the one that yields the lowest AIC (Akaike Information Criterion).
+    Only the de-duplicated, feasible combinations of the candidate plan are fitted.
 
     Parameters:
     - series (pandas.Series): The time series data to be modeled.
@@ -14,6 +132,15 @@ def optimize_sarimax(series, p_range, d_range, q_range, seasonal_period, enable_
     - q_range (list): A list of integers representing the range of q values to be tested.
     - seasonal_period (int): The number of periods in a season.
     - enable_seasonality (bool): A flag indicating whether to include seasonal components in the model.
+    - search_strategy (str): "grid" fits every combination, "stepwise" runs the stepwise search of optimize_sarimax_stepwise and
+      "two_phase" runs the coarse-to-fine search of optimize_sarimax_two_phase. Default is "grid".
+    - fit_cache (FitCache, optional): The on-disk cache of previous fits, reused across runs. Default is None (no cache).
+    - warm_start (bool): A flag indicating whether each candidate starts the optimiser from the parameters of its best fitted neighbour. Default is False.
+    - fit_log (list, optional): A list to which one record per candidate, with its optimiser iteration count, is appended. Default is None.
+    - top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy. Default is 5.
+    - plan (CandidatePlan, optional): The candidates to be searched, as built by candidate_planner.plan_candidates. Default is None (planned from the ranges).
+    - fitted (dict, optional): A dictionary to which the (aic, params, param_names) of every converged candidate is recorded, keyed by its
+      (order, seasonal_order), so the fits can be reused after the search. Default is None.
 
     Returns:
     - best_aic (float): The lowest AIC value obtained during the optimization process.
@@ -21,42 +148,326 @@ def optimize_sarimax(series, p_range, d_range, q_range, seasonal_period, enable_
     - best_seasonal_order (tuple): The optimal (P, D, Q, m) values that yield the lowest AIC.
     - best_mdl (statsmodels.tsa.statespace.sarimax.SARIMAX): The SARIMAX model object with the best parameters.
     """    
+    if search_strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {search_strategy}")
+    if plan is None:
+        plan = plan_candidates(len(series), p_range, d_range, q_range, seasonal_period, enable_seasonality)
+    if search_strategy == "stepwise":
+        return optimize_sarimax_stepwise(series, p_range, d_range, q_range, seasonal_period, enable_seasonality, fit_cache, warm_start, fit_log, plan, fitted)
+    if search_strategy == "two_phase":
+        return optimize_sarimax_two_phase(series, p_range, d_range, q_range, seasonal_period, enable_seasonality, top_k, fit_cache, fit_log, plan, fitted)
+
     best_aic = np.inf
     best_order = None
     best_seasonal_order = None
+    best_params = None
     best_mdl = None
 
-    P = D = Q = range(2)
-    m = seasonal_period
+    fitted = {} if fitted is None else fitted
 
-    for p in p_range:
-        for d in d_range:
-            for q in q_range:
-                for P_ in P:
-                    for D_ in D:
-                        for Q_ in Q:
-                            try:
-                                temp_model = SARIMAX(series,
-                                                     order=(p, d, q),
-                                                     seasonal_order=(P_, D_, Q_, m) if enable_seasonality else (0, 0, 0, 0),
-                                                     enforce_stationarity=False,
-                                                     enforce_invertibility=False)
-                                results = temp_model.fit(disp=False)
-                                if results.aic < best_aic:
-                                    best_aic = results.aic
-                                    best_order = (p, d, q)
-                                    best_seasonal_order = (P_, D_, Q_, m) if enable_seasonality else (0, 0, 0, 0)
-                                    best_mdl = results
-                            except:
-                                continue
+    for order, seasonal_order in plan.candidates:
+        start_params = _warm_start_params(series, order, seasonal_order, fitted) if warm_start else None
+        aic, params, results = _fit_sarimax(series, order, seasonal_order, fit_cache, start_params, fit_log)
+        _record_fit(fitted, order, seasonal_order, aic, params, results)
+        if aic is not None and aic < best_aic:
+            best_aic = aic
+            best_order = order
+            best_seasonal_order = seasonal_order
+            best_params = params
+            best_mdl = results
+
+    if best_order is not None and best_mdl is None:
+        best_mdl = _build_sarimax(series, best_order, best_seasonal_order).smooth(best_params)
     return best_aic, best_order, best_seasonal_order, best_mdl
 
-def optimize_sarimax_models(df, selected_countries, variable, p_range, d_range, q_range, seasonal_period, start_year, end_year, enable_seasonality):
+def optimize_sarimax_two_phase(series, p_range, d_range, q_range, seasonal_period, enable_seasonality, top_k=5, fit_cache=None, fit_log=None, plan=None, fitted=None):
+    """
+    This function searches the same candidates as the grid search in two phases. Every candidate is first scored with a coarse fit
+    capped at COARSE_MAXITER optimiser iterations, and only the top_k candidates by approximate AIC are refitted to convergence,
+    starting from their coarse parameters. A candidate found in the fit cache during the first phase already has its converged
+    fit, so it is not fitted again, and the other candidates are not looked up again. The candidate with the lowest converged
+    AIC is selected.
+
+    Parameters:
+    - series (pandas.Series): The time series data to be modeled.
+    - p_range (list): A list of integers representing the range of p values to be tested.
+    - d_range (list): A list of integers representing the range of d values to be tested.
+    - q_range (list): A list of integers representing the range of q values to be tested.
+    - seasonal_period (int): The number of periods in a season.
+    - enable_seasonality (bool): A flag indicating whether to include seasonal components in the model.
+    - top_k (int): The number of candidates refined with a full fit. Default is 5.
+    - fit_cache (FitCache, optional): The on-disk cache of previous fits. Cached candidates are scored with their converged AIC. Default is None (no cache).
+    - fit_log (list, optional): A list to which one record per fit of either phase is appended. Default is None.
+    - plan (CandidatePlan, optional): The candidates to be searched. Default is None (planned from the ranges).
+    - fitted (dict, optional): A dictionary to which the (aic, params, param_names) of every refined candidate is recorded. Default is None.
+
+    Returns:
+    - best_aic (float): The lowest converged AIC value among the refined candidates.
+    - best_order (tuple): The (p, d, q) values that yield the lowest AIC.
+    - best_seasonal_order (tuple): The (P, D, Q, m) values that yield the lowest AIC.
+    - best_mdl (statsmodels.tsa.statespace.sarimax.SARIMAXResults): The SARIMAX model object with the best parameters.
+    """
+    if plan is None:
+        plan = plan_candidates(len(series), p_range, d_range, q_range, seasonal_period, enable_seasonality)
+
+    coarse = {}
+    for order, seasonal_order in plan.candidates:
+        aic, params, results = _fit_sarimax(series, order, seasonal_order, fit_cache, fit_log=fit_log, maxiter=COARSE_MAXITER)
+        if aic is not None and np.isfinite(aic):
+            coarse[(order, seasonal_order)] = (aic, params, results is None)
+
+    best_aic = np.inf
+    best_order = None
+    best_seasonal_order = None
+    best_params = None
+    best_mdl = None
+
+    for order, seasonal_order in sorted(coarse, key=lambda candidate: coarse[candidate][0])[:max(top_k, 1)]:
+        coarse_aic, coarse_params, cached = coarse[(order, seasonal_order)]
+        if cached:
+            aic, params, results = coarse_aic, coarse_params, None
+        else:
+            aic, params, results = _fit_sarimax(series, order, seasonal_order, fit_cache, coarse_params, fit_log, lookup=False)
+        if fitted is not None:
+            _record_fit(fitted, order, seasonal_order, aic, params, results)
+        if aic is not None and aic < best_aic:
+            best_aic = aic
+            best_order = order
+            best_seasonal_order = seasonal_order
+            best_params = params
+            best_mdl = results
+
+    if best_order is not None and best_mdl is None:
+        best_mdl = _build_sarimax(series, best_order, best_seasonal_order).smooth(best_params)
+    return best_aic, best_order, best_seasonal_order, best_mdl
+
+def _nearest(values, target):
+    """
+    Returns the allowed value closest to the target (the smaller one on ties).
+    """
+    return min(values, key=lambda value: (abs(value - target), value))
+
+def optimize_sarimax_stepwise(series, p_range, d_range, q_range, seasonal_period, enable_seasonality, fit_cache=None, warm_start=False, fit_log=None, plan=None, fitted=None):
+    """
+    This function searches the SARIMAX orders stepwise, in the style of the Hyndman-Khandakar algorithm.
+    It fits a few seed models and then repeatedly moves to the best neighbour of the current model
+    (one order changed by one step, or p and q / P and Q changed together) while the AIC improves.
+    Orders are restricted to the values of p_range, d_range and q_range and to 0/1 for P, D and Q,
+    so the result is always a candidate of the full grid search. Candidates left out of the plan are never fitted.
+
+    Parameters:
+    - series (pandas.Series): The time series data to be modeled.
+    - p_range (list): A list of integers representing the p values that may be visited.
+    - d_range (list): A list of integers representing the d values that may be visited.
+    - q_range (list): A list of integers representing the q values that may be visited.
+    - seasonal_period (int): The number of periods in a season.
+    - enable_seasonality (bool): A flag indicating whether to include seasonal components in the model.
+    - fit_cache (FitCache, optional): The on-disk cache of previous fits. Default is None (no cache).
+    - warm_start (bool): A flag indicating whether each candidate starts the optimiser from the parameters of its best fitted neighbour. Default is False.
+    - fit_log (list, optional): A list to which one record per candidate, with its optimiser iteration count, is appended. Default is None.
+    - plan (CandidatePlan, optional): The feasible candidates. Default is None (planned from the ranges).
+    - fitted (dict, optional): A dictionary to which the (aic, params, param_names) of every visited candidate is recorded. Default is None.
+
+    Returns:
+    - best_aic (float): The lowest AIC value obtained during the search.
+    - best_order (tuple): The (p, d, q) values that yield the lowest AIC.
+    - best_seasonal_order (tuple): The (P, D, Q, m) values that yield the lowest AIC.
+    - best_mdl (statsmodels.tsa.statespace.sarimax.SARIMAXResults): The SARIMAX model object with the best parameters.
+    """
+    if plan is None:
+        plan = plan_candidates(len(series), p_range, d_range, q_range, seasonal_period, enable_seasonality)
+    seasonal_values = [0, 1] if enable_seasonality else [0]
+    axes = [sorted(set(p_range)), sorted(set(d_range)), sorted(set(q_range)),
+            seasonal_values, seasonal_values, seasonal_values]
+    m = seasonal_period
+
+    warm_fits = {} if fitted is None else fitted
+    fitted = {}
+
+    def seasonal(candidate):
+        return candidate[3:] + (m,) if enable_seasonality else (0, 0, 0, 0)
+
+    def evaluate(candidate):
+        if candidate not in fitted:
+            order, seasonal_order = candidate[:3], seasonal(candidate)
+            if (order, seasonal_order) not in plan:
+                fitted[candidate] = (np.inf, None, None)
+                return np.inf
+            start_params = _warm_start_params(series, order, seasonal_order, warm_fits) if warm_start else None
+            aic, params, results = _fit_sarimax(series, order, seasonal_order, fit_cache, start_params, fit_log)
+            _record_fit(warm_fits, order, seasonal_order, aic, params, results)
+            fitted[candidate] = (aic if aic is not None else np.inf, params, results)
+        return fitted[candidate][0]
+
+    def snap(candidate):
+        return tuple(_nearest(values, target) for values, target in zip(axes, candidate))
+
+    def neighbours(candidate):
+        position = [values.index(value) for values, value in zip(axes, candidate)]
+        moves = [{i: step} for i in range(6) for step in (-1, 1)]
+        moves += [{0: step, 2: step} for step in (-1, 1)]
+        moves += [{3: step, 5: step} for step in (-1, 1)]
+        for move in moves:
+            new_position = list(position)
+            for i, step in move.items():
+                new_position[i] += step
+            if all(0 <= index < len(values) for index, values in zip(new_position, axes)):
+                yield tuple(values[index] for values, index in zip(axes, new_position))
+
+    seeds = []
+    for d in axes[1]:
+        for seed in [(2, d, 2, 1, 0, 1), (0, d, 0, 0, 0, 0), (1, d, 0, 1, 0, 0), (0, d, 1, 0, 0, 1)]:
+            seed = snap(seed)
+            if seed not in seeds:
+                seeds.append(seed)
+
+    current = min(seeds, key=evaluate)
+    improved = np.isfinite(fitted[current][0])
+    while improved:
+        improved = False
+        candidates = [candidate for candidate in neighbours(current) if candidate not in fitted]
+        if candidates:
+            best_neighbour = min(candidates, key=evaluate)
+            if fitted[best_neighbour][0] < fitted[current][0]:
+                current = best_neighbour
+                improved = True
+
+    best_aic, best_params, best_mdl = fitted[current]
+    if best_params is None:
+        return np.inf, None, None, None
+    if best_mdl is None:
+        best_mdl = _build_sarimax(series, current[:3], seasonal(current)).smooth(best_params)
+    return best_aic, current[:3], seasonal(current), best_mdl
+
+def search_settings(p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy="grid", warm_start=False, top_k=5, ensemble=False):
+    """
+    This function builds the settings of a SARIMAX order search, as kept on the model records it selects.
+
+    Parameters:
+    - p_range (list): The p values to be tested.
+    - d_range (list): The d values to be tested.
+    - q_range (list): The q values to be tested.
+    - seasonal_period (int): The number of periods in a season.
+    - enable_seasonality (bool): A flag indicating whether to include seasonal components in the model.
+    - search_strategy (str): The order search strategy, "grid", "stepwise" or "two_phase". Default is "grid".
+    - warm_start (bool): A flag indicating whether candidates are warm-started from their best fitted neighbour. Default is False.
+    - top_k (int): The number of candidates refined by the "two_phase" strategy and of members of the ensemble. Default is 5.
+    - ensemble (bool): A flag indicating whether the top_k candidates are kept as an ensemble. Default is False.
+
+    Returns:
+    - settings (dict): The keyword arguments of optimize_sarimax_country that define the search.
+    """
+    return {'p_range': list(p_range), 'd_range': list(d_range), 'q_range': list(q_range), 'seasonal_period': seasonal_period,
+            'enable_seasonality': enable_seasonality, 'search_strategy': search_strategy, 'warm_start': warm_start, 'top_k': top_k,
+            'ensemble': ensemble}
+
+def optimize_sarimax_country(data_series, p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy="grid", fit_cache=None, warm_start=False, top_k=5, plan=None, ensemble=False):
+    """
+    This function runs the SARIMAX order search for the series of a single country.
+
+    Parameters:
+    - data_series (pandas.Series): The time series data of the country.
+    - p_range (list): A list of integers representing the range of p values to be tested for the SARIMAX model.
+    - d_range (list): A list of integers representing the range of d values to be tested for the SARIMAX model.
+    - q_range (list): A list of integers representing the range of q values to be tested for the SARIMAX model.
+    - seasonal_period (int): The number of periods in a season.
+    - enable_seasonality (bool): A flag indicating whether to include seasonal components in the SARIMAX model.
+    - search_strategy (str): The order search strategy, "grid", "stepwise" or "two_phase". Default is "grid".
+    - fit_cache (FitCache, optional): The on-disk cache of previous fits. Default is None (no cache).
+    - warm_start (bool): A flag indicating whether candidates are warm-started from their best fitted neighbour. Default is False.
+    - top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy. Default is 5.
+    - plan (CandidatePlan, optional): The candidates to be searched. Default is None (planned from the ranges).
+    - ensemble (bool): A flag indicating whether the top_k converged candidates of the search are also kept as an AIC-weighted ensemble.
+      The ensemble reuses the fits of the search, so it adds no model fit. Default is False.
+
+    Returns:
+    - result (dict): A dictionary with the 'aic', 'order', 'seasonal_order', 'model_object' (a ModelRecord) and 'fit_log' keys,
+      or a dictionary with the 'error' key if the model optimization fails. 'fit_log' lists every candidate with its optimiser iteration count.
+      With ensemble set, the 'ensemble' key holds the EnsembleRecord of the search when at least two candidates converged.
+      The 'candidate_plan' key reports the number of planned fits and the removed candidates.
+      When a fit cache is given, the 'cache_stats' key holds the cache hits and misses of the search.
+    """
+    if plan is None:
+        plan = plan_candidates(len(data_series), p_range, d_range, q_range, seasonal_period, enable_seasonality)
+
+    fit_log = []
+    fitted = {}
+    try:
+        aic, order, seasonal_order, model = optimize_sarimax(data_series, p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy, fit_cache, warm_start, fit_log, top_k, plan, fitted)
+        if model is not None:
+            settings = search_settings(p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy, warm_start, top_k, ensemble)
+            result = {
+                'aic': aic, 
+                'order': order, 
+                'seasonal_order': seasonal_order, 
+                'model_object': ModelRecord("SARIMAX", data_series, order, model.params, aic, seasonal_order, fit_log, settings),
+                'fit_log': fit_log
+            }
+            ensemble_record = ensemble_from_fits("SARIMAX", data_series, fitted, top_k, fit_log, settings) if ensemble else None
+            if ensemble_record is not None:
+                result['ensemble'] = ensemble_record
+        else:
+            result = {'error': 'Model optimization failed.'}
+    except Exception as e:
+        result = {'error': str(e)}
+
+    result['candidate_plan'] = plan.describe()
+    if fit_cache is not None:
+        result['cache_stats'] = fit_cache.stats()
+    return result
+
+def iter_optimize_sarimax_models(df, selected_countries, variable, p_range, d_range, q_range, seasonal_period, start_year, end_year, enable_seasonality, search_strategy="grid", n_jobs=1, fit_cache=None, warm_start=False, top_k=5, ensemble=False):
+    """
+    This function optimizes SARIMAX models for multiple countries and yields the result of each country as soon as it is done.
+    The countries are modelled concurrently on a bounded pool of n_jobs worker processes. The candidates of every country are
+    planned up front, and a country without any feasible candidate is reported without being sent to the pool.
+
+    Parameters:
+    - df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
+    - selected_countries (list): A list of country names for which the models will be optimized.
+    - variable (str): The name of the variable (column) in the DataFrame to be modeled.
+    - p_range (list): A list of integers representing the range of p values to be tested for the SARIMAX model.
+    - d_range (list): A list of integers representing the range of d values to be tested for the SARIMAX model.
+    - q_range (list): A list of integers representing the range of q values to be tested for the SARIMAX model.
+    - seasonal_period (int): The number of periods in a season.
+    - start_year (int): The starting year for the time series data.
+    - end_year (int): The ending year for the time series data.
+    - enable_seasonality (bool): A flag indicating whether to include seasonal components in the SARIMAX model.
+    - search_strategy (str): The order search strategy, "grid", "stepwise" or "two_phase". Default is "grid".
+    - n_jobs (int): The number of worker processes. 1 runs serially and None or 0 uses every CPU core. Default is 1.
+    - fit_cache (FitCache, optional): The on-disk cache of previous fits. Its hit and miss counters are updated as results arrive. Default is None (no cache).
+    - warm_start (bool): A flag indicating whether candidates are warm-started from their best fitted neighbour. Default is False.
+    - top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy, and of members of the ensemble. Default is 5.
+    - ensemble (bool): A flag indicating whether the top_k candidates of each search are also kept as an AIC-weighted ensemble. Default is False.
+
+    Yields:
+    - (country, result) (tuple): The country name and the dictionary returned by optimize_sarimax_country.
+    """
+    dataset = as_dataset(df)
+    tasks = {}
+
+    for country in selected_countries:
+        data_series = dataset.series(country, variable, start_year, end_year)
+
+        plan = plan_candidates(len(data_series), p_range, d_range, q_range, seasonal_period, enable_seasonality)
+        if not plan.candidates:
+            yield country, {'error': 'Insufficient data for modeling.', 'candidate_plan': plan.describe()}
+            continue
+
+        tasks[country] = (data_series, p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy,
+                          fit_cache.worker_copy() if fit_cache is not None else None, warm_start, top_k, plan, ensemble)
+
+    for country, result in run_tasks(optimize_sarimax_country, tasks, n_jobs):
+        if fit_cache is not None:
+            fit_cache.merge_stats(result.pop('cache_stats'))
+        yield country, result
+
+def optimize_sarimax_models(df, selected_countries, variable, p_range, d_range, q_range, seasonal_period, start_year, end_year, enable_seasonality, search_strategy="grid", n_jobs=1, fit_cache=None, warm_start=False, top_k=5, ensemble=False):
     """
     This function optimizes SARIMAX models for multiple countries based on given parameters and time series data.
 
     Parameters:
-    - df (pandas.DataFrame): The DataFrame containing the time series data.
+    - df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
     - selected_countries (list): A list of country names for which the models will be optimized.
     - variable (str): The name of the variable (column) in the DataFrame to be modeled.
     - p_range (list): A list of integers representing the range of p values to be tested for the SARIMAX model.
@@ -66,6 +477,12 @@ def optimize_sarimax_models(df, selected_countries, variable, p_range, d_range,
     - start_year (int): The starting year for the time series data.
     - end_year (int): The ending year for the time series data.
     - enable_seasonality (bool): A flag indicating whether to include seasonal components in the SARIMAX model.
+    - search_strategy (str): The order search strategy, "grid", "stepwise" or "two_phase". Default is "grid".
+    - n_jobs (int): The number of worker processes used to model the countries concurrently. Default is 1 (serial).
+    - fit_cache (FitCache, optional): The on-disk cache of previous fits, reused across runs and sessions. Default is None (no cache).
+    - warm_start (bool): A flag indicating whether candidates are warm-started from their best fitted neighbour. Default is False.
+    - top_k (int): The number of candidates refined with a full fit by the "two_phase" strategy, and of members of the ensemble. Default is 5.
+    - ensemble (bool): A flag indicating whether the top_k candidates of each search are also kept as an AIC-weighted ensemble. Default is False.
 
     Returns:
     - sarimax_results (dict): A dictionary containing the results of the SARIMAX model optimization for each country.
@@ -73,52 +490,29 @@ def optimize_sarimax_models(df, selected_countries, variable, p_range, d_range,
       - 'aic': The Akaike Information Criterion (AIC) value of the optimized model.
       - 'order': The optimal (p, d, q) values for the SARIMAX model.
       - 'seasonal_order': The optimal (P, D, Q, m) values for the SARIMAX model.
-      - 'model_summary': The summary of the optimized SARIMAX model.
-      - 'model_object': The optimized SARIMAX model object.
+      - 'model_object': The ModelRecord of the optimized SARIMAX model, which builds its summary on demand.
+      - 'fit_log': One record per fitted candidate, with its optimiser iteration count.
+      - 'ensemble': The EnsembleRecord of the top_k candidates, when ensemble is set and at least two candidates converged.
       If the model optimization fails or there is insufficient data for modeling, the value for the country will be a dictionary with the 'error' key.
     """    
-    sarimax_results = {}
-
-    for country in selected_countries:
-        data_series = df[(df['Country'] == country) & 
-                         (df['Date'] >= start_year) & 
-                         (df['Date'] <= end_year) & 
-                         (df[variable].notna())][variable]
-
-        if data_series.empty or len(data_series) < max(p_range) + max(d_range) + max(q_range) + 1:
-            sarimax_results[country] = {'error': 'Insufficient data for modeling.'}
-            continue
+    sarimax_results = dict(iter_optimize_sarimax_models(df, selected_countries, variable, p_range, d_range, q_range, seasonal_period, start_year, end_year, enable_seasonality, search_strategy, n_jobs, fit_cache, warm_start, top_k, ensemble))
+    return {country: sarimax_results[country] for country in selected_countries if country in sarimax_results}
 
-        try:
-            aic, order, seasonal_order, model = optimize_sarimax(data_series, p_range, d_range, q_range, seasonal_period, enable_seasonality)
-            if model is not None:
-                sarimax_results[country] = {
-                    'aic': aic, 
-                    'order': order, 
-                    'seasonal_order': seasonal_order, 
-                    'model_summary': model.summary(),
-                    'model_object': model
-                }
-            else:
-                sarimax_results[country] = {'error': 'Model optimization failed.'}
-        except Exception as e:
-            sarimax_results[country] = {'error': str(e)}
-
-    return sarimax_results
-
-def forecast_future(sarimax_results, df, variable, start_year, forecast_until_year=2100, replace_negative_forecast=False, sigma=2):
+def forecast_future(sarimax_results, df, variable, start_year, forecast_until_year=2100, replace_negative_forecast=False, sigma=2, observations=None):
     """
     This function forecasts future values for a given variable using SARIMAX models.
 
     Parameters:
     - sarimax_results (dict): A dictionary containing the results of the SARIMAX model optimization for each country.
-      The keys are country names, and the values are dictionaries with the 'model_object' key.
-    - df (pandas.DataFrame): The DataFrame containing the time series data.
+      The keys are country names, and the values are dictionaries with the 'model_object' key and, optionally, the 'ensemble' key.
+    - df (pandas.DataFrame, DatasetStore or MatrixStore): The DataFrame containing the time series data.
     - variable (str): The name of the variable (column) in the DataFrame to be forecasted.
     - start_year (int): The starting year for the time series data.
     - forecast_until_year (int): The year until which the forecasts will be made. Default is 2100.
     - replace_negative_forecast (bool): A flag indicating whether to replace negative forecast values with zero. Default is False.
     - sigma (float): The confidence interval for the forecasts. Default is 2.
+    - observations (dict, optional): The (last year, last value) pair of each country, as returned by forecasting.last_observations.
+      Passing it avoids scanning the data again when countries are forecast one at a time. Default is None (computed here in one pass).
 
     Returns:
     - forecast_results (dict): A dictionary containing the forecasted values and their confidence intervals for each country.
@@ -131,43 +525,47 @@ def forecast_future(sarimax_results, df, variable, start_year, forecast_until_ye
       - 'order': The order of the SARIMAX model.
       - 'seasonal_order': The seasonal order of the SARIMAX model.
       - 'forecast_until_year': The year until which the forecasts were made.
+      - 'model_object': The ModelRecord the forecasts were made with.
+      A country with an ensemble also gets the forecast of its ensemble, next to the forecast of its best model, under the key
+      "{country} ({forecast_until_year}) - SARIMAX ensemble ({number of members})", with the model 'SARX-E' and the EnsembleRecord
+      as 'model_object'. Its 'order' and 'seasonal_order' are those of the best member.
     """    
-    forecast_results = {}
-
-    for country, result in sarimax_results.items():
-        if 'model_object' in result:
-            filtered_data = df[(df['Country'] == country) & (df['Date'] >= start_year)]
-            filtered_data = filtered_data.sort_values('Date')  
-            last_data_year = filtered_data['Date'].max()
+    models = {country: result['model_object'] for country, result in sarimax_results.items() if 'model_object' in result}
+    ensembles = {country: sarimax_results[country]['ensemble'] for country in models if 'ensemble' in sarimax_results[country]}
+    if observations is None:
+        observations = last_observations(df, variable, start_year, models)
+    forecasts = forecast_models(models, observations, forecast_until_year, replace_negative_forecast, sigma)
+    ensemble_forecasts = forecast_models(ensembles, observations, forecast_until_year, replace_negative_forecast, sigma)
 
-            if pd.isnull(last_data_year) or not isinstance(last_data_year, (int, np.integer)):
-                raise ValueError(f"The last year of the filtered data is invalid: {last_data_year}")
-
-            forecast_years = pd.date_range(start=pd.to_datetime(str(int(last_data_year) + 1)), end=pd.to_datetime(str(forecast_until_year + 1)), freq='YE').year
-            steps_to_forecast_until = len(forecast_years)
-            model = result['model_object']
-            forecast = model.get_forecast(steps=steps_to_forecast_until)
-            forecast_values = forecast.predicted_mean
-            forecast_ci = forecast.conf_int(alpha=1 - (sigma/2))
-            forecast_ci.columns = ['mean_ci_lower', 'mean_ci_upper']
-            forecast_values.index = forecast_years
-            forecast_ci.index = forecast_years
-
-            last_value = filtered_data.iloc[-1][variable]
-            forecast_values.iloc[0] = last_value
-
-            if replace_negative_forecast:
-                forecast_values[forecast_values < 0] = 0
+    forecast_results = {}
+    for country, model in models.items():
+        forecast_values, forecast_ci = forecasts[country]
+        result = sarimax_results[country]
+        forecast_key = f"{country} ({forecast_until_year}) - SARIMAX {result['order']} ({result['seasonal_order'][3]})"
+        forecast_results[forecast_key] = {
+            'forecast_values': forecast_values,
+            'forecast_ci': forecast_ci,
+            'country': country,
+            'model': 'SARX',
+            'order': result['order'],
+            'seasonal_order': result['seasonal_order'],
+            'forecast_until_year': forecast_until_year,
+            'model_object': model
+        }
 
-            forecast_key = f"{country} ({forecast_until_year}) - SARIMAX {result['order']} ({result['seasonal_order'][3]})"
+        if country in ensembles:
+            ensemble = ensembles[country]
+            forecast_values, forecast_ci = ensemble_forecasts[country]
+            forecast_key = f"{country} ({forecast_until_year}) - SARIMAX ensemble ({len(ensemble.members)})"
             forecast_results[forecast_key] = {
                 'forecast_values': forecast_values,
                 'forecast_ci': forecast_ci,
                 'country': country,
-                'model': 'SARX',
-                'order': result['order'],
-                'seasonal_order': result['seasonal_order'],
-                'forecast_until_year': forecast_until_year
+                'model': 'SARX-E',
+                'order': ensemble.order,
+                'seasonal_order': ensemble.seasonal_order,
+                'forecast_until_year': forecast_until_year,
+                'model_object': ensemble
             }
 
     return forecast_results
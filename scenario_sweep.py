@@ -0,0 +1,125 @@
+from itertools import product
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from forecasting import forecast_horizon
+from corrections import correct_matrix
+
+def scenario_grid(sigmas=(2,), forecast_until_years=(2100,), replace_negative_forecast=(False,), corrections=(None,)):
+    """
+    This function builds every combination of a set of forecast settings.
+
+    Parameters:
+    sigmas (iterable, optional): The confidence interval multipliers, as in forecast_future. Default is (2,).
+    forecast_until_years (iterable, optional): The years until which the forecasts are made. Default is (2100,).
+    replace_negative_forecast (iterable, optional): The settings of the replacement of negative values with zero. Default is (False,).
+    corrections (iterable, optional): The corrections, each None (no correction) or a dictionary with the 'anchors' ((year, value)
+                                      pairs sorted by year, see corrections.parse_anchors) and optionally the 'start_year' and the
+                                      'continuous', 'short' and 'start' flags of corrections.correct_matrix. Default is (None,).
+
+    Returns:
+    list: One scenario dictionary per combination, with the keys 'sigma', 'forecast_until_year', 'replace_negative_forecast' and 'correction'.
+    """
+    return [{'sigma': sigma, 'forecast_until_year': int(forecast_until_year), 'replace_negative_forecast': bool(replace_negative), 'correction': correction}
+            for sigma, forecast_until_year, replace_negative, correction in product(sigmas, forecast_until_years, replace_negative_forecast, corrections)]
+
+def scenario_label(scenario):
+    """
+    Returns a short label of a scenario, e.g. "sigma 1.96, until 2050, no negatives, targets 2030: 100; 2050: 300".
+    """
+    label = f"sigma {scenario['sigma']:g}, until {scenario['forecast_until_year']}"
+    if scenario['replace_negative_forecast']:
+        label += ", no negatives"
+    correction = scenario.get('correction')
+    if correction:
+        label += ", targets " + "; ".join(f"{year}: {value:g}" for year, value in correction['anchors'])
+        if correction.get('start_year') is not None:
+            label += f" from {correction['start_year']}"
+        for flag in ('continuous', 'short', 'start'):
+            if correction.get(flag):
+                label += f" ({flag})"
+    return label
+
+def sweep_scenarios(forecast_results, forecast_keys, observations, scenarios):
+    """
+    This function forecasts a set of fitted models under every scenario of a grid, without fitting or forecasting any model again per scenario.
+
+    Each model is forecast once, to the last year of any scenario. The forecasts that share their last observed year are
+    stacked, and every scenario is then derived from the stack with array operations: the confidence intervals are scaled
+    to its sigma, the first year is anchored on the last observed value, negative values are replaced with zero if asked,
+    the horizon is cut at its forecast year and its correction is applied to every forecast at once. The results match
+    those of forecast_future followed by corrections.apply_correction with the same settings.
+
+    Parameters:
+    forecast_results (dict): The forecast results (e.g. a ForecastStore). Each entry needs its 'country' and 'model_object'.
+    forecast_keys (list): The keys of the forecasts whose models are swept. Entries without a model are skipped.
+    observations (dict): The (last year, last value) pair of each country, as returned by forecasting.last_observations.
+    scenarios (list): The scenarios, as built by scenario_grid.
+
+    Returns:
+    pandas.DataFrame: The long table of every forecast under every scenario, with the columns 'Scenario' (its label),
+                      'Forecast' (the forecast key), 'Country', 'Date', 'Value', 'Lower' and 'Upper', followed by the settings
+                      'Sigma', 'Forecast Until Year', 'Replace Negative' and 'Corrected' (whether the correction could be applied).
+    """
+    columns = ['Scenario', 'Forecast', 'Country', 'Date', 'Value', 'Lower', 'Upper', 'Sigma', 'Forecast Until Year', 'Replace Negative', 'Corrected']
+    entries = {forecast_key: forecast_results[forecast_key] for forecast_key in forecast_keys}
+    models = {forecast_key: entry['model_object'] for forecast_key, entry in entries.items()
+              if entry.get('model_object') is not None and entry['country'] in observations}
+    countries = {forecast_key: entries[forecast_key]['country'] for forecast_key in models}
+    if not models or not scenarios:
+        return pd.DataFrame(columns=columns)
+
+    last_until = max(scenario['forecast_until_year'] for scenario in scenarios)
+    by_horizon = {}
+    for forecast_key in models:
+        last_data_year = int(observations[countries[forecast_key]][0])
+        by_horizon.setdefault(last_data_year, []).append(forecast_key)
+
+    stacks = []
+    for last_data_year, keys in by_horizon.items():
+        years = np.asarray(forecast_horizon(last_data_year, last_until), dtype=np.int64)
+        steps = len(years)
+        predictions = [models[forecast_key].get_forecast(steps=steps) for forecast_key in keys]
+        means = np.array([np.asarray(prediction.predicted_mean, dtype=np.float64) for prediction in predictions]).reshape(len(keys), steps)
+        scales = np.sqrt(np.array([np.asarray(prediction.var_pred_mean, dtype=np.float64) for prediction in predictions]).reshape(len(keys), steps))
+        last_values = np.array([observations[countries[forecast_key]][1] for forecast_key in keys], dtype=np.float64)
+        stacks.append((keys, years, means, scales, last_values))
+
+    tables = []
+    for scenario in scenarios:
+        label = scenario_label(scenario)
+        alpha = 1 - (scenario['sigma'] / 2)
+        q = norm.ppf(1 - alpha / 2)
+        correction = scenario.get('correction')
+        for keys, years, means, scales, last_values in stacks:
+            horizon = years <= scenario['forecast_until_year']
+            scenario_years = years[horizon]
+            values = means[:, horizon].copy()
+            lower = values - q * scales[:, horizon]
+            upper = values + q * scales[:, horizon]
+            if len(scenario_years):
+                values[:, 0] = last_values
+            if scenario['replace_negative_forecast']:
+                values[values < 0] = 0
+
+            corrected = np.zeros(len(keys), dtype=bool)
+            if correction:
+                corrected_values, corrected = correct_matrix(scenario_years, values.T, correction['anchors'], correction.get('start_year'),
+                                                             correction.get('continuous', False), correction.get('short', False), correction.get('start', False))
+                values = corrected_values.T
+
+            n_years = len(scenario_years)
+            tables.append(pd.DataFrame({
+                'Scenario': label,
+                'Forecast': np.repeat(keys, n_years),
+                'Country': np.repeat([countries[forecast_key] for forecast_key in keys], n_years),
+                'Date': np.tile(scenario_years, len(keys)),
+                'Value': values.ravel(),
+                'Lower': lower.ravel(),
+                'Upper': upper.ravel(),
+                'Sigma': scenario['sigma'],
+                'Forecast Until Year': scenario['forecast_until_year'],
+                'Replace Negative': scenario['replace_negative_forecast'],
+                'Corrected': np.repeat(corrected, n_years)
+            }))
+    return pd.concat(tables, ignore_index=True)[columns]
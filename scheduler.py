@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def resolve_workers(n_jobs):
+    """
+    This function resolves the requested number of worker processes.
+
+    Parameters:
+    n_jobs (int): The requested number of workers. None, 0 or a negative value means one worker per CPU core.
+
+    Returns:
+    int: The number of worker processes to use (at least 1).
+    """
+    if n_jobs is None or n_jobs <= 0:
+        return os.cpu_count() or 1
+    return n_jobs
+
+def run_tasks(func, tasks, max_workers=1):
+    """
+    This function runs a function over a set of independent tasks on a bounded process pool and yields
+    every result as soon as it is done, so callers can report progress before the slowest task finishes.
+
+    Parameters:
+    func (callable): A picklable, module-level function to be called for each task.
+    tasks (dict): A dictionary mapping a task key (e.g. a country name) to the tuple of positional arguments for func.
+    max_workers (int): The maximum number of worker processes. 1 runs the tasks serially in the calling process
+                       and None or 0 uses every CPU core. Default is 1.
+
+    Yields:
+    tuple: A (key, result) pair for each task, in completion order.
+    """
+    workers = min(resolve_workers(max_workers), len(tasks))
+    if workers <= 1:
+        for key, args in tasks.items():
+            yield key, func(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(func, *args): key for key, args in tasks.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -78,25 +78,53 @@ class SidePanelWindow(QWidget):
         self.enable_seasonality_checkbox.setChecked(True)
         self.layout.addWidget(self.enable_seasonality_checkbox, 6, 0, 1, 3)
 
+        self.search_strategy_label = QLabel("Search :")
+        self.layout.addWidget(self.search_strategy_label, 7, 0)
+        self.search_strategy_combo = QComboBox()
+        self.search_strategy_combo.addItems(["Grid", "Stepwise", "Two-Phase"])
+        self.layout.addWidget(self.search_strategy_combo, 7, 1, 1, 2)
+
+        self.top_k_label = QLabel("Top-k :")
+        self.layout.addWidget(self.top_k_label, 8, 0)
+        self.top_k_input = QLineEdit("5")
+        self.layout.addWidget(self.top_k_input, 8, 1, 1, 2)
+
+        self.backend_label = QLabel("Backend :")
+        self.layout.addWidget(self.backend_label, 9, 0)
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItems(["Statsmodels", "Batch"])
+        self.layout.addWidget(self.backend_combo, 9, 1, 1, 2)
+
+        self.warm_start_checkbox = QCheckBox("Warm Start")
+        self.layout.addWidget(self.warm_start_checkbox, 10, 0, 1, 3)
+
+        self.ensemble_checkbox = QCheckBox("AIC-Weighted Ensemble of the Top-k")
+        self.layout.addWidget(self.ensemble_checkbox, 11, 0, 1, 3)
+
+        self.workers_label = QLabel("Workers :")
+        self.layout.addWidget(self.workers_label, 12, 0)
+        self.workers_input = QLineEdit("1")
+        self.layout.addWidget(self.workers_input, 12, 1, 1, 2)
+
         self.forecast_until_label = QLabel("Forecast Year:")
-        self.layout.addWidget(self.forecast_until_label, 7, 0)
+        self.layout.addWidget(self.forecast_until_label, 13, 0)
         self.forecast_until_input = QLineEdit("2100")
-        self.layout.addWidget(self.forecast_until_input, 7, 1, 1, 2)
+        self.layout.addWidget(self.forecast_until_input, 13, 1, 1, 2)
         
         self.sigma_label = QLabel("Sigma for Confidence Interval:")
-        self.layout.addWidget(self.sigma_label, 8, 0)
+        self.layout.addWidget(self.sigma_label, 14, 0)
         self.sigma_input = QLineEdit("1.96")
-        self.layout.addWidget(self.sigma_input, 8, 1, 1, 2)
+        self.layout.addWidget(self.sigma_input, 14, 1, 1, 2)
 
         self.replace_negative_forecast_checkbox = QCheckBox("No Negative Values")
-        self.layout.addWidget(self.replace_negative_forecast_checkbox, 9, 0, 1, 3)
+        self.layout.addWidget(self.replace_negative_forecast_checkbox, 15, 0, 1, 3)
 
         self.show_confidence_interval_checkbox = QCheckBox("Show Confidence Interval")
-        self.layout.addWidget(self.show_confidence_interval_checkbox, 10, 0, 1, 3)
+        self.layout.addWidget(self.show_confidence_interval_checkbox, 16, 0, 1, 3)
 
         self.apply_button = QPushButton("Apply Settings")
         self.apply_button.clicked.connect(self.apply_model)
-        self.layout.addWidget(self.apply_button, 11, 0, 1, 3)
+        self.layout.addWidget(self.apply_button, 17, 0, 1, 3)
 
     def init_plot_settings_ui(self):
         """
@@ -202,6 +230,16 @@ class SidePanelWindow(QWidget):
         self.seasonal_period_label.setVisible(self.model_combo.currentText() == "SARIMAX")
         self.seasonal_period_input.setVisible(self.model_combo.currentText() == "SARIMAX")
         self.enable_seasonality_checkbox.setVisible(self.model_combo.currentText() == "SARIMAX")
+        self.search_strategy_label.setVisible(True)
+        self.search_strategy_combo.setVisible(True)
+        self.top_k_label.setVisible(True)
+        self.top_k_input.setVisible(True)
+        self.backend_label.setVisible(self.model_combo.currentText() == "ARIMA")
+        self.backend_combo.setVisible(self.model_combo.currentText() == "ARIMA")
+        self.warm_start_checkbox.setVisible(self.model_combo.currentText() == "SARIMAX")
+        self.ensemble_checkbox.setVisible(self.model_combo.currentText() == "SARIMAX")
+        self.workers_label.setVisible(True)
+        self.workers_input.setVisible(True)
         self.forecast_until_label.setVisible(True)
         self.forecast_until_input.setVisible(True)
         self.replace_negative_forecast_checkbox.setVisible(True)
@@ -277,6 +315,16 @@ class SidePanelWindow(QWidget):
         self.seasonal_period_label.setVisible(False)
         self.seasonal_period_input.setVisible(False)
         self.enable_seasonality_checkbox.setVisible(False)
+        self.search_strategy_label.setVisible(False)
+        self.search_strategy_combo.setVisible(False)
+        self.top_k_label.setVisible(False)
+        self.top_k_input.setVisible(False)
+        self.backend_label.setVisible(False)
+        self.backend_combo.setVisible(False)
+        self.warm_start_checkbox.setVisible(False)
+        self.ensemble_checkbox.setVisible(False)
+        self.workers_label.setVisible(False)
+        self.workers_input.setVisible(False)
         self.forecast_until_label.setVisible(False)
         self.forecast_until_input.setVisible(False)
         self.replace_negative_forecast_checkbox.setVisible(False)
@@ -351,6 +399,19 @@ class SidePanelWindow(QWidget):
         self.seasonal_period_label.setVisible(is_sarimax)
         self.seasonal_period_input.setVisible(is_sarimax)
         self.enable_seasonality_checkbox.setVisible(is_sarimax)
+        self.search_strategy_label.setVisible(True)
+        self.search_strategy_combo.setVisible(True)
+        self.top_k_label.setVisible(True)
+        self.top_k_input.setVisible(True)
+        self.backend_label.setVisible(not is_sarimax)
+        self.backend_combo.setVisible(not is_sarimax)
+
+        search_strategy = self.search_strategy_combo.currentText()
+        self.search_strategy_combo.clear()
+        self.search_strategy_combo.addItems(["Grid", "Stepwise", "Two-Phase"] if is_sarimax else ["Grid", "Two-Phase"])
+        self.search_strategy_combo.setCurrentText(search_strategy)
+        self.warm_start_checkbox.setVisible(is_sarimax)
+        self.ensemble_checkbox.setVisible(is_sarimax)
         self.forecast_until_label.setVisible(True)
         self.forecast_until_input.setVisible(True)
         self.replace_negative_forecast_checkbox.setVisible(True)
@@ -384,6 +445,11 @@ class SidePanelWindow(QWidget):
         - q_range (list): The range of q values for the SARIMAX model.
         - seasonal_period (int): The seasonal period for the SARIMAX model.
         - enable_seasonality (bool): A flag indicating whether to enable seasonality in the SARIMAX model.
+        - search_strategy (str): The order search strategy ("grid", "stepwise" or "two_phase").
+        - n_jobs (int): The number of worker processes used to model the countries concurrently.
+        - warm_start (bool): A flag indicating whether candidates are warm-started from their best fitted neighbour.
+        - top_k (int): The number of candidates refined with a full fit by the two-phase search, and of members of the ensemble.
+        - ensemble (bool): A flag indicating whether the top-k candidates are also forecast as an AIC-weighted ensemble.
 
         Returns:
         - None
@@ -394,13 +460,18 @@ class SidePanelWindow(QWidget):
         
         seasonal_period = int(self.seasonal_period_input.text()) if self.seasonal_period_input.text() else 11
         enable_seasonality = self.enable_seasonality_checkbox.isChecked()
+        search_strategy = self.get_search_strategy()
+        n_jobs = self.get_workers()
+        warm_start = self.warm_start_checkbox.isChecked()
+        top_k = self.get_top_k()
+        ensemble = self.ensemble_checkbox.isChecked()
 
         forecast_until_year = int(self.forecast_until_input.text()) if self.forecast_until_input.text() else 2100
         self.main_window.forecast_until_year = forecast_until_year
 
         self.main_window.replace_negative_forecast = self.replace_negative_forecast_checkbox.isChecked()
 
-        self.main_window.run_sarimax(p_range, d_range, q_range, seasonal_period, enable_seasonality)
+        self.main_window.run_sarimax(p_range, d_range, q_range, seasonal_period, enable_seasonality, search_strategy, n_jobs, warm_start, top_k, ensemble)
 
     def apply_arima(self):
         """
@@ -410,6 +481,10 @@ class SidePanelWindow(QWidget):
         - p_range (list): The range of p values for the ARIMA model.
         - d_range (list): The range of d values for the ARIMA model.
         - q_range (list): The range of q values for the ARIMA model.
+        - n_jobs (int): The number of worker processes used for the order search.
+        - search_strategy (str): The order search strategy ("grid" or "two_phase").
+        - top_k (int): The number of candidates refined with a full fit by the two-phase search.
+        - backend (str): The fitting backend ("statsmodels" or "batch").
 
         Returns:
         - None
@@ -417,13 +492,55 @@ class SidePanelWindow(QWidget):
         p_range = self.get_range(self.p_range_input.text(), [0, 2])
         d_range = self.get_range(self.d_range_input.text(), [0, 2])
         q_range = self.get_range(self.q_range_input.text(), [0, 2])
+        n_jobs = self.get_workers()
+        search_strategy = self.get_search_strategy()
+        top_k = self.get_top_k()
+        backend = self.backend_combo.currentText().lower()
 
         forecast_until_year = int(self.forecast_until_input.text()) if self.forecast_until_input.text() else 2100
         self.main_window.forecast_until_year = forecast_until_year
 
         self.main_window.replace_negative_forecast = self.replace_negative_forecast_checkbox.isChecked()
 
-        self.main_window.run_arima(p_range, d_range, q_range)
+        self.main_window.run_arima(p_range, d_range, q_range, n_jobs, search_strategy, top_k, backend)
+
+    def get_workers(self):
+        """
+        Parses the worker count input.
+
+        Parameters:
+        None
+
+        Returns:
+        int: The number of worker processes. 1 (serial) if the input is empty or invalid, 0 to use every CPU core.
+        """
+        text = self.workers_input.text()
+        try:
+            return max(int(text), 0) if text else 1
+        except ValueError:
+            return 1
+
+    def get_search_strategy(self):
+        """
+        Returns the selected order search strategy as expected by the model modules, e.g. "two_phase" for "Two-Phase".
+        """
+        return self.search_strategy_combo.currentText().lower().replace("-", "_")
+
+    def get_top_k(self):
+        """
+        Parses the top-k input of the two-phase search.
+
+        Parameters:
+        None
+
+        Returns:
+        int: The number of candidates refined with a full fit. 5 if the input is empty or invalid.
+        """
+        text = self.top_k_input.text()
+        try:
+            return max(int(text), 1) if text else 5
+        except ValueError:
+            return 5
 
     def get_range(self, text, default):
         """
@@ -518,33 +635,33 @@ class SidePanelWindow(QWidget):
         Returns:
         - None
         """
-        self.target_year_label = QLabel("Target Year:")
-        self.layout.addWidget(self.target_year_label, 12, 0)
+        self.target_year_label = QLabel("Target Year(s):")
+        self.layout.addWidget(self.target_year_label, 18, 0)
         self.target_year_input = QLineEdit("")
-        self.layout.addWidget(self.target_year_input, 12, 1, 1, 2)
+        self.layout.addWidget(self.target_year_input, 18, 1, 1, 2)
 
         self.start_target_year_label = QLabel("Start Target Year:")
-        self.layout.addWidget(self.start_target_year_label, 13, 0)
+        self.layout.addWidget(self.start_target_year_label, 19, 0)
         self.start_target_year_input = QLineEdit("")
-        self.layout.addWidget(self.start_target_year_input, 13, 1, 1, 2)
+        self.layout.addWidget(self.start_target_year_input, 19, 1, 1, 2)
 
-        self.target_value_label = QLabel("Target Value:")
-        self.layout.addWidget(self.target_value_label, 14, 0)
+        self.target_value_label = QLabel("Target Value(s):")
+        self.layout.addWidget(self.target_value_label, 20, 0)
         self.target_value_input = QLineEdit("")
-        self.layout.addWidget(self.target_value_input, 14, 1, 1, 2)
+        self.layout.addWidget(self.target_value_input, 20, 1, 1, 2)
 
         self.continuous_correction_checkbox = QCheckBox("Continuous Correction")
-        self.layout.addWidget(self.continuous_correction_checkbox, 15, 0, 1, 3)
+        self.layout.addWidget(self.continuous_correction_checkbox, 21, 0, 1, 3)
 
         self.short_correction_checkbox = QCheckBox("Short Correction")
-        self.layout.addWidget(self.short_correction_checkbox, 16, 0, 1, 3)
+        self.layout.addWidget(self.short_correction_checkbox, 22, 0, 1, 3)
 
         self.start_correction_checkbox = QCheckBox("Start Correction")
-        self.layout.addWidget(self.start_correction_checkbox, 17, 0, 1, 3)
+        self.layout.addWidget(self.start_correction_checkbox, 23, 0, 1, 3)
 
         self.apply_correction_button = QPushButton("Apply Correction")
         self.apply_correction_button.clicked.connect(self.main_window.apply_forecast_corrections)
-        self.layout.addWidget(self.apply_correction_button, 18, 0, 1, 3)
+        self.layout.addWidget(self.apply_correction_button, 24, 0, 1, 3)
 
     def init_line_settings_ui(self):
         """
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+from scheduler import run_tasks
+from forecasting import forecast_horizon
+from ensemble import EnsembleRecord
+
+PERCENTILES = (5, 25, 50, 75, 95)
+REPETITIONS = 5000
+CHUNK_SIZE = 500
+HISTOGRAM_BINS = 2000
+HISTOGRAM_WIDTH = 8
+
+def _factor(covariance):
+    """
+    Returns a matrix L with L @ L.T equal to the (possibly singular) covariance matrix.
+    """
+    values, vectors = np.linalg.eigh((covariance + covariance.T) / 2)
+    return vectors * np.sqrt(np.clip(values, 0, None))
+
+class StreamingPercentiles:
+
+    def __init__(self, centers, scales, bins=HISTOGRAM_BINS, width=HISTOGRAM_WIDTH):
+        """
+        Initialize a bounded-memory percentile estimator for a set of simulated paths.
+
+        The paths are added in chunks and only a histogram of their values at each step is kept, so the memory does not grow
+        with the number of paths. The histogram of each step covers its center plus or minus width times its scale; the values
+        outside it are counted in two overflow bins that extend to the smallest and largest value seen. Percentiles are
+        interpolated within their bin, so their error is at most one bin (2 * width * scale / bins).
+
+        Parameters:
+        centers (array-like): The expected value at each step, e.g. the analytic forecast.
+        scales (array-like): The spread of the values at each step, e.g. the analytic forecast standard deviation.
+        bins (int, optional): The number of histogram bins per step. Default is 2000.
+        width (float, optional): The half-width of the histogram range, in scales. Default is 8.
+
+        Returns:
+        None
+        """
+        centers = np.asarray(centers, dtype=np.float64)
+        scales = np.asarray(scales, dtype=np.float64)
+        half_range = np.maximum(width * np.nan_to_num(scales), 1e-9 * np.maximum(1, np.abs(centers)))
+        self.bins = bins
+        self.lower = centers - half_range
+        self.bin_width = 2 * half_range / bins
+        self.counts = np.zeros((len(centers), bins + 2), dtype=np.int64)
+        self.minimum = np.full(len(centers), np.inf)
+        self.maximum = np.full(len(centers), -np.inf)
+        self.count = 0
+
+    def update(self, paths):
+        """
+        Adds a chunk of paths to the histograms.
+
+        Parameters:
+        paths (numpy.ndarray): The simulated values, with one row per step and one column per path.
+
+        Returns:
+        None
+        """
+        steps, repetitions = paths.shape
+        positions = np.floor((paths - self.lower[:, None]) / self.bin_width[:, None])
+        positions = np.clip(np.nan_to_num(positions, nan=-1), -1, self.bins).astype(np.int64) + 1
+        offsets = np.arange(steps)[:, None] * (self.bins + 2)
+        self.counts += np.bincount((positions + offsets).ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+        self.minimum = np.minimum(self.minimum, paths.min(axis=1))
+        self.maximum = np.maximum(self.maximum, paths.max(axis=1))
+        self.count += repetitions
+
+    def percentiles(self, qs=PERCENTILES):
+        """
+        Estimates percentiles of the values at every step.
+
+        Parameters:
+        qs (tuple, optional): The percentiles, between 0 and 100. Default is (5, 25, 50, 75, 95).
+
+        Returns:
+        numpy.ndarray: The estimates, with one row per step and one column per percentile.
+        """
+        steps = len(self.lower)
+        inner = self.lower[:, None] + self.bin_width[:, None] * np.arange(self.bins + 1)
+        edges = np.concatenate([np.minimum(self.minimum, self.lower)[:, None], inner, np.maximum(self.maximum, inner[:, -1])[:, None]], axis=1)
+        cumulative = np.cumsum(self.counts, axis=1)
+
+        estimates = np.empty((steps, len(qs)))
+        for j, q in enumerate(qs):
+            rank = q / 100 * self.count
+            index = np.minimum((cumulative < rank).sum(axis=1), self.bins + 1)
+            rows = np.arange(steps)
+            below = np.where(index > 0, cumulative[rows, np.maximum(index - 1, 0)], 0)
+            in_bin = self.counts[rows, index]
+            fraction = np.where(in_bin > 0, (rank - below) / np.maximum(in_bin, 1), 0)
+            estimates[:, j] = edges[rows, index] + fraction * (edges[rows, index + 1] - edges[rows, index])
+        return np.clip(estimates, self.minimum[:, None], self.maximum[:, None])
+
+def simulate_paths(model_record, steps, repetitions, rng=None, chunk_size=CHUNK_SIZE):
+    """
+    This function simulates future paths of a fitted model, in chunks of paths.
+
+    The paths start from the filtered state at the end of the sample and are simulated for all the paths of a chunk at once.
+    The model matrices of ARIMA and SARIMAX models do not change over time, so each path is the analytic forecast plus a
+    deviation driven by the state and observation shocks, which keeps the intercepts and trends of the model exact.
+    The paths of an ensemble are drawn from its members in proportion to their weights.
+
+    Parameters:
+    model_record (ModelRecord or EnsembleRecord): The fitted model.
+    steps (int): The number of steps to simulate.
+    repetitions (int): The number of paths.
+    rng (numpy.random.Generator, optional): The random generator. Default is None (a new unseeded generator).
+    chunk_size (int, optional): The number of paths simulated at once. Default is 500.
+
+    Yields:
+    numpy.ndarray: A chunk of paths, with one row per step and one column per path.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if isinstance(model_record, EnsembleRecord):
+        for member, count in zip(model_record.members, rng.multinomial(repetitions, model_record.weights)):
+            if count:
+                yield from simulate_paths(member, steps, int(count), rng, chunk_size)
+        return
+
+    results = model_record.results(cov_type="none")
+    forecast = results.get_forecast(steps=steps)
+    mean = np.asarray(forecast.predicted_mean, dtype=np.float64)
+
+    ssm = results.model.ssm
+    design = ssm['design'].reshape(ssm.k_endog, ssm.k_states)[0]
+    transition = ssm['transition'].reshape(ssm.k_states, ssm.k_states)
+    selection = ssm['selection'].reshape(ssm.k_states, ssm.k_posdef)
+    state_shock = _factor(ssm['state_cov'].reshape(ssm.k_posdef, ssm.k_posdef))
+    observation_scale = np.sqrt(max(float(np.ravel(ssm['obs_cov'])[0]), 0))
+    initial_state = _factor(results.predicted_state_cov[:, :, -1])
+
+    for start in range(0, repetitions, chunk_size):
+        n = min(chunk_size, repetitions - start)
+        state = initial_state @ rng.standard_normal((ssm.k_states, n))
+        paths = np.empty((steps, n))
+        for step in range(steps):
+            paths[step] = mean[step] + design @ state + observation_scale * rng.standard_normal(n)
+            state = transition @ state + selection @ (state_shock @ rng.standard_normal((ssm.k_posdef, n)))
+        yield paths
+
+def simulate_forecast(model_record, last_observation, forecast_until_year, repetitions=REPETITIONS, percentiles=PERCENTILES,
+                      thresholds=(), replace_negative_forecast=False, seed=None, chunk_size=CHUNK_SIZE):
+    """
+    This function simulates the future paths of a fitted model and summarises them with percentile bands and threshold probabilities.
+
+    Like forecast_future, the first forecast year is anchored on the last observed value and negative values can be replaced
+    with zero. The paths are aggregated chunk by chunk, so the memory does not depend on the number of repetitions.
+
+    Parameters:
+    model_record (ModelRecord): The fitted model.
+    last_observation (tuple): The (last year, last value) pair of the series, as returned by forecasting.last_observations.
+    forecast_until_year (int): The year until which the paths are simulated.
+    repetitions (int, optional): The number of simulated paths. Default is 5000.
+    percentiles (tuple, optional): The percentiles of the bands. Default is (5, 25, 50, 75, 95).
+    thresholds (iterable, optional): The (year, value) pairs whose exceedance probabilities are computed. Default is () (none).
+    replace_negative_forecast (bool, optional): A flag indicating whether negative values should be replaced with zero. Default is False.
+    seed (int or numpy.random.SeedSequence, optional): The seed of the random generator. Default is None (unseeded).
+    chunk_size (int, optional): The number of paths simulated at once. Default is 500.
+
+    Returns:
+    dict: A dictionary with the keys:
+          'percentiles': a pandas DataFrame indexed by year, with one column per percentile named "p5", "p25", ...
+          'probabilities': one dictionary per threshold with its 'year' and 'value', the probability 'at' that the value is
+                           reached in that year and the probability 'by' that it is reached in that year or earlier
+                           (None if the year is outside the forecast).
+          'repetitions': the number of simulated paths.
+    """
+    last_data_year, last_value = last_observation
+    forecast_years = forecast_horizon(int(last_data_year), forecast_until_year)
+    steps = len(forecast_years)
+    rng = np.random.default_rng(seed)
+
+    forecast = model_record.get_forecast(steps=steps)
+    centers = np.asarray(forecast.predicted_mean, dtype=np.float64)
+    scales = np.sqrt(np.asarray(forecast.var_pred_mean, dtype=np.float64))
+    aggregate = StreamingPercentiles(centers, scales)
+
+    steps_of = {int(year): step for step, year in enumerate(forecast_years)}
+    thresholds = [(int(year), float(value), steps_of.get(int(year))) for year, value in thresholds]
+    reached_at = np.zeros(len(thresholds), dtype=np.int64)
+    reached_by = np.zeros(len(thresholds), dtype=np.int64)
+
+    for paths in simulate_paths(model_record, steps, repetitions, rng, chunk_size):
+        if steps:
+            paths[0] = last_value
+        if replace_negative_forecast:
+            np.maximum(paths, 0, out=paths)
+        aggregate.update(paths)
+        if thresholds:
+            running_max = np.maximum.accumulate(paths, axis=0)
+            for i, (_, value, step) in enumerate(thresholds):
+                if step is not None:
+                    reached_at[i] += np.count_nonzero(paths[step] >= value)
+                    reached_by[i] += np.count_nonzero(running_max[step] >= value)
+
+    bands = pd.DataFrame(aggregate.percentiles(percentiles), index=forecast_years, columns=[f"p{q}" for q in percentiles])
+    probabilities = [{'year': year,
+                      'value': value,
+                      'at': float(reached_at[i] / repetitions) if step is not None else None,
+                      'by': float(reached_by[i] / repetitions) if step is not None else None}
+                     for i, (year, value, step) in enumerate(thresholds)]
+    return {'percentiles': bands, 'probabilities': probabilities, 'repetitions': repetitions}
+
+def simulate_forecasts(forecast_results, forecast_keys, observations, repetitions=REPETITIONS, percentiles=PERCENTILES, thresholds=None,
+                       replace_negative_forecast=False, seed=0, n_jobs=1, chunk_size=CHUNK_SIZE):
+    """
+    This function simulates fan charts for a set of forecasts, with the forecasts spread over a pool of worker processes.
+
+    Every forecast gets its own random stream derived from the seed, so the results do not depend on the number of workers
+    or on the order in which the forecasts finish.
+
+    Parameters:
+    forecast_results (dict): The forecast results, as returned by forecast_future. Each entry needs its 'country', 'forecast_until_year' and 'model_object'.
+    forecast_keys (list): The keys of the forecasts to be simulated.
+    observations (dict): The (last year, last value) pair of each country, as returned by forecasting.last_observations.
+    repetitions (int, optional): The number of simulated paths per forecast. Default is 5000.
+    percentiles (tuple, optional): The percentiles of the bands. Default is (5, 25, 50, 75, 95).
+    thresholds (dict, optional): A dictionary mapping a forecast key to the (year, value) pairs whose exceedance probabilities are computed. Default is None.
+    replace_negative_forecast (bool, optional): A flag indicating whether negative values should be replaced with zero. Default is False.
+    seed (int, optional): The seed the random streams of the forecasts are derived from. Default is 0.
+    n_jobs (int, optional): The number of worker processes. 1 runs serially and None or 0 uses every CPU core. Default is 1.
+    chunk_size (int, optional): The number of paths simulated at once. Default is 500.
+
+    Yields:
+    tuple: A (forecast key, simulation) pair for each forecast, in completion order, where simulation is the dictionary returned by simulate_forecast.
+    """
+    thresholds = thresholds or {}
+    streams = np.random.SeedSequence(seed).spawn(len(forecast_keys))
+    tasks = {}
+    for forecast_key, stream in zip(forecast_keys, streams):
+        forecast = forecast_results[forecast_key]
+        tasks[forecast_key] = (forecast['model_object'], observations[forecast['country']], forecast['forecast_until_year'], repetitions,
+                               percentiles, thresholds.get(forecast_key, ()), replace_negative_forecast, stream, chunk_size)
+    yield from run_tasks(simulate_forecast, tasks, n_jobs)